@@ -0,0 +1,1373 @@
+# UI-independent analysis pipeline shared by the Streamlit app and the batch CLI.
+# Nothing here imports Streamlit: progress and warnings go through optional callbacks.
+import requests
+import os
+from dotenv import load_dotenv
+import re
+import time
+import logging
+import hashlib
+import zlib
+import threading
+import codecs
+from contextlib import contextmanager
+import contextvars
+from datetime import datetime
+from io import BytesIO
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeout
+from translation_memory import translate_with_memory
+from rate_limiter import get_rate_limiter
+from llm_scheduler import get_scheduler, INTERACTIVE, TRANSLATION, BACKGROUND
+from metrics import get_metrics, span, timed, track_document, record_llm_call
+from profiling import profile_document
+from chunk_store import get_chunk_store, chunk_hash, diff_chunks
+from llm_latency import get_latency_tracker
+from model_routing import route
+from pdf_backends import open_pdf, choose_backend
+
+# Load environment variables
+load_dotenv()
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Override to target another OpenAI-compatible endpoint, e.g. mock_llm_server.py
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+
+logger = logging.getLogger("bid_analyzer")
+
+
+_CHUNK_BOUNDARY_RE = re.compile(r'\n|(?<=[.!?])\s')
+_DROP_DIGITS = str.maketrans('', '', '0123456789')
+_ANCHOR_WINDOW = 32
+
+def _is_chunk_anchor(text, pos):
+    # Digits are ignored so renumbered pages and edited amounts do not move boundaries
+    window = text[pos:pos + _ANCHOR_WINDOW].translate(_DROP_DIGITS)
+    return zlib.crc32(window.encode('utf-8')) & 15 == 0
+
+def split_text_into_chunks(text, chunk_size=3000, overlap=300):
+    """Split text into chunks of about chunk_size characters, each overlapping the previous one.
+
+    Boundaries are content-defined: once a chunk holds 2/3 of chunk_size it ends at the first
+    line or sentence break whose following text hashes to an anchor (at 4/3 at the latest), so
+    an edit only moves the boundaries around it and unchanged chunks keep their content.
+    """
+    if not text or len(text.strip()) == 0:
+        return []
+    return list(iter_text_chunks([text], chunk_size, overlap))
+
+def iter_text_chunks(pieces, chunk_size=3000, overlap=300):
+    """split_text_into_chunks over an iterable of text pieces, holding only a window of the text."""
+    min_length = chunk_size * 2 // 3
+    max_length = chunk_size * 4 // 3
+    # Enough text past the chunk start to place the boundary and hash its anchor window
+    lookahead = max_length + _ANCHOR_WINDOW
+    pieces = iter(pieces)
+    buffer = ""
+    offset = 0  # position of buffer[0] in the whole text
+    start = 0
+    exhausted = False
+    while True:
+        while not exhausted and offset + len(buffer) - start <= lookahead:
+            piece = next(pieces, None)
+            if piece is None:
+                exhausted = True
+            else:
+                buffer += piece
+        remaining = offset + len(buffer) - start
+        if remaining <= 0:
+            return
+        local_start = start - offset
+        end = len(buffer)
+        if remaining > max_length:
+            end = None
+            last_break = None
+            for match in _CHUNK_BOUNDARY_RE.finditer(buffer, local_start + min_length, local_start + max_length):
+                last_break = match.end()
+                if _is_chunk_anchor(buffer, last_break):
+                    end = last_break
+                    break
+            if end is None:
+                end = last_break or local_start + max_length
+        chunk = buffer[max(0, local_start - overlap):end].strip()
+        if chunk:
+            yield chunk
+        start = offset + end
+        # Drop consumed text, keeping the next chunk's overlap; only once it is most of the buffer
+        drop = start - overlap - offset
+        if drop > len(buffer) // 2:
+            buffer = buffer[drop:]
+            offset += drop
+
+def iter_pdf_pages(pdf_file, on_warning=None, backend=None, extraction_info=None):
+    """Yield the text of each PDF page with its page marker. pdf_file is bytes or a binary file.
+
+    backend names a pdf_backends backend; by default one is chosen per document (see
+    choose_backend). extraction_info, when a dict, receives {"backend", "calibration"}.
+    """
+    on_warning = on_warning or logger.warning
+    calibration = None
+    if backend is None:
+        with span("extraction_calibration"):
+            backend, calibration = choose_backend(pdf_file)
+    if extraction_info is not None:
+        extraction_info.update(backend=backend, calibration=calibration)
+    document = open_pdf(pdf_file, backend)
+    try:
+        for page_num in range(document.page_count):
+            try:
+                page_text = document.page_text(page_num)
+                if page_text:
+                    # Preserve Unicode characters during extraction
+                    yield f"\n--- Page {page_num + 1} ---\n{page_text}\n"
+            except Exception as e:
+                on_warning(f"Error reading page {page_num + 1}: {str(e)}")
+                continue
+    finally:
+        document.close()
+
+NO_PDF_TEXT_MESSAGE = "No text could be extracted from the PDF. The PDF might be password-protected or contain only images."
+
+def extract_text_from_pdf(pdf_file, on_warning=None, on_error=None, backend=None, extraction_info=None):
+    """Extract text from a PDF (file object or bytes) with enhanced Unicode support."""
+    on_error = on_error or logger.error
+    try:
+        text = "".join(iter_pdf_pages(pdf_file, on_warning, backend, extraction_info))
+        if not text.strip():
+            on_error(NO_PDF_TEXT_MESSAGE)
+            return None
+        return text
+    except Exception as e:
+        on_error(f"Error reading PDF file: {str(e)}")
+        return None
+
+READ_BLOCK_BYTES = 256 * 1024
+
+def iter_decoded_text(stream, encoding="utf-8", block_size=READ_BLOCK_BYTES):
+    """Decode a binary stream block by block (invalid bytes are replaced, as in bytes.decode)."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+@contextmanager
+def open_document_source(source):
+    """A binary stream for document bytes, a path, or an open binary file (rewound)."""
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        source.seek(0)
+        yield source
+
+def document_sha256(source):
+    """Content hash of document bytes, a path, or a binary file, read block by block."""
+    digest = hashlib.sha256()
+    with open_document_source(source) as stream:
+        for block in iter(lambda: stream.read(READ_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class DocumentError(ValueError):
+    """Raised when a document cannot be turned into analyzable text."""
+
+class _Counted:
+    """Pass an iterable of strings through, adding up their length."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.characters = 0
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.characters += len(piece)
+            yield piece
+
+def prepare_document_chunks(source, file_type, on_warning=None, extraction_info=None):
+    """Extract, clean and chunk a PDF or TXT document in one streaming pass. Returns text_chunks.
+
+    source is the document bytes, a path, or a seekable binary file. The text is never held in
+    full: pages (or decoded blocks) are normalized and chunked as they arrive. For PDFs,
+    extraction_info (a dict) receives the extraction backend used.
+    """
+    with open_document_source(source) as stream, span("text_preparation"):
+        try:
+            if file_type == "application/pdf":
+                raw = iter_pdf_pages(stream, on_warning=on_warning, extraction_info=extraction_info)
+            else:
+                raw = iter_decoded_text(stream)
+            cleaned = _Counted(iter_clean_text(raw))
+            text_chunks = list(iter_text_chunks(cleaned))
+        except Exception as e:
+            raise DocumentError(f"Error reading PDF file: {str(e)}" if file_type == "application/pdf" else str(e)) from e
+    if file_type == "application/pdf" and not cleaned.characters:
+        raise DocumentError(NO_PDF_TEXT_MESSAGE)
+    if cleaned.characters < 100:
+        raise DocumentError("Document appears to be empty or too short for analysis.")
+    if not text_chunks:
+        raise DocumentError("Unable to process document into analyzable chunks.")
+    return text_chunks
+
+def format_summary_for_display(summary_text):
+    if not summary_text or summary_text.startswith("Error"):
+        return summary_text
+    
+    content_start_index = summary_text.find('**')
+    if content_start_index != -1:
+        summary_text = summary_text[content_start_index:]
+    else:
+        lines = summary_text.splitlines()
+        for i, line in enumerate(lines):
+            if "information" in line.lower() or "details" in line.lower():
+                summary_text = "\n".join(lines[i+1:])
+                break
+
+    formatted = re.sub(r'\*\*(.*?)\*\*', r'<h4>\1</h4>', summary_text)
+    lines = formatted.split('\n')
+    formatted_lines = []
+    in_list = False
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if in_list:
+                formatted_lines.append('</ul>')
+                in_list = False
+            continue
+            
+        if line.startswith(('* ', '- ', '• ')):
+            if not in_list:
+                formatted_lines.append('<ul>')
+                in_list = True
+            
+            if line.startswith('* '): line = line[2:]
+            elif line.startswith('- '): line = line[2:]
+            elif line.startswith('• '): line = line[2:]
+            
+            formatted_lines.append(f'<li>{line.strip()}</li>')
+        else:
+            if in_list:
+                formatted_lines.append('</ul>')
+                in_list = False
+            
+            if ':' in line and not line.startswith('<h4>'):
+                parts = line.split(':', 1)
+                if len(parts) == 2:
+                    key = parts[0].strip()
+                    value = parts[1].strip()
+                    if value and value.lower() not in ["not mentioned", "not found", "not specified"]:
+                        formatted_lines.append(f'<p><strong>{key}:</strong> {value}</p>')
+                    else:
+                        formatted_lines.append(f'<p><strong>{key}:</strong> <em>Not specified</em></p>')
+                else:
+                    formatted_lines.append(f'<p>{line}</p>')
+            else:
+                formatted_lines.append(f'<p>{line}</p>')
+    
+    if in_list:
+        formatted_lines.append('</ul>')
+    
+    return ''.join(formatted_lines)
+
+
+def format_answer_for_display(answer_text):
+    if not answer_text or answer_text.startswith("Error"):
+        return answer_text
+    formatted = answer_text.strip()
+    paragraphs = [p.strip() for p in formatted.split('\n') if p.strip()]
+    return '<br><br>'.join(paragraphs)
+
+_CONTROL_CHARS = r'\x00-\x08\x0B\x0C\x0E-\x1F\x7F'
+_CONTROL_SET = frozenset(chr(c) for c in [*range(0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+# One pass: a whitespace run (with any control characters in it) becomes one space and a run
+# of control characters alone disappears; Unicode text for non-Latin scripts is kept
+_NORMALIZE_RE = re.compile(rf'(?P<space>[{_CONTROL_CHARS}]*[^\S{_CONTROL_CHARS}][\s{_CONTROL_CHARS}]*)|[{_CONTROL_CHARS}]+')
+_CONTROL_RE = re.compile(f'[{_CONTROL_CHARS}]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def _normalize_match(match):
+    return " " if match.lastgroup == "space" else ""
+
+def _normalize(text):
+    # Text without control characters (the usual case) needs no per-match callback
+    if _CONTROL_RE.search(text) is None:
+        return _WHITESPACE_RE.sub(" ", text)
+    return _NORMALIZE_RE.sub(_normalize_match, text)
+
+def clean_text(text):
+    if not text:
+        return ""
+    return _normalize(text).strip()
+
+def iter_clean_text(pieces):
+    """clean_text over an iterable of text pieces, yielding normalized pieces as they arrive."""
+    carry = ""
+    started = False
+    for piece in pieces:
+        if carry:
+            piece = carry + piece
+        cut = len(piece)
+        while cut and (piece[cut - 1].isspace() or piece[cut - 1] in _CONTROL_SET):
+            cut -= 1
+        # A trailing whitespace/control run may continue in the next piece, so it waits for it
+        carry = piece[cut:]
+        normalized = _normalize(piece[:cut])
+        if not started:
+            normalized = normalized.lstrip()
+            started = bool(normalized)
+        if normalized:
+            yield normalized
+
+def html_escape(value):
+    """Escape minimal HTML entities for ReportLab Paragraph input."""
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+# Scripts that need an explicit font run inside an otherwise Latin paragraph
+SCRIPT_PATTERNS = [
+    ("hangul", r"[\u1100-\u11FF\u3130-\u318F\uAC00-\uD7AF]"),
+    ("hiragana_katakana", r"[\u3040-\u309F\u30A0-\u30FF]"),
+    ("cjk", r"[\u4E00-\u9FFF]"),
+    ("thai", r"[\u0E00-\u0E7F]"),
+    ("greek", r"[\u0370-\u03FF]"),
+    ("cyrillic", r"[\u0400-\u04FF]"),
+    ("hebrew", r"[\u0590-\u05FF]"),
+    ("arabic", r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]"),
+    ("devanagari", r"[\u0900-\u097F]"),
+    ("bengali", r"[\u0980-\u09FF]"),
+    ("gurmukhi", r"[\u0A00-\u0A7F]"),
+    ("gujarati", r"[\u0A80-\u0AFF]"),
+    ("odia", r"[\u0B00-\u0B7F]"),
+    ("tamil", r"[\u0B80-\u0BFF]"),
+    ("telugu", r"[\u0C00-\u0C7F]"),
+    ("kannada", r"[\u0C80-\u0CFF]"),
+    ("malayalam", r"[\u0D00-\u0D7F]")
+]
+_SCRIPT_RE = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in SCRIPT_PATTERNS))
+
+def segment_with_fonts(non_rtl_text, select_font, primary_font):
+    """Wrap each script run in <font face=...> so ReportLab renders mixed scripts in one paragraph."""
+    result_parts = []
+    current_chunk = []
+    current_font = None
+    # select_font is deterministic per character within one PDF, and can be slow (font lookups)
+    font_cache = {}
+
+    def flush():
+        if current_chunk:
+            text_chunk = html_escape("".join(current_chunk)).replace('\n', '<br/>')
+            if current_font:
+                # ReportLab expects the 'face' attribute on <font>
+                result_parts.append(f"<font face=\"{current_font}\">{text_chunk}</font>")
+            else:
+                result_parts.append(text_chunk)
+            current_chunk.clear()
+
+    for ch in non_rtl_text:
+        if _SCRIPT_RE.match(ch):
+            font_for_char = font_cache.get(ch)
+            if font_for_char is None:
+                font_for_char = font_cache[ch] = select_font(ch)
+        else:
+            # Default to primary font for Latin/punctuation
+            font_for_char = primary_font
+        if font_for_char != current_font:
+            flush()
+            current_font = font_for_char
+        current_chunk.append(ch)
+    flush()
+    return "".join(result_parts)
+
+class _LazyStory(list):
+    """A platypus story refilled from an iterator as the document template consumes it.
+
+    doc.build() takes flowables off the front of the list, so only a short lookahead
+    (enough for keepWithNext groups) is ever held instead of the whole story.
+    """
+
+    def __init__(self, flowables, lookahead=32):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def __len__(self):
+        while super().__len__() < self._lookahead:
+            flowable = next(self._source, None)
+            if flowable is None:
+                break
+            self.append(flowable)
+        return super().__len__()
+
+def create_pdf_bytes(text, title="Bid Analysis Summary"):
+    """Create a PDF with comprehensive Unicode support for all languages."""
+    buffer = BytesIO()
+    if not write_pdf(buffer, [("text", text)], title):
+        return None
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    return pdf_data
+
+@timed("pdf_build")
+def write_pdf(target, blocks, title="Bid Analysis Summary"):
+    """Write a PDF to target (a path or binary file) from ("heading" | "text", text) blocks.
+
+    blocks may be a generator; its flowables are laid out as they are produced. Returns
+    False when the PDF could not be created (e.g. reportlab is not installed).
+    """
+    try:
+        # Lazy import so the app still runs if reportlab isn't installed
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_LEFT
+        from reportlab.lib.units import inch
+        from reportlab.lib import utils
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        import os
+        import platform
+        # Optional imports for Arabic/Urdu shaping
+        try:
+            import arabic_reshaper as _arabic_reshaper
+            from bidi.algorithm import get_display as _bidi_get_display
+        except Exception:
+            _arabic_reshaper = None
+            _bidi_get_display = None
+
+        doc = SimpleDocTemplate(target, pagesize=A4, leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36, pageCompression=1)
+        
+        # Comprehensive font registration for maximum language support
+        unicode_fonts = []
+        system = platform.system()
+        
+        # Extended font paths for comprehensive Unicode support
+        font_candidates = {
+            "Windows": [
+                # Primary Unicode fonts
+                ("NotoSans", "C:/Windows/Fonts/NotoSans-Regular.ttf"),
+                ("ArialUnicode", "C:/Windows/Fonts/ARIALUNI.TTF"),
+                ("Nirmala", "C:/Windows/Fonts/Nirmala.ttf"),
+                ("NirmalaUI", "C:/Windows/Fonts/NirmalaUI.ttf"),
+                ("Arial", "C:/Windows/Fonts/arial.ttf"),
+                ("Calibri", "C:/Windows/Fonts/calibri.ttf"),
+                ("Tahoma", "C:/Windows/Fonts/tahoma.ttf"),
+                ("Segoe", "C:/Windows/Fonts/segoeui.ttf"),
+                ("Verdana", "C:/Windows/Fonts/verdana.ttf"),
+                # CJK and Asian language fonts
+                ("MingLiU", "C:/Windows/Fonts/mingliu.ttc"),
+                ("SimSun", "C:/Windows/Fonts/simsun.ttc"),
+                ("SimHei", "C:/Windows/Fonts/simhei.ttf"),
+                ("MicrosoftYaHei", "C:/Windows/Fonts/msyh.ttc"),
+                ("Malgun", "C:/Windows/Fonts/malgun.ttf"),
+                ("Meiryo", "C:/Windows/Fonts/meiryo.ttc"),
+                ("MSJhengHei", "C:/Windows/Fonts/msjh.ttc"),
+                ("Gulim", "C:/Windows/Fonts/gulim.ttc"),
+                ("Batang", "C:/Windows/Fonts/batang.ttc"),
+                # Indian language fonts
+                ("Mangal", "C:/Windows/Fonts/mangal.ttf"),
+                ("Latha", "C:/Windows/Fonts/latha.ttf"),
+                ("Shruti", "C:/Windows/Fonts/shruti.ttf"),
+                ("Tunga", "C:/Windows/Fonts/tunga.ttf"),
+                ("Raavi", "C:/Windows/Fonts/raavi.ttf"),
+                ("Kartika", "C:/Windows/Fonts/kartika.ttf"),
+                # Arabic/Urdu capable system fonts
+                ("TraditionalArabic", "C:/Windows/Fonts/trado.ttf"),
+                ("Arial", "C:/Windows/Fonts/arial.ttf"),
+                # Thai
+                ("LeelawadeeUI", "C:/Windows/Fonts/LeelawUI.ttf"),
+                ("AngsanaUPC", "C:/Windows/Fonts/angsau.ttf"),
+            ],
+            "Darwin": [
+                ("Arial", "/System/Library/Fonts/Arial.ttf"),
+                ("ArialUnicode", "/Library/Fonts/Arial Unicode MS.ttf"),
+                ("Helvetica", "/System/Library/Fonts/Helvetica.ttc"),
+                ("AppleGothic", "/System/Library/Fonts/AppleSDGothicNeo.ttc"),
+                ("PingFang", "/System/Library/Fonts/PingFang.ttc"),
+                ("Hiragino", "/System/Library/Fonts/Hiragino Sans GB.ttc"),
+                ("NotoSans", "/Library/Fonts/NotoSans-Regular.ttf"),
+            ],
+            "Linux": [
+                ("DejaVuSans", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"),
+                ("Liberation", "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf"),
+                ("NotoSans", "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf"),
+                ("NotoSansCJK", "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"),
+                ("Ubuntu", "/usr/share/fonts/truetype/ubuntu/Ubuntu-R.ttf"),
+                ("FreeSans", "/usr/share/fonts/truetype/freefont/FreeSans.ttf"),
+            ]
+        }
+        
+        # Register all available Unicode fonts
+        registered_fonts = []
+        platform_fonts = font_candidates.get(system, font_candidates["Linux"])
+        
+        for font_name, font_path in platform_fonts:
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont(font_name, font_path))
+                    registered_fonts.append(font_name)
+                except Exception as e:
+                    continue
+        
+        # Select the best available font (prioritize broad Unicode coverage) and auto-download fallback
+        primary_font = "Helvetica"  # Fallback until we find better
+        for preferred in [
+            "Nirmala", "NirmalaUI",  # Wide Indic coverage on Windows 10+
+            "ArialUnicode",           # Very broad coverage when present
+            "NotoSans",               # If installed locally
+            "DejaVuSans", "Tahoma",  # Good general unicode support
+            "Liberation", "Arial"
+        ]:
+            if preferred in registered_fonts:
+                primary_font = preferred
+                break
+
+        # If none of the good fonts are available, download NotoSans as an embedded fallback
+        if primary_font == "Helvetica":
+            try:
+                import requests as _requests
+                fonts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fonts")
+                os.makedirs(fonts_dir, exist_ok=True)
+                noto_path = os.path.join(fonts_dir, "NotoSans-Regular.ttf")
+                if not os.path.exists(noto_path):
+                    # Stable source for Noto Sans Regular
+                    url = "https://github.com/googlefonts/noto-fonts/raw/main/hinted/ttf/NotoSans/NotoSans-Regular.ttf"
+                    resp = _requests.get(url, timeout=20)
+                    if resp.status_code == 200:
+                        with open(noto_path, "wb") as f:
+                            f.write(resp.content)
+                if os.path.exists(noto_path):
+                    pdfmetrics.registerFont(TTFont("NotoSansFallback", noto_path))
+                    primary_font = "NotoSansFallback"
+            except Exception:
+                # If download fails, continue with Helvetica; text may show missing glyphs
+                pass
+
+        # Ensure an Arabic/Urdu font is available for RTL if needed
+        arabic_font = None
+        for preferred in ["TraditionalArabic", "ArialUnicode", "Tahoma", "NotoSansFallback", "Arial"]:
+            if preferred in registered_fonts or preferred == "NotoSansFallback":
+                arabic_font = preferred
+                break
+        if arabic_font is None:
+            try:
+                import requests as _requests
+                fonts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fonts")
+                os.makedirs(fonts_dir, exist_ok=True)
+                noto_urdu_path = os.path.join(fonts_dir, "NotoNastaliqUrdu-Regular.ttf")
+                if not os.path.exists(noto_urdu_path):
+                    url = "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoNastaliqUrdu/NotoNastaliqUrdu-Regular.ttf"
+                    resp = _requests.get(url, timeout=20)
+                    if resp.status_code == 200:
+                        with open(noto_urdu_path, "wb") as f:
+                            f.write(resp.content)
+                if os.path.exists(noto_urdu_path):
+                    pdfmetrics.registerFont(TTFont("NotoNastaliqUrdu", noto_urdu_path))
+                    arabic_font = "NotoNastaliqUrdu"
+            except Exception:
+                pass
+
+        # Helper to download/register a font (used for Indic and CJK fallbacks on Linux)
+        def ensure_font_registered(font_key, urls):
+            try:
+                if font_key in registered_fonts:
+                    return font_key
+                fonts_dir_local = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fonts")
+                os.makedirs(fonts_dir_local, exist_ok=True)
+                # accept either .ttf or .otf
+                ttf_path = os.path.join(fonts_dir_local, f"{font_key}.ttf")
+                otf_path = os.path.join(fonts_dir_local, f"{font_key}.otf")
+                target_path = ttf_path if os.path.exists(ttf_path) else (otf_path if os.path.exists(otf_path) else None)
+                if target_path is None:
+                    import requests as _requests
+                    for u in urls:
+                        try:
+                            r = _requests.get(u, timeout=20)
+                            if r.status_code == 200 and r.content:
+                                # choose extension from url
+                                if u.lower().endswith('.otf'):
+                                    target_path = otf_path
+                                else:
+                                    target_path = ttf_path
+                                with open(target_path, "wb") as f:
+                                    f.write(r.content)
+                                break
+                        except Exception:
+                            continue
+                if os.path.exists(target_path):
+                    pdfmetrics.registerFont(TTFont(font_key, target_path))
+                    # Ensure ReportLab can resolve family mapping (normal/bold/italic)
+                    try:
+                        pdfmetrics.registerFontFamily(font_key, normal=font_key, bold=font_key, italic=font_key, boldItalic=font_key)
+                    except Exception:
+                        pass
+                    registered_fonts.append(font_key)
+                    return font_key
+            except Exception:
+                pass
+            return None
+        
+        # Create styles with the best Unicode font
+        styles = getSampleStyleSheet()
+        
+        normal_style = ParagraphStyle(
+            'UnicodeNormal',
+            parent=styles['Normal'],
+            fontName=primary_font,
+            fontSize=10,
+            leading=14,
+            spaceAfter=6,
+            wordWrap='LTR'  # Left-to-right for most languages
+        )
+        
+        heading_style = ParagraphStyle(
+            'UnicodeHeading',
+            parent=styles['Heading1'],
+            fontName=primary_font,
+            fontSize=16,
+            leading=20,
+            spaceAfter=12,
+            wordWrap='LTR'
+        )
+
+        section_style = ParagraphStyle(
+            'UnicodeSection',
+            parent=styles['Heading2'],
+            fontName=primary_font,
+            fontSize=13,
+            leading=17,
+            spaceBefore=10,
+            spaceAfter=8,
+            wordWrap='LTR'
+        )
+        
+        # Support for RTL languages if needed
+        rtl_style = ParagraphStyle(
+            'UnicodeRTL',
+            parent=normal_style,
+            alignment=2,  # Right alignment for RTL
+            wordWrap='RTL'
+        )
+        if arabic_font:
+            rtl_style.fontName = arabic_font
+
+        # Cache styles by font to avoid re-creating styles for every paragraph
+        style_for_font = {primary_font: normal_style}
+
+        # Helper to choose a font given text content
+        def select_font_for_text(sample_text):
+            # Ranges for scripts
+            has_hangul = re.search(r'[\u1100-\u11FF\u3130-\u318F\uAC00-\uD7AF]', sample_text)
+            has_hiragana_katakana = re.search(r'[\u3040-\u309F\u30A0-\u30FF]', sample_text)
+            has_cjk = re.search(r'[\u4E00-\u9FFF]', sample_text)
+            has_thai = re.search(r'[\u0E00-\u0E7F]', sample_text)
+            has_greek = re.search(r'[\u0370-\u03FF]', sample_text)
+            has_cyrillic = re.search(r'[\u0400-\u04FF]', sample_text)
+            has_hebrew = re.search(r'[\u0590-\u05FF]', sample_text)
+            has_devanagari = re.search(r'[\u0900-\u097F]', sample_text)
+            has_bengali = re.search(r'[\u0980-\u09FF]', sample_text)
+            has_gurmukhi = re.search(r'[\u0A00-\u0A7F]', sample_text)
+            has_gujarati = re.search(r'[\u0A80-\u0AFF]', sample_text)
+            has_odia = re.search(r'[\u0B00-\u0B7F]', sample_text)
+            has_tamil = re.search(r'[\u0B80-\u0BFF]', sample_text)
+            has_telugu = re.search(r'[\u0C00-\u0C7F]', sample_text)
+            has_kannada = re.search(r'[\u0C80-\u0CFF]', sample_text)
+            has_malayalam = re.search(r'[\u0D00-\u0D7F]', sample_text)
+
+            # Korean
+            if has_hangul:
+                for candidate in ["Malgun", "Gulim", "Batang", "Meiryo", "NotoSansFallback", primary_font]:
+                    if candidate in registered_fonts or candidate == "NotoSansFallback":
+                        return candidate
+            # Japanese
+            if has_hiragana_katakana:
+                for candidate in ["NotoSansJP", "Meiryo", "MSJhengHei", "SimSun", "NotoSansFallback", primary_font]:
+                    # Already registered system font
+                    if candidate in registered_fonts:
+                        return candidate
+                    # Try to ensure downloadable Noto font
+                    if candidate == "NotoSansJP":
+                        ensured = ensure_font_registered("NotoSansJP", [
+                            "https://github.com/googlefonts/noto-cjk/raw/main/Sans/OTF/Japanese/NotoSansJP-Regular.otf"
+                        ])
+                        if ensured:
+                            return ensured
+                        else:
+                            continue
+                    # Fallback generic
+                    if candidate == "NotoSansFallback":
+                        return candidate
+            # Chinese (Han)
+            if has_cjk:
+                for candidate in ["MicrosoftYaHei", "SimHei", "SimSun", "MSJhengHei", "Meiryo", "NotoSansSC", "NotoSansFallback", primary_font]:
+                    if candidate in registered_fonts or candidate in ["NotoSansSC", "NotoSansFallback"]:
+                        if candidate == "NotoSansSC" and candidate not in registered_fonts:
+                            ensured = ensure_font_registered("NotoSansSC", [
+                                "https://github.com/googlefonts/noto-cjk/raw/main/Sans/OTF/SimplifiedChinese/NotoSansSC-Regular.otf"
+                            ])
+                            if ensured:
+                                return ensured
+                        return candidate
+            # Thai
+            if has_thai:
+                for candidate in ["LeelawadeeUI", "AngsanaUPC", "Tahoma", "NotoSansThai", "NotoSansFallback", primary_font]:
+                    if candidate in registered_fonts or candidate in ["NotoSansThai", "NotoSansFallback"]:
+                        if candidate == "NotoSansThai" and candidate not in registered_fonts:
+                            ensured = ensure_font_registered("NotoSansThai", [
+                                "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansThai/NotoSansThai-Regular.ttf"
+                            ])
+                            if ensured:
+                                return ensured
+                        return candidate
+            # Greek
+            if has_greek:
+                for candidate in ["Segoe", "ArialUnicode", "Arial", "NotoSansGreek", "NotoSansFallback", primary_font]:
+                    if candidate in registered_fonts or candidate in ["NotoSansGreek", "NotoSansFallback"]:
+                        if candidate == "NotoSansGreek" and candidate not in registered_fonts:
+                            ensured = ensure_font_registered("NotoSansGreek", [
+                                "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansGreek/NotoSansGreek-Regular.ttf"
+                            ])
+                            if ensured:
+                                return ensured
+                        return candidate
+            # Cyrillic (Russian, Ukrainian, etc.)
+            if has_cyrillic:
+                for candidate in ["Segoe", "ArialUnicode", "Arial", "NotoSansCyrillic", "NotoSansFallback", primary_font]:
+                    if candidate in registered_fonts or candidate in ["NotoSansCyrillic", "NotoSansFallback"]:
+                        if candidate == "NotoSansCyrillic" and candidate not in registered_fonts:
+                            ensured = ensure_font_registered("NotoSansCyrillic", [
+                                "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansCyrillic/NotoSansCyrillic-Regular.ttf"
+                            ])
+                            if ensured:
+                                return ensured
+                        return candidate
+
+            # Hebrew (RTL distinct from Arabic)
+            if has_hebrew:
+                for candidate in ["ArialUnicode", "Arial", "NotoSansHebrew", "NotoSansFallback", primary_font]:
+                    if candidate in registered_fonts or candidate in ["NotoSansHebrew", "NotoSansFallback"]:
+                        if candidate == "NotoSansHebrew" and candidate not in registered_fonts:
+                            ensured = ensure_font_registered("NotoSansHebrew", [
+                                "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansHebrew/NotoSansHebrew-Regular.ttf"
+                            ])
+                            if ensured:
+                                return ensured
+                        return candidate
+            # Indic scripts (download Noto variants if not available)
+            if has_devanagari:
+                for candidate in ["Nirmala", "Mangal", "NotoSansDevanagari"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansDevanagari", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansDevanagari/NotoSansDevanagari-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_bengali:
+                for candidate in ["Nirmala", "NirmalaUI", "Vrinda", "NotoSansBengali"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansBengali", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansBengali/NotoSansBengali-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_gurmukhi:
+                for candidate in ["Nirmala", "NirmalaUI", "Raavi", "NotoSansGurmukhi"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansGurmukhi", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansGurmukhi/NotoSansGurmukhi-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_gujarati:
+                for candidate in ["Nirmala", "NirmalaUI", "Shruti", "NotoSansGujarati"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansGujarati", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansGujarati/NotoSansGujarati-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_odia:
+                for candidate in ["Nirmala", "NirmalaUI", "Kalinga", "Kartika", "NotoSansOriya", "NotoSansOdia"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansOriya", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansOriya/NotoSansOriya-Regular.ttf",
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansOdia/NotoSansOdia-Regular.ttf"
+                ]) or ensure_font_registered("NotoSansOdia", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansOdia/NotoSansOdia-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_tamil:
+                for candidate in ["Nirmala", "NirmalaUI", "Latha", "NotoSansTamil"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansTamil", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansTamil/NotoSansTamil-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_telugu:
+                for candidate in ["Nirmala", "NirmalaUI", "Gautami", "NotoSansTelugu"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansTelugu", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansTelugu/NotoSansTelugu-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_kannada:
+                for candidate in ["Nirmala", "NirmalaUI", "Tunga", "NotoSansKannada"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansKannada", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansKannada/NotoSansKannada-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            if has_malayalam:
+                for candidate in ["Nirmala", "NirmalaUI", "Kartika", "NotoSansMalayalam"]:
+                    if candidate in registered_fonts:
+                        return candidate
+                ensured = ensure_font_registered("NotoSansMalayalam", [
+                    "https://github.com/googlefonts/noto-fonts/raw/main/unhinted/ttf/NotoSansMalayalam/NotoSansMalayalam-Regular.ttf"
+                ])
+                if ensured:
+                    return ensured
+            return primary_font
+
+        def paragraph_flowables(para):
+            # Detect RTL languages (Arabic, Hebrew, Urdu, etc.) first on raw paragraph
+            rtl_chars = re.findall(r'[\u0590-\u05FF\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]', para)
+
+            if rtl_chars and len(rtl_chars) > max(1, int(len(para) * 0.2)):
+                # Apply shaping + bidi reordering for Arabic-script languages
+                shaped = para
+                try:
+                    if _arabic_reshaper and _bidi_get_display:
+                        shaped = _bidi_get_display(_arabic_reshaper.reshape(para))
+                except Exception:
+                    pass
+                # Minimal HTML escaping after shaping
+                safe_para = html_escape(shaped).replace('\n', '<br/>')
+                yield Paragraph(safe_para, rtl_style)
+            else:
+                # Build a mixed-font paragraph so multi-language strings render correctly
+                mixed = segment_with_fonts(para, select_font_for_text, primary_font)
+                para_style = style_for_font.get(primary_font)
+                if para_style is None:
+                    para_style = ParagraphStyle(
+                        f'Unicode-{primary_font}',
+                        parent=normal_style,
+                        fontName=primary_font
+                    )
+                    style_for_font[primary_font] = para_style
+                yield Paragraph(mixed, para_style)
+            
+            yield Spacer(1, 0.15 * inch)
+
+        def story():
+            yield Paragraph(title, heading_style)
+            yield Spacer(1, 0.25 * inch)
+            for kind, text in blocks:
+                if kind == "heading":
+                    yield Paragraph(segment_with_fonts(text, select_font_for_text, primary_font), section_style)
+                    continue
+                text = text or ""
+                # Enhanced text processing for Unicode
+                # Ensure proper encoding for all Unicode characters
+                if not isinstance(text, str):
+                    # If it's bytes, decode it properly
+                    text = text.decode('utf-8')
+                paragraphs = [p.strip() for p in text.replace('\r', '').split('\n\n') if p.strip()]
+                if not paragraphs:
+                    paragraphs = [text]
+                # Process each paragraph with Unicode-aware handling
+                for para in paragraphs:
+                    if para.strip():
+                        yield from paragraph_flowables(para)
+
+        doc.build(_LazyStory(story()))
+        return True
+        
+    except Exception as e:
+        # Enhanced error reporting for debugging
+        error_msg = f"PDF creation error: {str(e)}"
+        print(error_msg)
+        return False
+
+# Upper bounds on a single attempt; observed latencies tighten them (see llm_latency.py)
+ASK_TIMEOUT_SECONDS = 30
+TRANSLATION_TIMEOUT_SECONDS = 60
+
+_hedge_executor = None
+_hedge_slots = None
+_hedge_executor_lock = threading.Lock()
+
+def _get_hedge_executor():
+    """The executor for hedged calls and the semaphore bounding hedges still in flight.
+
+    A hedge pair holds one slot until both of its requests have finished, including the
+    abandoned loser, so losers can tie up at most max_concurrent extra threads and the
+    primaries of later calls always find a free worker.
+    """
+    global _hedge_executor, _hedge_slots
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            max_concurrent = get_scheduler().max_concurrent
+            _hedge_executor = ThreadPoolExecutor(max_workers=2 * max_concurrent + 2, thread_name_prefix="llm-hedge")
+            _hedge_slots = threading.BoundedSemaphore(max_concurrent)
+        return _hedge_executor, _hedge_slots
+
+def _send_completion(headers, data, timeout):
+    return requests.post(GROQ_API_URL, headers=headers, json=data, timeout=timeout)
+
+def _hedged_completion(headers, data, timeout, hedge_after):
+    """Send the request; if it outlives hedge_after, send a duplicate and take the first response.
+
+    The slower request is cancelled if it has not started, otherwise abandoned and its response
+    discarded. The duplicate only gets the time left until the original deadline.
+    """
+    executor, hedge_slots = _get_hedge_executor()
+    primary = executor.submit(_send_completion, headers, data, timeout)
+    try:
+        return primary.result(timeout=hedge_after)
+    except FuturesTimeout:
+        pass
+    # A hedge spends real rate budget, so it is only sent when a request may go out right now
+    if not hedge_slots.acquire(blocking=False):
+        return primary.result()
+    if not get_latency_tracker().take_hedge() or not get_rate_limiter().try_acquire():
+        hedge_slots.release()
+        return primary.result()
+    get_metrics().increment("llm_hedges")
+    backup = executor.submit(_send_completion, headers, data, max(1.0, timeout - hedge_after))
+    outstanding = [2]
+    outstanding_lock = threading.Lock()
+
+    def finished(_):
+        with outstanding_lock:
+            outstanding[0] -= 1
+            last = outstanding[0] == 0
+        if last:
+            hedge_slots.release()
+
+    primary.add_done_callback(finished)
+    backup.add_done_callback(finished)
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            for other in pending:
+                other.cancel()
+            if future is backup:
+                get_metrics().increment("llm_hedge_wins")
+            return result
+    raise error
+
+def _post_completion(headers, data, priority, ceiling, attempt=0):
+    """POST one chat completion under the scheduler and rate limiter; returns (response, latency).
+
+    The timeout adapts to observed latencies for this model and max_tokens class (ceiling until enough
+    samples exist). With GROQ_HEDGE=1, calls outliving the p95 latency are hedged. The latency
+    recorded is the time from the first send, whichever request answered, and timeouts count as
+    observations at the deadline, so slow periods raise the percentiles instead of being dropped.
+    """
+    tracker = get_latency_tracker()
+    model, max_tokens = data["model"], data.get("max_tokens", 1000)
+    timeout = tracker.deadline(model, max_tokens, ceiling, attempt)
+    hedge_after = tracker.hedge_delay(model, max_tokens, timeout)
+    # The scheduler orders waiting calls by priority class and session before the rate budget is spent
+    wait_start = time.perf_counter()
+    with get_scheduler().slot(priority):
+        get_rate_limiter().acquire()
+        tracker.record_call()
+        get_metrics().observe("llm_queue_wait", time.perf_counter() - wait_start)
+        call_start = time.perf_counter()
+        try:
+            if hedge_after is None:
+                response = _send_completion(headers, data, timeout)
+            else:
+                response = _hedged_completion(headers, data, timeout, hedge_after)
+        except Exception as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                get_metrics().increment("llm_timeouts")
+                tracker.record_timeout(model, max_tokens, timeout)
+            record_llm_call(time.perf_counter() - call_start, None, attempt=attempt)
+            raise
+        latency = time.perf_counter() - call_start
+    if response.status_code < 400:
+        tracker.record(model, max_tokens, latency)
+    return response, latency
+
+def _retry_after_seconds(response, default):
+    try:
+        return float(response.headers.get("Retry-After") or default)
+    except (TypeError, ValueError):
+        return default
+
+def ask_llm(question, context, max_retries=3, priority=None, max_tokens=None, stage=None, model=None):
+    """Ask the model routed for stage (see model_routing.py); model/max_tokens override the route."""
+    if not GROQ_API_KEY:
+        return "Error: GROQ_API_KEY not found in environment variables."
+    headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+    # Allow prompt-only calls when context is empty
+    if context and context.strip():
+        user_content = f"Document Content:\n{context}\n\nQuestion: {question}\n\nPlease provide a detailed and structured response based on the document content."
+    else:
+        user_content = f"{question}"
+    messages = [
+        {"role": "system", "content": "You are an expert document analyst specializing in bid and tender documents. Provide clear, accurate, and structured responses based on the document content. If information is not found, clearly state that."},
+        {"role": "user", "content": user_content}
+    ]
+    stage_route = route(stage)
+    data = {"model": model or stage_route["model"], "messages": messages, "temperature": 0.3, "max_tokens": max_tokens or stage_route["max_tokens"]}
+    last_error = None
+    for attempt in range(max_retries):
+        try:
+            response, call_latency = _post_completion(headers, data, priority, ASK_TIMEOUT_SECONDS, attempt)
+            if response.status_code >= 400:
+                record_llm_call(call_latency, response.status_code, attempt=attempt)
+            if response.status_code == 429:
+                last_error = "HTTP Error 429: rate limited"
+                # Pause every caller, not just this one
+                get_rate_limiter().defer(_retry_after_seconds(response, min(2 ** attempt, 10)))
+                continue
+            if response.status_code == 401:
+                return "Error: Invalid API key. Please check your GROQ_API_KEY."
+            if response.status_code >= 500:
+                last_error = f"HTTP Error {response.status_code}: {response.text[:200]}"
+                time.sleep(1)
+                continue
+            if response.status_code >= 400:
+                try:
+                    err_json = response.json()
+                    return f"Error: {response.status_code} - {err_json.get('error', {}).get('message') or err_json}"
+                except Exception:
+                    return f"Error: {response.status_code} - {response.text}"
+            response_data = response.json()
+            record_llm_call(call_latency, response.status_code, response_data, attempt=attempt)
+            if 'choices' in response_data and len(response_data['choices']) > 0:
+                return response_data["choices"][0]["message"]["content"]
+            else:
+                return "Error: Invalid response format from API."
+        except Exception as e:
+            last_error = f"Unexpected Error: {str(e)}"
+            time.sleep(1)
+            continue
+    return f"Error after {max_retries} attempts: {last_error}"
+
+def ask_llm_validated(question, context, stage, validate, priority=None, max_tokens=None):
+    """ask_llm on the stage's model, re-asked once on its escalation model when validate(reply) fails."""
+    reply = ask_llm(question, context, priority=priority, max_tokens=max_tokens, stage=stage)
+    escalation_model = route(stage)["escalation_model"]
+    if reply.startswith("Error") or escalation_model is None or validate(reply):
+        return reply
+    get_metrics().increment("llm_escalations")
+    escalated = ask_llm(question, context, priority=priority, max_tokens=max_tokens, stage=stage, model=escalation_model)
+    return reply if escalated.startswith("Error") else escalated
+
+@timed("translation")
+def translate_text_with_llm(text_to_translate, target_language):
+    if not GROQ_API_KEY:
+        return "Error: GROQ_API_KEY not found. Cannot translate."
+
+    def _call_api(chunk_text, segmented=False, attempt_limit=6):
+        headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+        if segmented:
+            prompt = f"""Translate each numbered English segment below to {target_language}. Keep every <<n>> marker exactly as given at the start of its own line and translate only the text after it. Provide ONLY the marked translated lines, without any introductory phrases, explanations, or quotation marks. Segments:\n---\n{chunk_text}\n---"""
+        else:
+            prompt = f"""Translate the following English text to {target_language}. Provide ONLY the translated text, without any introductory phrases, explanations, or quotation marks. Text to translate:\n---\n{chunk_text}\n---"""
+        messages = [
+            {"role": "system", "content": f"You are an expert translator. Your task is to translate English text into {target_language} accurately."},
+            {"role": "user", "content": prompt}
+        ]
+        translation_route = route("translation")
+        data = {"model": translation_route["model"], "messages": messages, "temperature": 0.0, "max_tokens": translation_route["max_tokens"]}
+        last_err = None
+        for attempt in range(attempt_limit):
+            try:
+                resp, call_latency = _post_completion(headers, data, TRANSLATION, TRANSLATION_TIMEOUT_SECONDS, attempt)
+                if resp.status_code >= 400:
+                    record_llm_call(call_latency, resp.status_code, attempt=attempt)
+                if resp.status_code == 429:
+                    # Pause all concurrent translations, not just this one
+                    get_rate_limiter().defer(_retry_after_seconds(resp, min(1.5 * (2 ** attempt), 15)))
+                    continue
+                if resp.status_code >= 400:
+                    try:
+                        j = resp.json()
+                        last_err = f"{resp.status_code} - {j.get('error', {}).get('message') or j}"
+                    except Exception:
+                        last_err = f"{resp.status_code} - {resp.text}"
+                    time.sleep(min(1.5 * (2 ** attempt), 10))
+                    continue
+                resp.raise_for_status()
+                j = resp.json()
+                record_llm_call(call_latency, resp.status_code, j, attempt=attempt)
+                if 'choices' in j and len(j['choices']) > 0:
+                    return j['choices'][0]['message']['content']
+                last_err = "Invalid response format"
+            except Exception as e:
+                last_err = str(e)
+                time.sleep(min(1.5 * (2 ** attempt), 10))
+                continue
+        return f"Error during translation API call: {last_err}"
+
+    if not text_to_translate:
+        return ""
+    # Only segments not already in the translation memory are sent to the API
+    return translate_with_memory(text_to_translate, target_language, _call_api, max_chunk_chars=1400)
+
+def translate_to_languages(text_to_translate, languages, max_workers=4):
+    """Translate into several languages concurrently.
+
+    Yields (language, translated_text) as each language finishes. All workers share
+    the process rate limiter, so concurrency never exceeds the API budget.
+    """
+    if not languages:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(languages))) as executor:
+        # Each worker runs in a copy of the caller's context so LLM calls keep its session
+        futures = {
+            executor.submit(contextvars.copy_context().run, translate_text_with_llm, text_to_translate, formal_name): language
+            for language, formal_name in languages.items()
+        }
+        for future in as_completed(futures):
+            language = futures[future]
+            try:
+                yield language, future.result()
+            except Exception as e:
+                yield language, f"Error during translation: {str(e)}"
+
+def build_translation_bundle(summary, translations, timestamp=None):
+    """Build a zip with the original summary and every translation as PDF and TXT."""
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        outputs = [("english", "English", summary)] + [
+            (language.lower().replace(' ', '_'), language, text)
+            for language, text in translations.items() if text and not text.startswith("Error")
+        ]
+        for slug, language, text in outputs:
+            base_name = f"bid_analysis_{slug}_{timestamp}"
+            bundle.writestr(f"{base_name}.txt", text.encode('utf-8'))
+            pdf_data = create_pdf_bytes(text, f"Bid Analysis Summary ({language})")
+            if pdf_data:
+                bundle.writestr(f"{base_name}.pdf", pdf_data)
+    return buffer.getvalue()
+
+SUMMARY_PROMPT = """Analyze this bid/tender document and extract the following key information. If any information is not found, clearly state "Not mentioned" or "Not found":\n\n**BASIC INFORMATION:**\n- Tender Number/Reference:\n- Name of Work/Project:\n- Issuing Department/Organization:\n\n**FINANCIAL DETAILS:**\n- Estimated Contract Value:\n- EMD (Earnest Money Deposit):\n- EMD Exemption (if any):\n- Performance Security:\n\n**TIMELINE:**\n- Bid Submission Deadline:\n- Technical Bid Opening:\n- Contract Duration:\n\n**REQUIREMENTS:**\n- Key Eligibility Criteria:\n- Required Documents:\n- Technical Specifications (brief):\n- Payment Terms:\n\nProvide only the information that is clearly mentioned in the document."""
+
+# Chunk summaries are stored per prompt and map model, so changing either invalidates them
+_SUMMARY_SALT = hashlib.sha256(SUMMARY_PROMPT.encode("utf-8")).hexdigest()[:16]
+
+CHANGES_HEADING = "WHAT CHANGED SINCE THE PREVIOUS VERSION"
+
+# Field labels of the structured summary, taken from the prompt that produces it
+SUMMARY_FIELDS = re.findall(r'^- (.+?):$', SUMMARY_PROMPT, re.MULTILINE)
+# Share of the fields a chunk summary must keep for the map output to count as valid
+MIN_SUMMARY_FIELDS = 0.6
+
+def summary_is_valid(summary):
+    """A chunk summary is usable when it keeps most of the prompt's field structure."""
+    lowered = summary.lower()
+    return sum(1 for field in SUMMARY_FIELDS if field.lower() in lowered) >= MIN_SUMMARY_FIELDS * len(SUMMARY_FIELDS)
+
+def _summary_key(layout_hash):
+    return hashlib.sha256(f"{_SUMMARY_SALT}:{route('chunk_summary')['model']}:{layout_hash}".encode("utf-8")).hexdigest()
+
+def summarize_chunks(text_chunks, progress_callback=None, on_warning=None):
+    """Per-chunk summaries in chunk order (None where a chunk failed); stored summaries are reused."""
+    on_warning = on_warning or logger.warning
+    store = get_chunk_store()
+    keys = [_summary_key(chunk_hash(chunk)) for chunk in text_chunks]
+    cached = store.lookup_summaries(keys)
+    if cached:
+        get_metrics().increment("chunk_summaries_reused", sum(1 for key in keys if key in cached))
+    summaries = []
+    for i, (chunk, key) in enumerate(zip(text_chunks, keys)):
+        summary = cached.get(key)
+        if summary is None:
+            try:
+                summary = ask_llm_validated(SUMMARY_PROMPT, chunk, "chunk_summary", summary_is_valid, priority=BACKGROUND)
+                if summary.startswith("Error"):
+                    summary = None
+                else:
+                    store.store_summaries({key: summary})
+                    cached[key] = summary
+            except Exception as e:
+                on_warning(f"Error processing chunk {i+1}: {str(e)}")
+                summary = None
+        summaries.append(summary)
+        if progress_callback:
+            progress_callback((i + 1) / len(text_chunks))
+    return summaries
+
+@timed("summarization")
+def generate_comprehensive_summary(text_chunks, progress_callback=None, on_warning=None):
+    """Summarize each chunk (reusing stored chunk summaries), then consolidate. progress_callback receives a 0..1 fraction."""
+    if not text_chunks:
+        return "No content available for summarization."
+    all_summaries = [summary for summary in summarize_chunks(text_chunks, progress_callback, on_warning) if summary]
+    if not all_summaries:
+        return "Unable to generate summary due to processing errors."
+    final_summary_prompt = "Create a single comprehensive summary by combining and deduplicating the information below. Keep the same structure and keep only the most complete and accurate information for each field."
+    consolidation_context = chr(10).join([f"Section {i+1}:\n{summary}\n" for i, summary in enumerate(all_summaries)])
+    try:
+        with span("consolidation"):
+            final_summary = ask_llm(final_summary_prompt, consolidation_context, priority=BACKGROUND, stage="consolidation")
+        return final_summary if not final_summary.startswith("Error") else all_summaries[0]
+    except:
+        return all_summaries[0] if all_summaries else "Summary generation failed."
+
+@timed("summarization")
+def summarize_revision(text_chunks, previous, progress_callback=None, on_warning=None):
+    """Update a previous version's summary from the chunks that changed. Returns (summary, changes, revision).
+
+    Only new or edited chunks are summarized; the consolidated summary is revised in one call
+    and the differences are described in another, instead of re-consolidating every chunk.
+    """
+    hashes = [chunk_hash(chunk) for chunk in text_chunks]
+    unchanged, added, removed = diff_chunks(previous["chunk_hashes"], hashes)
+    revision = {
+        "previous_document_id": previous["id"],
+        "chunks": len(text_chunks),
+        "reused": len(unchanged),
+        "summarized": len(added),
+        "removed": len(removed),
+    }
+    if not added and not removed:
+        return previous["summary"], "- No content changes; the revision only differs in formatting or page numbering.", revision
+
+    added_summaries = [s for s in summarize_chunks([text_chunks[i] for i in added], progress_callback, on_warning) if s]
+    removed_summaries = list(get_chunk_store().lookup_summaries([_summary_key(previous["chunk_hashes"][i]) for i in removed]).values())
+    original = chr(10).join(f"Original section {i+1}:\n{s}\n" for i, s in enumerate(removed_summaries)) or "(no sections removed)"
+    revised = chr(10).join(f"Revised section {i+1}:\n{s}\n" for i, s in enumerate(added_summaries)) or "(no sections added)"
+
+    changes_prompt = "These are summaries of the sections that differ between the original and the revised version of a tender. List what changed (dates, amounts, eligibility, scope, documents) as short bullet points in the form '- Field: old -> new'. Ignore wording-only differences."
+    with span("revision_changes"):
+        changes = ask_llm(changes_prompt, f"ORIGINAL SECTIONS:\n{original}\n\nREVISED SECTIONS:\n{revised}", priority=BACKGROUND, stage="revision_changes")
+    if changes.startswith("Error"):
+        on_warning = on_warning or logger.warning
+        on_warning(f"Could not describe the changes: {changes}")
+        changes = None
+
+    update_prompt = "Update the current summary of a tender with its revised sections. Keep the same structure, replace values that the revision changes and keep everything else as it is."
+    update_context = f"CURRENT SUMMARY:\n{previous['summary']}\n\nCHANGES:\n{changes or 'See revised sections.'}\n\nREVISED SECTIONS:\n{revised}"
+    with span("consolidation"):
+        summary = ask_llm(update_prompt, update_context, priority=BACKGROUND, stage="consolidation")
+    if summary.startswith("Error"):
+        # Every chunk summary is stored by now, so a full consolidation costs one call
+        summary = generate_comprehensive_summary(text_chunks, on_warning=on_warning)
+    return summary, changes, revision
+
+def summarize_document(text_chunks, document_id, progress_callback=None, on_warning=None, previous_document_id=None):
+    """Summarize a document, incrementally when it is a revision of one analyzed before.
+
+    The previous version is previous_document_id, or else the stored document sharing most of
+    its chunks. Returns {"summary", "base_summary", "changes", "revision"}; summary leads with a
+    what-changed section for revisions, base_summary is the plain consolidated summary.
+    """
+    store = get_chunk_store()
+    hashes = [chunk_hash(chunk) for chunk in text_chunks]
+    if previous_document_id:
+        previous = store.load_document(previous_document_id)
+    else:
+        previous = store.find_previous_version(hashes, exclude_id=document_id)
+    if previous and previous["summary"]:
+        base_summary, changes, revision = summarize_revision(text_chunks, previous, progress_callback, on_warning)
+    else:
+        base_summary = generate_comprehensive_summary(text_chunks, progress_callback=progress_callback, on_warning=on_warning)
+        changes, revision = None, None
+    if not base_summary.startswith(("Error", "Unable to generate summary", "No content available")):
+        store.save_document(document_id, hashes, base_summary)
+    summary = f"**{CHANGES_HEADING}:**\n{changes}\n\n{base_summary}" if changes else base_summary
+    return {"summary": summary, "base_summary": base_summary, "changes": changes, "revision": revision}
+
+@timed("question_answering")
+def answer_question_from_chunks(question, text_chunks, progress_callback=None, on_warning=None):
+    """Ask the question against every chunk and merge the relevant answers."""
+    if not text_chunks:
+        return "No document content available to answer the question."
+    on_warning = on_warning or logger.warning
+    relevant_answers = []
+    for i, chunk in enumerate(text_chunks):
+        try:
+            answer = ask_llm(question, chunk, priority=INTERACTIVE, stage="qa_chunk")
+            if (not answer.startswith("Error") and "not found" not in answer.lower() and "not mentioned" not in answer.lower() and len(answer.strip()) > 20):
+                relevant_answers.append(answer)
+            if progress_callback:
+                progress_callback((i + 1) / len(text_chunks))
+        except Exception as e:
+            on_warning(f"Error processing chunk {i+1}: {str(e)}")
+            continue
+    if not relevant_answers:
+        return "No relevant information found in the document to answer your question."
+    if len(relevant_answers) == 1:
+        return relevant_answers[0]
+    combined_prompt = "Provide a comprehensive answer by combining the relevant information from the provided sections, removing duplicates and contradictions."
+    combined_context = f"Question: {question}\n\n" + chr(10).join([f"Section {i+1}: {answer}" for i, answer in enumerate(relevant_answers)])
+    try:
+        final_answer = ask_llm(combined_prompt, combined_context, priority=INTERACTIVE, stage="qa_merge")
+        return final_answer if not final_answer.startswith("Error") else relevant_answers[0]
+    except:
+        return relevant_answers[0]
+
+def analyze_document(source, file_type, progress_callback=None, on_warning=None, document_id=None, profile=None, previous_document_id=None):
+    """Run the full pipeline on a PDF or TXT document (bytes, a path, or a binary file).
+
+    progress_callback(fraction, text) is called between stages; it matches the
+    signature of st.progress. Raises DocumentError for unusable documents.
+    Stage timings and LLM usage are recorded under document_id (default: content hash).
+    With profile=True (or BID_ANALYZER_PROFILE set) result["profile"] is the directory
+    holding per-stage .prof files and a hot-spot summary. result["extraction"] records the
+    PDF extraction backend (and its calibration timings) chosen for this document.
+    Revisions of a stored document (or of previous_document_id) only re-summarize changed
+    chunks; result["changes"] and result["revision"] describe the difference.
+    """
+    document_id = document_id or document_sha256(source)
+    with track_document(document_id), profile_document(document_id, profile) as profiled, span("document_total"):
+        result = _analyze_document(source, file_type, progress_callback, on_warning, document_id, previous_document_id)
+    result["document_id"] = document_id
+    result["profile"] = profiled["directory"] if profiled else None
+    result["metrics"] = get_metrics().document(document_id)
+    get_metrics().write()
+    return result
+
+def _analyze_document(source, file_type, progress_callback, on_warning, document_id, previous_document_id):
+    def report(fraction, text):
+        if progress_callback:
+            progress_callback(fraction, text)
+
+    report(0.0, "Extracting text...")
+    extraction = {}
+    text_chunks = prepare_document_chunks(source, file_type, on_warning=on_warning, extraction_info=extraction)
+    report(0.25, f"Summarizing {len(text_chunks)} sections...")
+    summarized = summarize_document(
+        text_chunks,
+        document_id,
+        progress_callback=lambda fraction: report(0.25 + 0.75 * fraction, f"Summarizing {len(text_chunks)} sections..."),
+        on_warning=on_warning,
+        previous_document_id=previous_document_id,
+    )
+    report(1.0, "Done")
+    return {"text_chunks": text_chunks, "summary": summarized["summary"],
+            "base_summary": summarized["base_summary"], "changes": summarized["changes"], "revision": summarized["revision"],
+            "extraction": extraction or None}
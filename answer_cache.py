@@ -0,0 +1,305 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from analyzer_core import SUMMARY_FIELDS, answer_question_from_chunks
+from checklist import run_checklist
+from llm_scheduler import BACKGROUND
+from metrics import get_metrics
+
+# Answers that come back without waiting on the LLM: frequent questions are read off the
+# structured summary when it has the field, the rest are prefilled in the background after
+# upload, and every answer is cached per document so paraphrased repeats are instant too.
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "answers.sqlite3")
+# Cosine similarity of the normalized question terms at which two questions count as the same.
+# Matches must also cover every content word of the asked question (see match_frequent_question).
+MATCH_THRESHOLD = 0.8
+# A question asked about this many documents joins the prefilled set
+POPULAR_MIN_DOCUMENTS = 3
+
+# Frequent questions and the summary fields that answer them (none: prefilled from the document)
+FREQUENT_QUESTIONS = {
+    "What is the tender deadline?": ("Bid Submission Deadline",),
+    "What are the eligibility criteria?": ("Key Eligibility Criteria",),
+    "What is the contract value?": ("Estimated Contract Value",),
+    "What is the EMD amount?": ("EMD (Earnest Money Deposit)", "EMD Exemption (if any)"),
+    "What is the performance security?": ("Performance Security",),
+    "What is the contract duration?": ("Contract Duration",),
+    "When is the technical bid opening?": ("Technical Bid Opening",),
+    "What documents are required?": ("Required Documents",),
+    "What are the payment terms?": ("Payment Terms",),
+    "Who is the issuing organization?": ("Issuing Department/Organization",),
+    "What is the tender reference number?": ("Tender Number/Reference",),
+    "What is the scope of work?": (),
+    "Is there a pre-bid meeting?": (),
+    "Is a site visit required?": (),
+    "What are the penalty or liquidated damages clauses?": (),
+}
+SAMPLE_QUESTIONS = list(FREQUENT_QUESTIONS)[:3]
+
+_WORD_RE = re.compile(r'\w+')
+_STOPWORDS = set("""a an and any are as at be by can do does for from has have how i if in is it its me of on or
+please s the there this to was what when where which who whom why will with must should shall tell give list
+describe explain about clause clauses tender tenders bid bids contract document mentioned given specified stated exact amount much money details
+criteria criterion requirement requirements required need needed necessary condition conditions terms estimated""".split())
+# Surface words folded onto one term so paraphrases share their vocabulary
+_CANONICAL = {
+    "due": "deadline", "closing": "deadline", "last": "deadline", "submission": "deadline", "submit": "deadline", "date": "deadline",
+    "cost": "value", "worth": "value", "price": "value", "budget": "value",
+    "eligible": "eligibility", "qualification": "eligibility", "qualifications": "eligibility", "qualify": "eligibility",
+    "earnest": "emd", "deposit": "emd",
+    "period": "duration", "tenure": "duration", "timeline": "duration", "long": "duration",
+    "documents": "paperwork", "papers": "paperwork", "certificates": "paperwork",
+    "organization": "issuer", "organisation": "issuer", "department": "issuer", "authority": "issuer", "issuing": "issuer", "issued": "issuer",
+    "number": "reference", "ref": "reference", "id": "reference",
+    "open": "opening", "opens": "opening", "opened": "opening",
+    "penalties": "penalty", "liquidated": "penalty", "damages": "penalty", "ld": "penalty",
+    "prebid": "pre",
+}
+_NOT_PRESENT = ("not mentioned", "not found", "not specified", "not available", "n/a")
+_HEADING_RE = re.compile(r'^\s*\*\*[^*]+\*\*\s*:?\s*$')
+_FIELD_LINE_RE = re.compile(r'^\s*[-*•]?\s*\**\s*(?P<label>[^:*\n]+?)\s*\**\s*:\s*\**\s*(?P<value>.*)$')
+_FIELD_KEYS = {field.lower(): field for field in SUMMARY_FIELDS}
+
+
+def _singular(word):
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _question_words(question):
+    """(term, folded) per word: stopwords dropped, plurals trimmed, synonyms folded onto a shared term."""
+    for word in _WORD_RE.findall(question.lower()):
+        if word in _STOPWORDS:
+            continue
+        if word in _CANONICAL:
+            yield _CANONICAL[word], True
+        else:
+            yield _singular(word), False
+
+
+def question_terms(question):
+    """The set of normalized terms of a question."""
+    return {term for term, _ in _question_words(question)}
+
+
+def content_terms(question):
+    """Terms of words that were not folded synonyms; a matching question has to contain all of them.
+
+    Synonym folding lets "last date of submission" match "deadline", but the question's own
+    subject ("... of clarifications", "... for queries") must not be dropped by a match.
+    """
+    return {term for term, folded in _question_words(question) if not folded}
+
+
+def similarity(a, b):
+    """Cosine similarity of two term sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / math.sqrt(len(a) * len(b))
+
+
+def _matches(terms, required, candidate_terms, threshold):
+    if not required <= candidate_terms:
+        return 0.0
+    score = similarity(terms, candidate_terms)
+    return score if score >= threshold else 0.0
+
+
+_FREQUENT_TERMS = {question: question_terms(question) for question in FREQUENT_QUESTIONS}
+
+
+def match_frequent_question(question, threshold=MATCH_THRESHOLD):
+    """The frequent question this one paraphrases, or None."""
+    terms, required = question_terms(question), content_terms(question)
+    best, best_score = None, 0.0
+    for frequent, frequent_terms in _FREQUENT_TERMS.items():
+        score = _matches(terms, required, frequent_terms, threshold)
+        if score > best_score:
+            best, best_score = frequent, score
+    return best
+
+
+def parse_summary_fields(summary):
+    """{field label: value} from a structured summary; continuation lines join their field.
+
+    Later occurrences win, so in a revision summary the base summary (which follows the
+    "what changed" section) supplies the values.
+    """
+    fields = {}
+    current = None
+    for line in (summary or "").splitlines():
+        if not line.strip():
+            continue
+        if _HEADING_RE.match(line):
+            current = None
+            continue
+        match = _FIELD_LINE_RE.match(line)
+        label = _FIELD_KEYS.get(match.group("label").strip().lower()) if match else None
+        if label:
+            current = label
+            fields[label] = [match.group("value").strip()]
+        elif current:
+            fields[current].append(line.strip())
+    return {label: "\n".join(part for part in parts if part) for label, parts in fields.items()}
+
+
+def _present(value):
+    lowered = value.lower().strip(" .*")
+    return bool(lowered) and not any(lowered.startswith(marker) for marker in _NOT_PRESENT)
+
+
+def answer_from_summary(question, summary):
+    """Answer a frequent question from the summary fields, or None when the summary lacks them."""
+    frequent = match_frequent_question(question)
+    labels = FREQUENT_QUESTIONS.get(frequent) if frequent else None
+    if not labels:
+        return None
+    fields = parse_summary_fields(summary)
+    lines = [f"{label}: {fields[label]}" for label in labels if _present(fields.get(label, ""))]
+    return "\n".join(lines) or None
+
+
+class AnswerCache:
+    """SQLite store of answered questions per document, looked up by question similarity."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("ANSWER_CACHE_PATH") or DEFAULT_CACHE_PATH
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "document_id TEXT NOT NULL, question TEXT NOT NULL, terms TEXT NOT NULL, answer TEXT NOT NULL, "
+                "source TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (document_id, question))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_terms ON answers (terms, source)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(question):
+        return " ".join(sorted(question_terms(question)))
+
+    def lookup(self, document_id, question, threshold=MATCH_THRESHOLD):
+        """The cached answer whose question best matches this one: {question, answer, source, similarity}."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT question, terms, answer, source FROM answers WHERE document_id = ?", (document_id,)).fetchall()
+        terms, required = question_terms(question), content_terms(question)
+        best = None
+        for cached_question, cached_terms, answer, source in rows:
+            score = 1.0 if cached_question == question else _matches(terms, required, set(cached_terms.split()), threshold)
+            if score and (best is None or score > best["similarity"]):
+                best = {"question": cached_question, "answer": answer, "source": source, "similarity": round(score, 3)}
+        return best
+
+    def store(self, document_id, question, answer, source):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?)",
+                         (document_id, question, self._key(question), answer, source, time.time()))
+
+    def answers(self, document_id, sources=("question",)):
+        """(question, answer) pairs stored for a document from the given sources, oldest first."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT question, answer FROM answers WHERE document_id = ? AND source IN ({', '.join('?' * len(sources))}) ORDER BY created",
+                (document_id, *sources),
+            ).fetchall()
+        return [(question, answer) for question, answer in rows]
+
+    def popular_questions(self, limit=5, min_documents=POPULAR_MIN_DOCUMENTS):
+        """Questions users asked about at least min_documents documents, most widely asked first."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT MIN(question), COUNT(DISTINCT document_id) AS documents FROM answers "
+                "WHERE source = 'question' AND terms != '' GROUP BY terms HAVING documents >= ? "
+                "ORDER BY documents DESC LIMIT ?", (min_documents, limit)
+            ).fetchall()
+        return [question for question, _ in rows]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnswerCache()
+        return _default_cache
+
+
+def frequent_questions(limit=5):
+    """The built-in frequent questions plus popular ones asked across documents."""
+    questions = list(FREQUENT_QUESTIONS)
+    for question in get_answer_cache().popular_questions(limit):
+        if match_frequent_question(question) is None:
+            questions.append(question)
+    return questions
+
+
+def _known_answer(document_id, question, summary):
+    cache = get_answer_cache()
+    cached = cache.lookup(document_id, question) if document_id else None
+    if cached is None and summary:
+        answer = answer_from_summary(question, summary)
+        if answer:
+            cached = {"answer": answer, "source": "summary"}
+            if document_id:
+                cache.store(document_id, question, answer, "summary")
+    return cached
+
+
+def instant_answer(document_id, question, summary=None):
+    """A cached or summary-derived answer ({answer, source}) without any LLM call, or None."""
+    found = _known_answer(document_id, question, summary)
+    if found is not None:
+        get_metrics().increment("instant_answers")
+    return found
+
+
+def answer_question(question, text_chunks, document_id=None, summary=None, progress_callback=None, on_warning=None):
+    """Answer instantly when possible, otherwise from the chunks (caching the result). Returns {answer, source}."""
+    found = instant_answer(document_id, question, summary)
+    if found is not None:
+        if progress_callback:
+            progress_callback(1.0)
+        return found
+    answer = answer_question_from_chunks(question, text_chunks, progress_callback=progress_callback, on_warning=on_warning)
+    # Errors and empty results may be transient, so only real answers are kept
+    if document_id and not answer.startswith("Error") and not answer.startswith("No relevant information"):
+        get_answer_cache().store(document_id, question, answer, "question")
+    return {"answer": answer, "source": "document"}
+
+
+def prefill_frequent_answers(document_id, text_chunks, summary, progress_callback=None):
+    """Answer the frequent questions the summary cannot, in one packed checklist pass at background priority."""
+    cache = get_answer_cache()
+    pending = [q for q in frequent_questions() if _known_answer(document_id, q, summary) is None]
+    if not pending:
+        return {"document_id": document_id, "prefilled": 0}
+    results = run_checklist(
+        pending, text_chunks, priority=BACKGROUND,
+        progress_callback=(lambda fraction: progress_callback(fraction, f"Prefilling {len(pending)} frequent answers...")) if progress_callback else None,
+    )
+    prefilled = 0
+    for row in results:
+        # A miss in this narrow pass must not stop the full document scan when the question is asked
+        if row["status"] == "answered":
+            cache.store(document_id, row["question"], row["answer"], "prefill")
+            prefilled += 1
+    return {"document_id": document_id, "prefilled": prefilled, "questions": len(pending)}
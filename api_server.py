@@ -0,0 +1,479 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from analyzer_core import (
+    prepare_document_chunks,
+    summarize_document,
+    translate_text_with_llm,
+    create_pdf_bytes,
+    READ_BLOCK_BYTES,
+)
+from job_queue import JobQueue, DONE
+from llm_scheduler import get_scheduler, llm_session
+from llm_latency import get_latency_tracker
+from model_routing import describe_routes
+from metrics import get_metrics, span, track_document
+from profiling import profile_document
+from corpus import get_corpus, answer_corpus_question, parse_amount, FILTER_KEYS
+from checklist import list_templates, load_template, run_checklist
+from answer_cache import instant_answer, answer_question, prefill_frequent_answers, get_answer_cache
+from report import build_report
+
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+logger = logging.getLogger("bid_analyzer")
+
+
+def normalize_question(question):
+    return re.sub(r'\s+', ' ', question).strip().lower()
+
+
+class DocumentCache:
+    """LRU cache of analyzed documents keyed by content hash, shared by all clients."""
+
+    def __init__(self, max_documents=100):
+        self.max_documents = max_documents
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, document_id):
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is not None:
+                self._documents.move_to_end(document_id)
+            return document
+
+    def get_or_create(self, document_id, filename):
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is None:
+                document = {
+                    "id": document_id,
+                    "filename": filename,
+                    "text_chunks": None,
+                    "summary": None,
+                    "error": None,
+                    "base_summary": None,
+                    "translations": {},
+                    "checklist": None,
+                }
+                self._documents[document_id] = document
+                while len(self._documents) > self.max_documents:
+                    self._documents.popitem(last=False)
+            self._documents.move_to_end(document_id)
+            return document
+
+    def __len__(self):
+        return len(self._documents)
+
+
+class AnalyzerService:
+    """Summary, Q&A, translation and export on top of a job queue and a document cache."""
+
+    def __init__(self, max_workers=4, max_documents=100):
+        self.jobs = JobQueue(max_workers=max_workers)
+        self.documents = DocumentCache(max_documents=max_documents)
+
+    def upload(self, data, file_type, filename):
+        document_id = hashlib.sha256(data).hexdigest()
+        document = self.documents.get_or_create(document_id, filename)
+        if document["summary"] is not None:
+            return document, None
+        job = self.jobs.submit("analysis", self._analyze, document, data, file_type, key=("analysis", document_id))
+        return document, job
+
+    def _analyze(self, document, data, file_type, progress_callback):
+        with track_document(document["id"]), profile_document(document["id"]) as profiled, span("document_total"):
+            result = self._analyze_tracked(document, data, file_type, progress_callback)
+        if profiled:
+            result["profile"] = profiled["directory"]
+        return result
+
+    def _analyze_tracked(self, document, data, file_type, progress_callback):
+        try:
+            progress_callback(0.0, "Extracting text...")
+            extraction = {}
+            text_chunks = prepare_document_chunks(data, file_type, extraction_info=extraction)
+            # Chunks are published before summarization so questions can start right away
+            document["text_chunks"] = text_chunks
+            progress_callback(0.1, f"Summarizing {len(text_chunks)} sections...")
+            summarized = summarize_document(
+                text_chunks,
+                document["id"],
+                progress_callback=lambda fraction: progress_callback(0.1 + 0.9 * fraction, f"Summarizing {len(text_chunks)} sections..."),
+            )
+        except Exception as e:
+            document["error"] = str(e)
+            raise
+        document["base_summary"] = summarized["base_summary"]
+        document["summary"] = summarized["summary"]
+        self.jobs.submit("prefill", prefill_frequent_answers, document["id"], text_chunks, summarized["base_summary"], key=("prefill", document["id"]))
+        return {"document_id": document["id"], "summary": summarized["summary"], "changes": summarized["changes"], "revision": summarized["revision"],
+                "extraction": extraction or None}
+
+    def ask(self, document, question):
+        """Return (answer, source, None) when known without the LLM, else (None, None, job)."""
+        found = instant_answer(document["id"], question, document["summary"])
+        if found is not None:
+            return found["answer"], found["source"], None
+        job = self.jobs.submit("question", self._answer, document, question, key=("question", document["id"], normalize_question(question)))
+        return None, None, job
+
+    def _answer(self, document, question, progress_callback):
+        with track_document(document["id"]):
+            found = answer_question(question, document["text_chunks"], document_id=document["id"], progress_callback=progress_callback)
+        return {"document_id": document["id"], "question": question, "answer": found["answer"], "source": found["source"]}
+
+    def ask_corpus(self, question, filters=None, top_k=6):
+        return self.jobs.submit("corpus_question", self._ask_corpus, question, filters, top_k)
+
+    def _ask_corpus(self, question, filters, top_k, progress_callback):
+        progress_callback(0.0, "Searching the corpus...")
+        return answer_corpus_question(question, filters=filters, top_k=top_k)
+
+    def checklist(self, document, questions):
+        return self.jobs.submit("checklist", self._checklist, document, questions)
+
+    def _checklist(self, document, questions, progress_callback):
+        with track_document(document["id"]):
+            results = run_checklist(questions, document["text_chunks"],
+                                    progress_callback=lambda fraction: progress_callback(fraction, f"Answering {len(questions)} questions..."))
+        # The latest checklist goes into the document's full report
+        document["checklist"] = results
+        return {"document_id": document["id"], "results": results}
+
+    def report(self, document):
+        return self.jobs.submit("report", self._report, document)
+
+    def _report(self, document, progress_callback):
+        with track_document(document["id"]):
+            return build_report(document["id"], document["summary"], get_answer_cache().answers(document["id"]), document["checklist"] or [],
+                                dict(document["translations"]), document["text_chunks"] or [], progress_callback=progress_callback)
+
+    def translate(self, document, language):
+        if language in document["translations"]:
+            return document["translations"][language], None
+        job = self.jobs.submit("translation", self._translate, document, language, key=("translation", document["id"], language))
+        return None, job
+
+    def _translate(self, document, language, progress_callback):
+        progress_callback(0.0, f"Translating to {language}...")
+        with track_document(document["id"]):
+            translated = translate_text_with_llm(document["summary"], language)
+        if translated.startswith("Error"):
+            raise RuntimeError(translated)
+        document["translations"][language] = translated
+        return {"document_id": document["id"], "language": language, "translated_text": translated}
+
+
+class AnalyzerRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    server_version = "BidAnalyserAPI/1.0"
+
+    # --- helpers ---
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_bytes(self, data, content_type, filename=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_file(self, path, content_type, filename=None):
+        """Stream a file to the client block by block."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(READ_BLOCK_BYTES), b""):
+                self.wfile.write(block)
+
+    def _send_job(self, job, status=202, **extra):
+        payload = job.to_dict(include_result=False)
+        payload["poll"] = f"/jobs/{job.id}"
+        payload.update(extra)
+        self._send_json(status, payload)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_UPLOAD_BYTES:
+            raise ValueError(f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit")
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self):
+        body = self._read_body()
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise ValueError("Request body must be JSON")
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        return payload
+
+    def _document_or_404(self, document_id):
+        document = self.service.documents.get(document_id)
+        if document is None:
+            self._send_json(404, {"error": "Unknown document; upload it first"})
+        return document
+
+    def log_message(self, format, *args):
+        if os.getenv("API_ACCESS_LOG"):
+            super().log_message(format, *args)
+
+    # --- routes ---
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        if parts == ["health"]:
+            return self._send_json(200, {
+                "status": "ok",
+                "documents": len(self.service.documents),
+                "jobs": self.service.jobs.stats(),
+                "llm_scheduler": get_scheduler().stats(),
+                "llm_latency": get_latency_tracker().stats(),
+                "model_routes": describe_routes(),
+            })
+        if parts == ["metrics"]:
+            return self._send_bytes(get_metrics().to_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        if parts == ["metrics.json"]:
+            return self._send_json(200, get_metrics().snapshot())
+        if parts == ["checklists"]:
+            return self._send_json(200, {"templates": {name: load_template(name) for name in list_templates()}})
+        if parts == ["corpus"]:
+            return self._send_json(200, get_corpus().stats())
+        if parts == ["corpus", "documents"]:
+            try:
+                filters = self._corpus_filters({key: values[0] for key, values in query.items()})
+            except ValueError as e:
+                return self._send_json(400, {"error": str(e)})
+            return self._send_json(200, {"documents": get_corpus().list_documents(filters)})
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.service.jobs.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": "Unknown job"})
+            return self._send_json(200, job.to_dict())
+        if len(parts) == 3 and parts[0] == "documents" and parts[2] == "summary":
+            document = self._document_or_404(parts[1])
+            if document is None:
+                return
+            if document["summary"] is not None:
+                return self._send_json(200, {"document_id": document["id"], "summary": document["summary"]})
+            job = self.service.jobs.find_active(("analysis", document["id"]))
+            if job is not None:
+                return self._send_job(job)
+            return self._send_json(409, {"error": document["error"] or "Summary not available; upload the document again"})
+        if len(parts) == 3 and parts[0] == "documents" and parts[2] == "metrics":
+            document_metrics = get_metrics().document(parts[1])
+            if document_metrics is None:
+                return self._send_json(404, {"error": "No metrics recorded for this document"})
+            return self._send_json(200, document_metrics)
+        if len(parts) == 3 and parts[0] == "documents" and parts[2] == "export":
+            document = self._document_or_404(parts[1])
+            if document is None:
+                return
+            return self._export(document, query.get("format", ["pdf"])[0], query.get("language", [None])[0])
+        if len(parts) == 2 and parts[0] == "reports":
+            return self._download_report(parts[1])
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        # Jobs inherit this context, so each client gets its own fair share of the LLM budget
+        client_id = self.headers.get("X-Client-Id") or self.client_address[0]
+        with llm_session(client_id):
+            self._route_post(parts)
+
+    def _route_post(self, parts):
+        try:
+            if parts == ["documents"]:
+                return self._upload()
+            if parts == ["corpus", "questions"]:
+                return self._corpus_question(self._read_json())
+            if len(parts) == 3 and parts[0] == "documents" and parts[2] == "corpus":
+                document = self._document_or_404(parts[1])
+                if document is None:
+                    return
+                return self._add_to_corpus(document)
+            if len(parts) == 3 and parts[0] == "documents" and parts[2] == "reports":
+                document = self._document_or_404(parts[1])
+                if document is None:
+                    return
+                return self._report(document)
+            if len(parts) == 3 and parts[0] == "documents" and parts[2] in ("questions", "translations", "checklists"):
+                document = self._document_or_404(parts[1])
+                if document is None:
+                    return
+                payload = self._read_json()
+                if parts[2] == "questions":
+                    return self._question(document, payload)
+                if parts[2] == "checklists":
+                    return self._checklist(document, payload)
+                return self._translation(document, payload)
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.exception("Error handling POST %s", self.path)
+            return self._send_json(500, {"error": f"Error handling request: {e}"})
+        self._send_json(404, {"error": "Not found"})
+
+    def _upload(self):
+        data = self._read_body()
+        if not data:
+            return self._send_json(400, {"error": "Empty upload; send the file as the request body"})
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        filename = self.headers.get("X-Filename") or "document"
+        file_type = "application/pdf" if content_type == "application/pdf" or filename.lower().endswith(".pdf") else "text/plain"
+        document, job = self.service.upload(data, file_type, filename)
+        if job is None:
+            return self._send_json(200, {"document_id": document["id"], "status": "done", "summary": document["summary"]})
+        payload = job.to_dict(include_result=False)
+        payload.update({"document_id": document["id"], "poll": f"/jobs/{job.id}"})
+        self._send_json(202, payload)
+
+    def _question(self, document, payload):
+        question = (payload.get("question") or "").strip()
+        if not question:
+            return self._send_json(400, {"error": "Missing 'question'"})
+        if document["text_chunks"] is None:
+            return self._send_json(409, {"error": document["error"] or "Document is still being prepared; retry shortly"})
+        answer, source, job = self.service.ask(document, question)
+        if job is None:
+            return self._send_json(200, {"document_id": document["id"], "question": question, "answer": answer, "source": source})
+        self._send_job(job)
+
+    @staticmethod
+    def _corpus_filters(raw):
+        filters = {}
+        for key, value in (raw or {}).items():
+            if key not in FILTER_KEYS:
+                raise ValueError(f"Unknown corpus filter '{key}'; use one of {', '.join(FILTER_KEYS)}")
+            if key in ("min_emd", "max_emd", "min_contract_value", "max_contract_value") and isinstance(value, str):
+                parsed = parse_amount(value)
+                if parsed is None:
+                    raise ValueError(f"Cannot read an amount from {key}={value!r}")
+                value = parsed
+            filters[key] = value
+        return filters
+
+    def _corpus_question(self, payload):
+        question = (payload.get("question") or "").strip()
+        if not question:
+            return self._send_json(400, {"error": "Missing 'question'"})
+        filters = self._corpus_filters(payload.get("filters"))
+        job = self.service.ask_corpus(question, filters, int(payload.get("top_k") or 6))
+        self._send_job(job)
+
+    def _add_to_corpus(self, document):
+        if document["summary"] is None or document["text_chunks"] is None:
+            return self._send_json(409, {"error": document["error"] or "Summary is not ready yet"})
+        get_corpus().add_document(document["id"], document["filename"], document["text_chunks"], summary=document["base_summary"] or document["summary"])
+        self._send_json(200, get_corpus().get_document(document["id"]))
+
+    def _checklist(self, document, payload):
+        questions = [q.strip() for q in payload.get("questions") or [] if isinstance(q, str) and q.strip()]
+        if not questions and payload.get("template"):
+            try:
+                questions = load_template(payload["template"])
+            except KeyError as e:
+                return self._send_json(404, {"error": str(e.args[0])})
+        if not questions:
+            return self._send_json(400, {"error": "Send 'questions' (a list) or a 'template' name"})
+        if document["text_chunks"] is None:
+            return self._send_json(409, {"error": document["error"] or "Document is still being prepared; retry shortly"})
+        self._send_job(self.service.checklist(document, questions))
+
+    def _translation(self, document, payload):
+        language = (payload.get("language") or "").strip()
+        if not language:
+            return self._send_json(400, {"error": "Missing 'language'"})
+        if document["summary"] is None:
+            return self._send_json(409, {"error": document["error"] or "Summary is not ready yet"})
+        translated, job = self.service.translate(document, language)
+        if job is None:
+            return self._send_json(200, {"document_id": document["id"], "language": language, "translated_text": translated})
+        self._send_job(job)
+
+    def _export(self, document, fmt, language):
+        if language:
+            text = document["translations"].get(language)
+            if text is None:
+                return self._send_json(409, {"error": f"No {language} translation yet; POST /documents/{document['id']}/translations first"})
+        else:
+            text = document["summary"]
+            if text is None:
+                return self._send_json(409, {"error": "Summary is not ready yet"})
+        label = language or "English"
+        base_name = f"bid_analysis_{label.lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if fmt == "txt":
+            return self._send_bytes(text.encode("utf-8"), "text/plain; charset=utf-8", f"{base_name}.txt")
+        if fmt != "pdf":
+            return self._send_json(400, {"error": "format must be 'pdf' or 'txt'"})
+        pdf_data = create_pdf_bytes(text, f"Bid Analysis Summary ({label})")
+        if not pdf_data:
+            return self._send_json(500, {"error": "PDF generation is unavailable. Ensure 'reportlab' is installed on the server."})
+        self._send_bytes(pdf_data, "application/pdf", f"{base_name}.pdf")
+
+    def _report(self, document):
+        if document["summary"] is None:
+            return self._send_json(409, {"error": document["error"] or "Summary is not ready yet"})
+        job = self.service.report(document)
+        self._send_job(job, download=f"/reports/{job.id}")
+
+    def _download_report(self, job_id):
+        job = self.service.jobs.get(job_id)
+        if job is None or job.kind != "report":
+            return self._send_json(404, {"error": "Unknown report"})
+        if job.status != DONE:
+            return self._send_json(409, {"error": job.error or "Report is not ready yet", "poll": f"/jobs/{job.id}"})
+        if not os.path.exists(job.result["path"]):
+            return self._send_json(410, {"error": "Report has expired; POST /documents/<id>/reports again"})
+        self._send_file(job.result["path"], "application/pdf", f"bid_analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
+
+
+def build_server(host="127.0.0.1", port=8502, max_workers=4, max_documents=100):
+    handler = type("BoundAnalyzerRequestHandler", (AnalyzerRequestHandler,), {"service": AnalyzerService(max_workers, max_documents)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve document summary, Q&A, translation and export over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent analysis jobs")
+    parser.add_argument("--max-documents", type=int, default=100, help="Documents kept in the in-memory cache")
+    args = parser.parse_args(argv)
+    server = build_server(args.host, args.port, args.workers, args.max_documents)
+    print(f"Bid Analyser API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.service.jobs.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
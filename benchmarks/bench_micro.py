@@ -0,0 +1,255 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_pipeline import synthetic_tender
+
+# Microbenchmarks for the local CPU paths, with regression checks against a stored baseline.
+#
+#   python -m benchmarks.bench_micro --update-baseline     # record on the reference machine
+#   python -m benchmarks.bench_micro --margin 0.25         # exit 1 if anything got >25% slower
+
+FIXTURE_DIR = os.path.join(".cache", "bench_fixtures")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "micro_baseline.json")
+# Timings below this are dominated by noise, so they get this much absolute slack on top of the margin
+NOISE_FLOOR_SECONDS = 0.002
+
+MULTI_SCRIPT_SUMMARY = """**मूल जानकारी (BASIC INFORMATION):**
+- निविदा संख्या / Tender Number: PWD/417/2024
+- कार्य का नाम: दो लेन पुल का निर्माण (construction of a two-lane bridge)
+- 招标部门 Issuing Department: 公共工程部 Public Works Department
+
+**FINANCIAL DETAILS / 财务细节:**
+- Estimated Contract Value: Rs. 1,25,00,000 (एक करोड़ पच्चीस लाख रुपये)
+- 投标保证金 EMD: Rs. 2,50,000
+- ضمان الأداء Performance Security: 5% من قيمة العقد
+
+**TIMELINE / الجدول الزمني:**
+- Bid Submission Deadline: 15/03/2024 15:00 — 提交截止日期
+- آخر موعد لتقديم العطاءات: 15/03/2024
+- अनुबंध अवधि Contract Duration: 12 महीने
+
+**REQUIREMENTS:**
+- पात्रता मानदंड: पिछले तीन वर्षों में 50 लाख रुपये का औसत वार्षिक कारोबार
+- 所需文件: PAN, GST registration, experience certificates
+- المستندات المطلوبة: شهادات الخبرة والتسجيل الضريبي
+"""
+
+
+def multi_script_summary(copies):
+    return "\n".join(MULTI_SCRIPT_SUMMARY for _ in range(copies))
+
+
+def pdf_fixture(pages):
+    """A tender-like PDF of the given page count, generated once with reportlab and cached."""
+    path = os.path.join(FIXTURE_DIR, f"tender-{pages}p.pdf")
+    if os.path.exists(path):
+        return path
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    text = synthetic_tender(pages * 2800, seed=pages)
+    words = text.replace("\n", " ").split()
+    tmp_path = f"{path}.tmp"
+    pdf = canvas.Canvas(tmp_path, pagesize=A4)
+    per_page = len(words) // pages + 1
+    for page in range(pages):
+        page_words = words[page * per_page:(page + 1) * per_page]
+        text_object = pdf.beginText(40, 800)
+        text_object.setFont("Helvetica", 9)
+        for i in range(0, len(page_words), 16):
+            text_object.textLine(" ".join(page_words[i:i + 16]))
+        pdf.drawText(text_object)
+        pdf.showPage()
+    pdf.save()
+    os.replace(tmp_path, path)
+    return path
+
+
+def txt_fixture(megabytes):
+    """A UTF-8 tender text of roughly the given size, generated once and cached."""
+    path = os.path.join(FIXTURE_DIR, f"tender-{megabytes}mb.txt")
+    if os.path.exists(path):
+        return path
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    # Repeat a 1 MB block with ragged whitespace so clean_text has real work to do
+    block = synthetic_tender(1024 * 1024, seed=megabytes).replace(". ", ".   \n\n\n  ")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for _ in range(megabytes):
+            f.write(block)
+    os.replace(tmp_path, path)
+    return path
+
+
+def measure(func, repeat):
+    """Best-of-repeat wall time, then one extra run under tracemalloc for the allocation peak."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(timings), 4), "peak_mb": round(peak / (1024 * 1024), 2)}
+
+
+def build_benchmarks(core, args):
+    """Return [(name, params, callable)]; fixtures are loaded here so they are not measured."""
+    benches = []
+
+    try:
+        pdf_path = pdf_fixture(args.pdf_pages)
+    except ImportError:
+        print("  reportlab not installed: skipping extract_text_from_pdf")
+    else:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+        from io import BytesIO
+        benches.append(("extract_text_from_pdf", {"pages": args.pdf_pages},
+                        lambda: core.extract_text_from_pdf(BytesIO(pdf_bytes), on_error=_raise, backend="pypdf2")))
+        # One entry per optional backend that is installed, to compare against the default
+        from pdf_backends import available_backends, DEFAULT_BACKEND
+        for backend in available_backends():
+            if backend != DEFAULT_BACKEND:
+                benches.append((f"extract_text_from_pdf[{backend}]", {"pages": args.pdf_pages},
+                                lambda backend=backend: core.extract_text_from_pdf(pdf_bytes, on_error=_raise, backend=backend)))
+
+    txt_path = txt_fixture(args.txt_mb)
+    with open(txt_path, "rb") as f:
+        raw_text = f.read().decode("utf-8", errors="replace")
+    cleaned = core.clean_text(raw_text)
+    benches.append(("clean_text", {"megabytes": args.txt_mb}, lambda: core.clean_text(raw_text)))
+    benches.append(("split_text_into_chunks", {"megabytes": args.txt_mb}, lambda: core.split_text_into_chunks(cleaned)))
+    # The upload path end to end: decoded, cleaned and chunked while streaming from disk
+    benches.append(("prepare_document_chunks", {"megabytes": args.txt_mb},
+                    lambda: core.prepare_document_chunks(txt_path, "text/plain")))
+
+    summary = multi_script_summary(args.summary_copies)
+    benches.append(("format_summary_for_display", {"copies": args.summary_copies},
+                    lambda: core.format_summary_for_display(summary)))
+
+    # A font chooser that needs no font files, so only the segmentation itself is timed
+    def select_font(ch):
+        return core._SCRIPT_RE.match(ch).lastgroup
+    paragraphs = [p for p in summary.split("\n") if p.strip()]
+    benches.append(("segment_with_fonts", {"copies": args.summary_copies},
+                    lambda: [core.segment_with_fonts(p, select_font, "Helvetica") for p in paragraphs]))
+
+    pdf_summary = multi_script_summary(args.pdf_summary_copies)
+
+    def build_pdf():
+        if core.create_pdf_bytes(pdf_summary, title="Benchmark Summary") is None:
+            raise RuntimeError("create_pdf_bytes returned None (is reportlab installed?)")
+    benches.append(("create_pdf_bytes", {"copies": args.pdf_summary_copies}, build_pdf))
+    return benches
+
+
+def _raise(message):
+    raise RuntimeError(message)
+
+
+def compare(name, params, result, baseline, margin, memory_margin):
+    """Return a list of regression messages for one benchmark (empty when within budget)."""
+    base = baseline.get(name)
+    if not base:
+        return []
+    if base.get("params") != params:
+        print(f"  {name}: baseline recorded with {base.get('params')}, not compared")
+        return []
+    problems = []
+    time_limit = base["seconds"] * (1 + margin) + NOISE_FLOOR_SECONDS
+    if result["seconds"] > time_limit:
+        problems.append(f"{name}: {result['seconds']}s exceeds baseline {base['seconds']}s by more than {margin:.0%}")
+    memory_limit = base["peak_mb"] * (1 + memory_margin) + 0.1
+    if result["peak_mb"] > memory_limit:
+        problems.append(f"{name}: peak {result['peak_mb']} MB exceeds baseline {base['peak_mb']} MB by more than {memory_margin:.0%}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for extraction, cleaning, chunking, formatting and PDF export.")
+    parser.add_argument("--pdf-pages", type=int, default=300)
+    parser.add_argument("--txt-mb", type=int, default=50)
+    parser.add_argument("--summary-copies", type=int, default=200, help="Repetitions of the multi-script summary for formatting/segmentation")
+    parser.add_argument("--pdf-summary-copies", type=int, default=20, help="Repetitions of the multi-script summary rendered to PDF")
+    parser.add_argument("--quick", action="store_true", help="Small fixtures for a fast smoke run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run's results as the new baseline")
+    parser.add_argument("--margin", type=float, default=0.25, help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--memory-margin", type=float, default=0.10, help="Allowed peak-memory growth over the baseline")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.pdf_pages, args.txt_mb, args.summary_copies, args.pdf_summary_copies = 20, 2, 20, 2
+
+    import analyzer_core as core
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+    baseline = {} if args.update_baseline else stored.get("benchmarks", {})
+
+    print("Preparing fixtures...")
+    results = {}
+    failures = []
+    for name, params, func in build_benchmarks(core, args):
+        if args.only and name not in args.only:
+            continue
+        try:
+            result = measure(func, args.repeat)
+        except Exception as e:
+            print(f"  {name}: failed - {e}")
+            failures.append(f"{name}: {e}")
+            continue
+        results[name] = dict(result, params=params)
+        base = baseline.get(name)
+        delta = ""
+        if base and base.get("params") == params and base["seconds"]:
+            delta = f" ({(result['seconds'] / base['seconds'] - 1):+.0%} vs baseline)"
+        print(f"  {name:<28} {result['seconds']:>9.4f}s  {result['peak_mb']:>9.2f} MB peak{delta}")
+        failures.extend(compare(name, params, result, baseline, args.margin, args.memory_margin))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        # Merge so that an --only run refreshes just the benchmarks it measured
+        report["benchmarks"] = dict(stored.get("benchmarks", {}), **results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 1 if failures else 0
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+    if failures:
+        print("\nRegressions:")
+        for message in failures:
+            print(f"  {message}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# End-to-end throughput benchmark: summary, Q&A and translation over synthetic tenders.
+# Runs against mock_llm_server.py by default so no Groq quota is used.
+#
+#   python -m benchmarks.bench_pipeline --sizes 20000 100000 400000 --latency-mean 0.3
+
+SECTION_TEMPLATES = [
+    "Tender Reference No. {ref} is invited by the {dept} for the work of {work}.",
+    "The estimated cost of the work is Rs. {value} and the EMD of Rs. {emd} shall be paid online.",
+    "Bids must be submitted on or before {day}/0{month}/2024 at 15:00 hours through the e-procurement portal.",
+    "The bidder should have an average annual turnover of Rs. {turnover} lakh during the last three financial years.",
+    "Performance security of {security}% of the contract value shall be furnished within 15 days of award.",
+    "The contractor shall complete the work within {months} months from the date of commencement.",
+    "Payment shall be made through running account bills, subject to deduction of statutory taxes.",
+    "All materials shall conform to the relevant Indian Standards and CPWD specifications in force.",
+    "The bidder shall upload scanned copies of PAN, GST registration and experience certificates.",
+    "Any corrigendum will be published only on the portal and bidders are advised to check it regularly.",
+]
+
+WORKS = ["construction of a two-lane bridge", "resurfacing of district roads", "supply of laboratory equipment",
+         "renovation of the district hospital", "laying of water supply pipelines"]
+DEPARTMENTS = ["Public Works Department", "Municipal Corporation", "Water Resources Department", "Health Department"]
+
+DEFAULT_QUESTIONS = ["What is the tender deadline?", "What are the eligibility criteria?", "What is the contract value?"]
+
+
+def synthetic_tender(size_chars, seed=0):
+    """Deterministic tender-like text of roughly size_chars characters."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    page = 1
+    while length < size_chars:
+        if length // 3000 >= page:
+            page += 1
+            parts.append(f"\n--- Page {page} ---\n")
+        sentence = rng.choice(SECTION_TEMPLATES).format(
+            ref=f"PWD/{rng.randint(100, 999)}/2024", dept=rng.choice(DEPARTMENTS), work=rng.choice(WORKS),
+            value=f"{rng.randint(10, 500)},00,000", emd=f"{rng.randint(1, 20)},00,000",
+            day=rng.randint(10, 28), month=rng.randint(1, 9), turnover=rng.randint(20, 300),
+            security=rng.choice([3, 5, 10]), months=rng.choice([6, 9, 12, 18, 24]),
+        )
+        parts.append(sentence + " ")
+        length += len(sentence) + 1
+    return "".join(parts)
+
+
+def run_document(core, metrics, text, doc_id, questions, languages):
+    start = time.perf_counter()
+    with metrics.track_document(doc_id):
+        result = core.analyze_document(text.encode("utf-8"), "text/plain", document_id=doc_id)
+        summary_done = time.perf_counter()
+        for question in questions:
+            core.answer_question_from_chunks(question, result["text_chunks"])
+        qa_done = time.perf_counter()
+        for language in languages:
+            core.translate_text_with_llm(result["summary"], language)
+    end = time.perf_counter()
+    doc_metrics = metrics.get_metrics().document(doc_id) or {"counters": {}}
+    counters = doc_metrics["counters"]
+    return {
+        "document": doc_id,
+        "chars": len(text),
+        "chunks": len(result["text_chunks"]),
+        "wall_seconds": round(end - start, 3),
+        "summary_seconds": round(summary_done - start, 3),
+        "qa_seconds": round(qa_done - summary_done, 3),
+        "translation_seconds": round(end - qa_done, 3),
+        "llm_calls": counters.get("llm_calls", 0),
+        "llm_errors": counters.get("llm_errors", 0),
+        "llm_rate_limited": counters.get("llm_rate_limited", 0),
+        "prompt_tokens": counters.get("llm_prompt_tokens", 0),
+        "completion_tokens": counters.get("llm_completion_tokens", 0),
+    }
+
+
+def print_table(rows):
+    columns = ["chars", "chunks", "wall_seconds", "summary_seconds", "qa_seconds", "translation_seconds",
+               "llm_calls", "llm_errors", "llm_rate_limited", "prompt_tokens", "completion_tokens"]
+    header = ["document"] + columns
+    widths = [max(len(h), *(len(str(row[h])) for row in rows)) for h in header]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).ljust(w) for h, w in zip(header, widths)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against a mock or real LLM endpoint.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000, 400000], help="Synthetic document sizes in characters")
+    parser.add_argument("--questions", nargs="*", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--languages", nargs="*", default=["Hindi"])
+    parser.add_argument("--url", help="Use an already running endpoint instead of starting the mock server")
+    parser.add_argument("--rpm", type=int, default=6000, help="Client-side request budget for the run")
+    parser.add_argument("--distribution", default="lognormal", choices=["fixed", "uniform", "lognormal", "exponential"])
+    parser.add_argument("--latency-mean", type=float, default=0.2)
+    parser.add_argument("--latency-jitter", type=float, default=0.3)
+    parser.add_argument("--tpm", type=int, default=0, help="Mock server tokens-per-minute limit (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-translation-memory", action="store_true", help="Use the real translation memory instead of an empty temporary one")
+    parser.add_argument("--keep-chunk-store", action="store_true", help="Use the real chunk store instead of an empty temporary one")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    temp_dir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    if not args.keep_translation_memory:
+        # Must be set before the memory is first opened so cached segments do not hide API cost
+        os.environ["TRANSLATION_MEMORY_PATH"] = os.path.join(temp_dir, "translation_memory.sqlite3")
+    if not args.keep_chunk_store:
+        # Chunk summaries from earlier runs would otherwise be reused as revisions
+        os.environ["CHUNK_STORE_PATH"] = os.path.join(temp_dir, "chunks.sqlite3")
+
+    import analyzer_core as core
+    import chunk_store
+    import metrics
+    from rate_limiter import RateLimiter, set_rate_limiter
+
+    mock = None
+    if args.url:
+        core.GROQ_API_URL = args.url
+    else:
+        from mock_llm_server import start_mock_server
+        mock, core.GROQ_API_URL = start_mock_server(
+            port=0, distribution=args.distribution, latency_mean=args.latency_mean,
+            latency_jitter=args.latency_jitter, tokens_per_minute=args.tpm, seed=args.seed,
+        )
+        core.GROQ_API_KEY = core.GROQ_API_KEY or "mock-key"
+    set_rate_limiter(RateLimiter(args.rpm))
+    if not args.keep_chunk_store:
+        chunk_store._default_store = None
+
+    print(f"Endpoint: {core.GROQ_API_URL}")
+    rows = []
+    run_start = time.perf_counter()
+    for i, size in enumerate(args.sizes):
+        text = synthetic_tender(size, seed=args.seed + i)
+        rows.append(run_document(core, metrics, text, f"synthetic-{size}", args.questions, args.languages))
+        print(f"  {size} chars: {rows[-1]['wall_seconds']}s, {rows[-1]['llm_calls']} calls")
+    total = time.perf_counter() - run_start
+
+    print()
+    print_table(rows)
+    print(f"\nTotal wall time {total:.2f}s for {len(rows)} documents")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"documents": rows, "total_seconds": round(total, 3), "process": metrics.get_metrics().snapshot()}, f, indent=2)
+    if mock is not None:
+        mock.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+import argparse
+import contextvars
+import csv
+import io
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from analyzer_core import ask_llm, ask_llm_validated, prepare_document_chunks, create_pdf_bytes, DocumentError
+from llm_scheduler import TRANSLATION
+from metrics import timed
+
+# Checklist mode: many questions answered in one pass. Retrieval is shared, and the
+# questions routed to the same chunk are asked together in one structured prompt.
+BUILTIN_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "checklists")
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "checklists")
+# Bulk but user-visible: behind single questions, ahead of background analyses
+CHECKLIST_PRIORITY = TRANSLATION
+
+_TOKEN_RE = re.compile(r'\w+')
+_NUMBERING_RE = re.compile(r'^\s*(?:[-*•]|Q?\d+[.):]|\(\d+\))\s*', re.IGNORECASE)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_NUMBERED_LINE_RE = re.compile(r'^\s*(?:Q)?(\d+)[.):]\s*(.+)$', re.MULTILINE | re.IGNORECASE)
+_STOPWORDS = set("""a an and any are as at be by can do does for from has have how if in is it its of on or
+the there this to was what when where which who whom why will with must should shall bidder bidders tender""".split())
+
+
+def _tokens(text):
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _not_found(answer):
+    lowered = answer.lower()
+    return "not found" in lowered or "not mentioned" in lowered or len(answer.strip()) <= 20
+
+
+class ChunkRetriever:
+    """BM25 over one document's chunks, built once and shared by every checklist question."""
+
+    def __init__(self, text_chunks, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(_tokens(chunk)) for chunk in text_chunks]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        total = len(text_chunks)
+        self.idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def top(self, question, k=3):
+        """Indexes of the k best-scoring chunks (only chunks sharing a term with the question)."""
+        terms = set(_tokens(question)) & set(self.idf)
+        if not terms:
+            return []
+        scores = []
+        for index, counts in enumerate(self.term_counts):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1))
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, index))
+        scores.sort(reverse=True)
+        return [index for _, index in scores[:k]]
+
+
+def parse_questions(data, filename=None):
+    """Questions from a TXT (one per line, '#' comments) or CSV (a 'question' column, else the first) upload."""
+    text = data.decode("utf-8-sig", errors="replace") if isinstance(data, bytes) else data
+    if filename and filename.lower().endswith(".csv"):
+        rows = list(csv.reader(io.StringIO(text)))
+        if not rows:
+            return []
+        header = [cell.strip().lower() for cell in rows[0]]
+        column = header.index("question") if "question" in header else 0
+        body = rows[1:] if "question" in header else rows
+        lines = [row[column] for row in body if len(row) > column]
+    else:
+        lines = text.splitlines()
+    questions = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        question = _NUMBERING_RE.sub("", line).strip()
+        if question and question not in questions:
+            questions.append(question)
+    return questions
+
+
+def template_dir():
+    return os.getenv("CHECKLIST_DIR", DEFAULT_TEMPLATE_DIR)
+
+
+def list_templates():
+    """{name: path} of the shipped templates and the saved ones (saved templates win on name clashes)."""
+    templates = {}
+    for directory in (BUILTIN_TEMPLATE_DIR, template_dir()):
+        if os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(".txt"):
+                    templates[filename[:-4]] = os.path.join(directory, filename)
+    return templates
+
+
+def load_template(name):
+    path = list_templates().get(name)
+    if path is None:
+        raise KeyError(f"Unknown checklist template: {name}")
+    with open(path, "rb") as f:
+        return parse_questions(f.read())
+
+
+def save_template(name, questions):
+    """Save questions as a reusable template; returns the sanitized template name."""
+    safe_name = re.sub(r'[^\w-]+', "_", name.strip()).strip("_").lower()
+    if not safe_name:
+        raise ValueError("Template name must contain letters or digits")
+    os.makedirs(template_dir(), exist_ok=True)
+    with open(os.path.join(template_dir(), f"{safe_name}.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(questions) + "\n")
+    return safe_name
+
+
+def _parse_numbered_json(reply, count):
+    """{number: value} from a JSON object reply, falling back to 'N. text' lines."""
+    parsed = {}
+    match = _JSON_OBJECT_RE.search(reply)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            for key, value in data.items():
+                digits = re.sub(r'\D', "", str(key))
+                if digits and 1 <= int(digits) <= count:
+                    parsed[int(digits)] = value
+    if not parsed:
+        for number, text in _NUMBERED_LINE_RE.findall(reply):
+            if 1 <= int(number) <= count and int(number) not in parsed:
+                parsed[int(number)] = text.strip()
+    return parsed
+
+
+def _ask_batch(chunk, questions, priority=CHECKLIST_PRIORITY):
+    """Ask several questions against one chunk; returns {question_index: answer or None}."""
+    numbered = "\n".join(f"{i + 1}. {question}" for i, (_, question) in enumerate(questions))
+    prompt = ("Answer each numbered question using only the document content. Reply with a JSON object that maps "
+              "each question number to {\"answer\": \"...\", \"found\": true or false}; use found=false and "
+              "answer \"Not found\" when this content does not contain the information.\n\n" + numbered)
+    # Replies that do not answer most numbered questions in JSON are re-asked on the larger model
+    reply = ask_llm_validated(prompt, chunk, "checklist_batch", lambda text: 2 * len(_parse_numbered_json(text, len(questions))) >= len(questions),
+                              priority=priority, max_tokens=min(4000, 200 * len(questions) + 200))
+    if reply.startswith("Error"):
+        raise RuntimeError(reply)
+    parsed = _parse_numbered_json(reply, len(questions))
+    answers = {}
+    for number, (index, _) in enumerate(questions, start=1):
+        value = parsed.get(number)
+        if isinstance(value, dict):
+            answer = str(value.get("answer") or "").strip()
+            found = value.get("found", True) is not False and not _not_found(answer)
+        else:
+            answer = str(value or "").strip()
+            found = bool(answer) and not _not_found(answer)
+        answers[index] = answer if found else None
+    return answers
+
+
+def _merge_batch(items, priority=CHECKLIST_PRIORITY):
+    """Combine several candidate answers per question in one call; returns {question_index: answer}."""
+    listing = "\n\n".join(
+        f"{n}. {question}\n" + "\n".join(f"   - {candidate}" for candidate in candidates)
+        for n, (_, question, candidates) in enumerate(items, start=1)
+    )
+    prompt = ("For each numbered question, combine the candidate answers found in different sections of the document "
+              "into one complete answer, removing duplicates and contradictions. Reply with a JSON object that maps "
+              "each question number to the combined answer as a string.")
+    reply = ask_llm(prompt, listing, priority=priority, max_tokens=min(4000, 250 * len(items) + 200), stage="checklist_merge")
+    parsed = {} if reply.startswith("Error") else _parse_numbered_json(reply, len(items))
+    merged = {}
+    for n, (index, _, candidates) in enumerate(items, start=1):
+        value = parsed.get(n)
+        if isinstance(value, dict):
+            value = value.get("answer")
+        merged[index] = str(value).strip() if value else candidates[0]
+    return merged
+
+
+def _run_parallel(func, batches, max_workers, progress):
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Copy the caller's context so scheduler priority/session and metrics attribution carry over
+        futures = {executor.submit(contextvars.copy_context().run, func, *batch): batch for batch in batches}
+        for future in as_completed(futures):
+            results.append((futures[future], future))
+            progress()
+    return results
+
+
+@timed("checklist")
+def run_checklist(questions, text_chunks, top_k=3, per_prompt=8, max_workers=4, progress_callback=None, on_warning=None, priority=CHECKLIST_PRIORITY):
+    """Answer every question with shared retrieval and packed per-chunk prompts.
+
+    Each question is routed to its top_k chunks (BM25); the questions routed to one chunk are
+    asked together, per_prompt at a time, and questions answered in several chunks are merged
+    in packed calls as well. Returns [{"question", "answer", "status", "sections"}] in order,
+    where status is "answered", "not_found" or "error". LLM calls run at the given scheduler priority.
+    """
+    on_warning = on_warning or (lambda message: None)
+    if not questions:
+        return []
+    if not text_chunks:
+        return [{"question": q, "answer": "No document content available.", "status": "error", "sections": []} for q in questions]
+
+    retriever = ChunkRetriever(text_chunks)
+    routes = {}
+    for index, question in enumerate(questions):
+        # Questions without a lexical match fall back to the opening chunks, where tender facts usually sit
+        for chunk_index in retriever.top(question, top_k) or range(min(top_k, len(text_chunks))):
+            routes.setdefault(chunk_index, []).append((index, question))
+    batches = [
+        (text_chunks[chunk_index], routed[i:i + per_prompt], chunk_index)
+        for chunk_index, routed in sorted(routes.items())
+        for i in range(0, len(routed), per_prompt)
+    ]
+
+    candidates = {index: [] for index in range(len(questions))}
+    failed = set()
+    total_steps = len(batches) + 1
+    done = [0]
+
+    def progress():
+        done[0] += 1
+        if progress_callback:
+            progress_callback(min(done[0] / total_steps, 1.0))
+
+    for (chunk, routed, chunk_index), future in _run_parallel(lambda chunk, routed, _: _ask_batch(chunk, routed, priority), batches, max_workers, progress):
+        try:
+            answers = future.result()
+        except Exception as e:
+            on_warning(f"Checklist batch for section {chunk_index + 1} failed: {e}")
+            failed.update(index for index, _ in routed)
+            continue
+        for index, answer in answers.items():
+            if answer:
+                candidates[index].append((chunk_index, answer))
+
+    to_merge = [(index, questions[index], [answer for _, answer in sorted(found)]) for index, found in candidates.items() if len(found) > 1]
+    merged = {}
+    merge_batches = [(to_merge[i:i + per_prompt], priority) for i in range(0, len(to_merge), per_prompt)]
+    for _, future in _run_parallel(_merge_batch, merge_batches, max_workers, lambda: None):
+        try:
+            merged.update(future.result())
+        except Exception as e:
+            on_warning(f"Checklist merge failed: {e}")
+    if progress_callback:
+        progress_callback(1.0)
+
+    results = []
+    for index, question in enumerate(questions):
+        found = sorted(candidates[index])
+        sections = [chunk_index + 1 for chunk_index, _ in found]
+        if found:
+            answer = merged.get(index) or found[0][1]
+            results.append({"question": question, "answer": answer, "status": "answered", "sections": sections})
+        elif index in failed:
+            results.append({"question": question, "answer": "Error: the sections for this question could not be processed.", "status": "error", "sections": []})
+        else:
+            results.append({"question": question, "answer": "Not found in the document.", "status": "not_found", "sections": []})
+    return results
+
+
+def checklist_to_csv(results):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["#", "question", "answer", "status", "sections"])
+    for number, row in enumerate(results, start=1):
+        writer.writerow([number, row["question"], row["answer"], row["status"], " ".join(str(s) for s in row["sections"])])
+    return out.getvalue()
+
+
+def checklist_to_text(results, title="Checklist"):
+    answered = sum(1 for row in results if row["status"] == "answered")
+    lines = [f"{title} ({answered} of {len(results)} answered)", ""]
+    for number, row in enumerate(results, start=1):
+        lines.append(f"Q{number}. {row['question']}")
+        lines.append(f"A: {row['answer']}")
+        if row["sections"]:
+            lines.append(f"Sections: {', '.join(str(s) for s in row['sections'])}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def checklist_to_pdf(results, title="Checklist"):
+    """PDF bytes of the results (None when reportlab is unavailable)."""
+    return create_pdf_bytes(checklist_to_text(results, title), title)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a checklist of questions against a tender in one batched pass.")
+    parser.add_argument("document", help="PDF or TXT tender document")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--template", default="standard_compliance", help=f"Template name ({', '.join(list_templates()) or 'none found'})")
+    source.add_argument("--questions", help="TXT or CSV file of questions")
+    parser.add_argument("--save-template", help="Save the questions as a template under this name")
+    parser.add_argument("--top-k", type=int, default=3, help="Sections retrieved per question")
+    parser.add_argument("--per-prompt", type=int, default=8, help="Questions packed into one prompt")
+    parser.add_argument("--csv", help="Write results to this CSV file")
+    parser.add_argument("--pdf", help="Write results to this PDF file")
+    args = parser.parse_args(argv)
+
+    if args.questions:
+        with open(args.questions, "rb") as f:
+            questions = parse_questions(f.read(), args.questions)
+    else:
+        questions = load_template(args.template)
+    if args.save_template:
+        print(f"Saved template '{save_template(args.save_template, questions)}'")
+    file_type = "application/pdf" if args.document.lower().endswith(".pdf") else "text/plain"
+    try:
+        text_chunks = prepare_document_chunks(args.document, file_type)
+    except DocumentError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    results = run_checklist(questions, text_chunks, top_k=args.top_k, per_prompt=args.per_prompt,
+                            on_warning=lambda message: print(message, file=sys.stderr))
+    print(checklist_to_text(results, f"Checklist for {os.path.basename(args.document)}"))
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            f.write(checklist_to_csv(results))
+    if args.pdf:
+        pdf_data = checklist_to_pdf(results, f"Checklist for {os.path.basename(args.document)}")
+        if pdf_data is None:
+            print("PDF export needs reportlab.", file=sys.stderr)
+            return 1
+        with open(args.pdf, "wb") as f:
+            f.write(pdf_data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
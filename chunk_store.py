@@ -0,0 +1,126 @@
+import difflib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Per-chunk summaries and the chunk layout of every analyzed document, so a revised
+# tender (corrigendum) only sends its changed chunks back through the LLM.
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "chunks.sqlite3")
+# Share of chunks two documents must have in common (in both directions) to count as versions of one tender
+MIN_SHARED_FRACTION = 0.5
+
+_PAGE_MARKER_RE = re.compile(r'-{3} Page \d+ -{3}')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def chunk_hash(chunk, salt=""):
+    """Content hash of a chunk, ignoring page numbering and whitespace."""
+    normalized = _WHITESPACE_RE.sub(" ", _PAGE_MARKER_RE.sub(" ", chunk)).strip()
+    return hashlib.sha256(f"{salt}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+def diff_chunks(old_hashes, new_hashes):
+    """Align two chunk-hash sequences. Returns (unchanged, added, removed) index lists.
+
+    unchanged holds (old_index, new_index) pairs; added indexes new_hashes, removed old_hashes.
+    """
+    unchanged, added, removed = [], [], []
+    matcher = difflib.SequenceMatcher(a=old_hashes, b=new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            unchanged.extend(zip(range(i1, i2), range(j1, j2)))
+        else:
+            removed.extend(range(i1, i2))
+            added.extend(range(j1, j2))
+    return unchanged, added, removed
+
+
+class ChunkStore:
+    """SQLite store of chunk summaries (by chunk hash) and document chunk layouts."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("CHUNK_STORE_PATH") or DEFAULT_STORE_PATH
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS chunk_summaries (hash TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id TEXT PRIMARY KEY, chunk_hashes TEXT NOT NULL, summary TEXT, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS document_chunks (hash TEXT NOT NULL, document_id TEXT NOT NULL, PRIMARY KEY (hash, document_id))")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup_summaries(self, hashes):
+        """Return {hash: summary} for the chunk hashes already summarized."""
+        found = {}
+        hashes = list(dict.fromkeys(hashes))
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                found.update(conn.execute(
+                    f"SELECT hash, summary FROM chunk_summaries WHERE hash IN ({','.join('?' * len(batch))})", batch
+                ).fetchall())
+        return found
+
+    def store_summaries(self, summaries):
+        if not summaries:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO chunk_summaries VALUES (?, ?, ?)", [(h, s, now) for h, s in summaries.items()])
+
+    def save_document(self, document_id, hashes, summary):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)", (document_id, json.dumps(hashes), summary, time.time()))
+            conn.execute("DELETE FROM document_chunks WHERE document_id = ?", (document_id,))
+            conn.executemany("INSERT OR IGNORE INTO document_chunks VALUES (?, ?)", [(h, document_id) for h in set(hashes)])
+
+    def load_document(self, document_id):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT id, chunk_hashes, summary FROM documents WHERE id = ?", (document_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "chunk_hashes": json.loads(row[1]), "summary": row[2]}
+
+    def find_previous_version(self, hashes, exclude_id=None, min_shared=MIN_SHARED_FRACTION):
+        """The stored document sharing the most chunks with hashes, if it looks like the same tender."""
+        unique = list(dict.fromkeys(hashes))
+        if not unique:
+            return None
+        shared = {}
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                for document_id, count in conn.execute(
+                    f"SELECT document_id, COUNT(*) FROM document_chunks WHERE hash IN ({','.join('?' * len(batch))}) GROUP BY document_id", batch
+                ):
+                    shared[document_id] = shared.get(document_id, 0) + count
+        shared.pop(exclude_id, None)
+        for document_id, count in sorted(shared.items(), key=lambda item: item[1], reverse=True):
+            if count < min_shared * len(unique):
+                break
+            document = self.load_document(document_id)
+            if document and document["summary"] and count >= min_shared * len(set(document["chunk_hashes"])):
+                return document
+        return None
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_chunk_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ChunkStore()
+        return _default_store
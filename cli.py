@@ -0,0 +1,185 @@
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analyzer_core import analyze_document, DocumentError
+from rate_limiter import SharedRateLimiter, set_rate_limiter
+from metrics import get_metrics
+from profiling import PROFILE_ENV
+from corpus import get_corpus, extract_tender_fields
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+CSV_FIELDS = ["file", "sha256", "status", "chunks", "seconds", "summary", "error"]
+
+
+def collect_inputs(patterns):
+    """Expand directories and glob patterns into a sorted list of PDF/TXT paths."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in files:
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        paths.add(os.path.join(root, name))
+        else:
+            for path in glob.glob(pattern, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                    paths.add(path)
+    return sorted(paths)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def record_path(output_dir, sha256):
+    return os.path.join(output_dir, f"{sha256[:16]}.json")
+
+
+def load_record(output_dir, sha256):
+    try:
+        with open(record_path(output_dir, sha256), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_record(output_dir, record):
+    # Write-then-rename so an interrupted run never leaves a half-written record behind
+    path = record_path(output_dir, record["sha256"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(limiter):
+    set_rate_limiter(limiter)
+
+
+def process_document(path, sha256, output_dir, add_to_corpus=False):
+    """Analyze one document in a worker process and persist its record."""
+    start = time.time()
+    record = {"file": path, "sha256": sha256, "status": "failed", "chunks": 0, "seconds": 0.0, "summary": "", "error": "", "metrics": None, "profile": None, "revision": None, "extraction": None}
+    try:
+        file_type = "application/pdf" if path.lower().endswith(".pdf") else "text/plain"
+        result = analyze_document(path, file_type, document_id=sha256)
+        record["metrics"] = result["metrics"]
+        record["profile"] = result.get("profile")
+        record["revision"] = result.get("revision")
+        record["extraction"] = result.get("extraction")
+        record["chunks"] = len(result["text_chunks"])
+        record["summary"] = result["summary"]
+        if result["summary"].startswith(("Error", "Unable to generate summary")):
+            record["error"] = result["summary"]
+        else:
+            record["status"] = "done"
+            if add_to_corpus:
+                get_corpus().add_document(sha256, os.path.basename(path), result["text_chunks"], summary=result["base_summary"],
+                                          fields=extract_tender_fields(result["base_summary"], result["text_chunks"]))
+    except DocumentError as e:
+        record["error"] = str(e)
+    except Exception as e:
+        record["error"] = f"Error processing document: {str(e)}"
+    record["seconds"] = round(time.time() - start, 2)
+    write_record(output_dir, record)
+    return record
+
+
+def write_csv(output_dir, records, filename="summaries.csv"):
+    path = os.path.join(output_dir, filename)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for record in sorted(records, key=lambda r: r["file"]):
+            writer.writerow(record)
+    return path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Summarize a directory of bid/tender documents without the Streamlit UI.")
+    parser.add_argument("inputs", nargs="+", help="Directories, files or glob patterns (e.g. 'drop/**/*.pdf')")
+    parser.add_argument("-o", "--output", default="analysis_output", help="Directory for per-document JSON records and summaries.csv")
+    parser.add_argument("-w", "--workers", type=int, default=min(4, os.cpu_count() or 1), help="Number of worker processes")
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30")), help="LLM requests per minute shared by all workers")
+    parser.add_argument("--force", action="store_true", help="Reprocess documents that already have a completed record")
+    parser.add_argument("--corpus", action="store_true", help="Also add successfully analyzed documents to the cross-tender corpus")
+    parser.add_argument("--profile", action="store_true", help="Profile each document per stage (writes to $PROFILE_DIR, default .cache/profiles)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        print("No PDF or TXT documents matched the given inputs.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    if args.profile:
+        # Inherited by the worker processes
+        os.environ[PROFILE_ENV] = "1"
+
+    # Resume: documents whose content already has a completed record are skipped
+    records = {}
+    pending = []
+    for path in paths:
+        sha256 = file_sha256(path)
+        existing = None if args.force else load_record(args.output, sha256)
+        if existing and existing.get("status") == "done":
+            records[sha256] = existing
+        else:
+            pending.append((path, sha256))
+    print(f"{len(paths)} documents found, {len(records)} already done, {len(pending)} to process with {args.workers} workers")
+
+    start = time.time()
+    completed = failed = 0
+    if pending:
+        with multiprocessing.Manager() as manager:
+            limiter = SharedRateLimiter.create(manager, args.rpm)
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(limiter,)) as executor:
+                futures = {executor.submit(process_document, path, sha256, args.output, args.corpus): path for path, sha256 in pending}
+                for future in as_completed(futures):
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        print(f"  worker crashed on {futures[future]}: {e}", file=sys.stderr)
+                        failed += 1
+                        continue
+                    records[record["sha256"]] = record
+                    if record["metrics"]:
+                        get_metrics().absorb(record["metrics"])
+                    if record["status"] == "done":
+                        completed += 1
+                    else:
+                        failed += 1
+                    elapsed_min = (time.time() - start) / 60
+                    print(f"[{completed + failed}/{len(pending)}] {record['status']:<6} {record['file']} "
+                          f"({record['seconds']}s, {completed / elapsed_min:.1f} docs/min)")
+                    if record.get("profile"):
+                        print(f"    profile: {record['profile']}")
+
+    elapsed = time.time() - start
+    csv_path = write_csv(args.output, records.values())
+    # Worker processes report per-document metrics; the aggregate covers this run only
+    get_metrics().write(os.path.join(args.output, "metrics.json"))
+    with open(os.path.join(args.output, "metrics.prom"), "w", encoding="utf-8") as f:
+        f.write(get_metrics().to_prometheus())
+    throughput = completed / (elapsed / 60) if elapsed > 0 else 0.0
+    print(f"Processed {completed} documents ({failed} failed) in {elapsed:.1f}s - {throughput:.1f} docs/min")
+    print(f"Summaries written to {csv_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
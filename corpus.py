@@ -0,0 +1,508 @@
+import argparse
+import calendar
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from analyzer_core import ask_llm, prepare_document_chunks, generate_comprehensive_summary, document_sha256, DocumentError, CHANGES_HEADING
+from llm_scheduler import INTERACTIVE
+from metrics import span, timed
+
+# Persistent multi-document corpus: a catalog of tender fields plus chunk text in
+# SQLite FTS5 shards. A document's chunks live in one shard chosen by its id.
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "corpus")
+DEFAULT_SHARDS = 8
+
+FIELDS = ["tender_ref", "title", "department", "deadline", "emd", "contract_value"]
+FILTER_KEYS = ["due_after", "due_before", "min_emd", "max_emd", "min_contract_value", "max_contract_value", "name"]
+# Summary/field labels (lowercase substrings) mapped to catalog fields; first match wins
+_FIELD_LABELS = [
+    ("emd exemption", None),
+    ("tender number", "tender_ref"),
+    ("tender reference", "tender_ref"),
+    ("tender no", "tender_ref"),
+    ("name of work", "title"),
+    ("name of the work", "title"),
+    ("department", "department"),
+    ("organization", "department"),
+    ("submission deadline", "deadline"),
+    ("last date", "deadline"),
+    ("due date", "deadline"),
+    ("closing date", "deadline"),
+    ("emd", "emd"),
+    ("earnest money", "emd"),
+    ("contract value", "contract_value"),
+    ("estimated cost", "contract_value"),
+    ("estimated value", "contract_value"),
+    ("tender value", "contract_value"),
+]
+
+# The what-changed section a revision summary leads with, up to the next heading line
+_CHANGES_SECTION_RE = re.compile(rf'^\s*\**{re.escape(CHANGES_HEADING)}\**\s*:?\s*\**\s*$.*?(?=^\s*\*\*[^*\n]+\*\*\s*:?\s*$|\Z)',
+                                 re.MULTILINE | re.DOTALL | re.IGNORECASE)
+_LABELLED_LINE_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])?\s*\**(?P<label>[^:\n*]{2,60}?)\**\s*:\s*\**(?P<value>[^\n]+)$', re.MULTILINE)
+_AMOUNT_RE = re.compile(r'(?P<currency>rs\.?|inr|₹)?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>crores?|cr\b\.?|lakhs?|lacs?|thousand|k\b)?', re.IGNORECASE)
+_AMOUNT_UNITS = {"crore": 1e7, "crores": 1e7, "cr": 1e7, "cr.": 1e7, "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5, "thousand": 1e3, "k": 1e3}
+_MONTHS = {name: i for i, name in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+_MONTH_PATTERN = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+_DATE_RES = [
+    (re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b'), ("y", "m", "d")),
+    (re.compile(r'\b(\d{1,2})[./-](\d{1,2})[./-](\d{4}|\d{2})\b'), ("d", "m", "y")),
+    (re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+' + _MONTH_PATTERN + r',?\s+(\d{4})\b', re.IGNORECASE), ("d", "mon", "y")),
+    (re.compile(r'\b' + _MONTH_PATTERN + r'\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b', re.IGNORECASE), ("mon", "d", "y")),
+]
+_COMPARATORS = r'(above|over|more than|greater than|exceeding|at least|>=|>|below|under|less than|at most|<=|<)'
+_AMOUNT_FILTERS = [
+    ("emd", re.compile(r'\b(?:emd|earnest money(?: deposit)?)\b[^.?\d]{0,20}?' + _COMPARATORS + r'\s*((?:rs\.?|inr|₹)?\s*\d[\d,.]*\s*(?:crores?|cr|lakhs?|lacs?|thousand|k)?)', re.IGNORECASE)),
+    ("contract_value", re.compile(r'\b(?:contract value|estimated cost|tender value|value|cost|worth)\b[^.?\d]{0,20}?' + _COMPARATORS + r'\s*((?:rs\.?|inr|₹)?\s*\d[\d,.]*\s*(?:crores?|cr|lakhs?|lacs?|thousand|k)?)', re.IGNORECASE)),
+]
+_STOPWORDS = set("""a an and are as at be by do does for from has have in is it of on or the to what which who whom
+whose when where why how this that these those with within than then there their them they tender tenders
+document documents all any each me show list find give tell our we due month week year next above below over
+under more less greater least most require requires required requirement lakh lakhs crore crores rs inr""".split())
+
+
+def parse_amount(text):
+    """Rupee amount in text ('Rs. 2,50,000', '5 lakh', '1.2 crore'), or None."""
+    if not text:
+        return None
+    for match in _AMOUNT_RE.finditer(text):
+        try:
+            value = float(match.group("number").replace(",", ""))
+        except ValueError:
+            continue
+        unit = (match.group("unit") or "").lower()
+        # Bare small numbers are percentages, counts or days rather than amounts
+        if not unit and not match.group("currency") and value < 1000:
+            continue
+        return value * _AMOUNT_UNITS.get(unit, 1)
+    return None
+
+
+def parse_date(text):
+    """First date in text as a datetime.date (day-first for numeric dates), or None."""
+    if not text:
+        return None
+    found = []
+    for pattern, order in _DATE_RES:
+        for match in pattern.finditer(text):
+            parts = dict(zip(order, match.groups()))
+            try:
+                year = int(parts["y"])
+                year = year + 2000 if year < 100 else year
+                month = _MONTHS[parts["mon"][:3].lower()] if "mon" in parts else int(parts["m"])
+                found.append((match.start(), date(year, month, int(parts["d"]))))
+            except (ValueError, KeyError):
+                continue
+    return min(found)[1] if found else None
+
+
+def format_amount(value):
+    if value is None:
+        return "n/a"
+    if value >= 1e7:
+        return f"Rs. {value / 1e7:.2f} crore"
+    if value >= 1e5:
+        return f"Rs. {value / 1e5:.2f} lakh"
+    return f"Rs. {value:,.0f}"
+
+
+def extract_tender_fields(summary=None, text=None):
+    """Catalog fields from the structured summary, falling back to labelled lines in the text.
+
+    text is a string or the document's list of chunks. The what-changed section of a revision
+    summary is skipped, since it also lists the superseded values.
+    """
+    fields = {}
+    if summary:
+        summary = _CHANGES_SECTION_RE.sub("", summary)
+    texts = [text] if isinstance(text, str) else list(text or ())
+    for source in [summary, *texts]:
+        if not source or source.startswith("Error"):
+            continue
+        for match in _LABELLED_LINE_RE.finditer(source):
+            label = match.group("label").strip().lower()
+            value = match.group("value").strip().strip("*").strip()
+            if not value or value.lower().startswith(("not mentioned", "not found", "not specified", "n/a")):
+                continue
+            field = next((f for key, f in _FIELD_LABELS if key in label), None)
+            if field is None or field in fields:
+                continue
+            if field == "deadline":
+                parsed = parse_date(value)
+                if parsed:
+                    fields[field] = parsed.isoformat()
+            elif field in ("emd", "contract_value"):
+                parsed = parse_amount(value)
+                if parsed is not None:
+                    fields[field] = parsed
+            else:
+                fields[field] = value[:200]
+    return fields
+
+
+def _month_range(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_question_filters(question, today=None):
+    """Catalog filters implied by a question, e.g. 'due this month', 'EMD above 5 lakh'.
+
+    Returns (filters, descriptions); filters uses the keys accepted by CorpusIndex.list_documents.
+    """
+    today = today or date.today()
+    text = question.lower()
+    filters = {}
+    descriptions = []
+
+    window = None
+    if "this month" in text:
+        window = _month_range(today.year, today.month)
+    elif "next month" in text:
+        first_next = _month_range(today.year, today.month)[1] + timedelta(days=1)
+        window = _month_range(first_next.year, first_next.month)
+    elif "this week" in text:
+        window = (today - timedelta(days=today.weekday()), today + timedelta(days=6 - today.weekday()))
+    elif "next week" in text:
+        start = today + timedelta(days=7 - today.weekday())
+        window = (start, start + timedelta(days=6))
+    elif "today" in text:
+        window = (today, today)
+    else:
+        match = re.search(r'(?:within|in the next|next)\s+(\d+)\s+days', text)
+        if match:
+            window = (today, today + timedelta(days=int(match.group(1))))
+    if window:
+        filters["due_after"], filters["due_before"] = window[0].isoformat(), window[1].isoformat()
+        descriptions.append(f"due {window[0].isoformat()} to {window[1].isoformat()}")
+    else:
+        for keyword, key in (("before", "due_before"), ("by", "due_before"), ("after", "due_after")):
+            match = re.search(rf'\b{keyword}\s+([^?,;]+)', text)
+            parsed = parse_date(match.group(1)) if match else None
+            if parsed and key not in filters:
+                filters[key] = parsed.isoformat()
+                descriptions.append(f"due {keyword} {parsed.isoformat()}")
+
+    for field, pattern in _AMOUNT_FILTERS:
+        match = pattern.search(question)
+        amount = parse_amount(match.group(2)) if match else None
+        if amount is None:
+            continue
+        upper = match.group(1).lower() in ("below", "under", "less than", "at most", "<=", "<")
+        filters[f"{'max' if upper else 'min'}_{field}"] = amount
+        descriptions.append(f"{field.replace('_', ' ')} {'≤' if upper else '≥'} {format_amount(amount)}")
+    return filters, descriptions
+
+
+def search_terms(question):
+    """FTS5 OR-query of the question's content words (None when there are none)."""
+    words = []
+    for word in re.findall(r'\w+', question.lower()):
+        if len(word) > 2 and word not in _STOPWORDS and not word.isdigit() and word not in words:
+            words.append(word)
+    return " OR ".join(f'"{word}"' for word in words) or None
+
+
+class CorpusIndex:
+    """Persistent catalog of tenders plus a sharded full-text index of their chunks."""
+
+    def __init__(self, directory=None, shards=None):
+        self.directory = directory or os.getenv("CORPUS_DIR") or DEFAULT_CORPUS_DIR
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        with self._catalog() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id TEXT PRIMARY KEY, name TEXT NOT NULL, added REAL NOT NULL, chunks INTEGER NOT NULL, "
+                "shard INTEGER NOT NULL, tender_ref TEXT, title TEXT, department TEXT, deadline TEXT, "
+                "emd REAL, contract_value REAL, summary TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS documents_deadline ON documents (deadline)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()
+            if row:
+                # The shard count is fixed once documents have been placed
+                self.shards = int(row[0])
+            else:
+                self.shards = max(1, int(shards or os.getenv("CORPUS_SHARDS", DEFAULT_SHARDS)))
+                conn.execute("INSERT INTO meta VALUES ('shards', ?)", (str(self.shards),))
+        for shard in range(self.shards):
+            with self._shard(shard) as conn:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(document_id UNINDEXED, position UNINDEXED, text)")
+
+    def _catalog(self):
+        return sqlite3.connect(os.path.join(self.directory, "catalog.sqlite3"), timeout=30)
+
+    def _shard(self, shard):
+        return sqlite3.connect(os.path.join(self.directory, f"shard-{shard:02d}.sqlite3"), timeout=30)
+
+    def shard_for(self, document_id):
+        return int(hashlib.sha256(document_id.encode("utf-8")).hexdigest()[:8], 16) % self.shards
+
+    def add_document(self, document_id, name, text_chunks, summary=None, fields=None):
+        """Index (or re-index) a document's chunks and catalog fields. Returns the fields."""
+        if fields is None:
+            fields = extract_tender_fields(summary, "\n".join(text_chunks[:3]))
+        shard = self.shard_for(document_id)
+        with self._lock:
+            with self._shard(shard) as conn:
+                conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+                conn.executemany("INSERT INTO chunks VALUES (?, ?, ?)", [(document_id, i, chunk) for i, chunk in enumerate(text_chunks)])
+            with self._catalog() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (document_id, name, time.time(), len(text_chunks), shard, *(fields.get(f) for f in FIELDS), summary),
+                )
+        return fields
+
+    def remove_document(self, document_id):
+        with self._lock:
+            with self._catalog() as conn:
+                removed = conn.execute("DELETE FROM documents WHERE id = ?", (document_id,)).rowcount
+            with self._shard(self.shard_for(document_id)) as conn:
+                conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+        return bool(removed)
+
+    def get_document(self, document_id):
+        documents = self._select("WHERE id = ?", [document_id])
+        return documents[0] if documents else None
+
+    def list_documents(self, filters=None, limit=None):
+        """Catalog rows matching filters, soonest deadline first.
+
+        filters: due_after/due_before (ISO dates), min_/max_emd, min_/max_contract_value
+        (rupees), name (substring of name, title or reference). A document without the
+        field a filter needs does not match it.
+        """
+        clauses, params = [], []
+        for key, value in (filters or {}).items():
+            if value in (None, ""):
+                continue
+            if key == "due_after":
+                clauses.append("deadline >= ?")
+            elif key == "due_before":
+                clauses.append("deadline <= ?")
+            elif key.startswith(("min_", "max_")) and key[4:] in ("emd", "contract_value"):
+                clauses.append(f"{key[4:]} {'>=' if key.startswith('min_') else '<='} ?")
+            elif key == "name":
+                clauses.append("(name LIKE ? OR title LIKE ? OR tender_ref LIKE ?)")
+                params.extend([f"%{value}%"] * 3)
+                continue
+            else:
+                raise ValueError(f"Unknown corpus filter: {key}")
+            params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "ORDER BY deadline IS NULL, deadline, name"
+        return self._select(f"{where} {order}" + (f" LIMIT {int(limit)}" if limit else ""), params)
+
+    def _select(self, tail, params):
+        with self._catalog() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"SELECT id, name, added, chunks, shard, {', '.join(FIELDS)}, summary FROM documents {tail}", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._catalog() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def stats(self):
+        with self._catalog() as conn:
+            per_shard = dict(conn.execute("SELECT shard, COUNT(*) FROM documents GROUP BY shard").fetchall())
+            documents, chunks = conn.execute("SELECT COUNT(*), COALESCE(SUM(chunks), 0) FROM documents").fetchone()
+        return {"documents": documents, "chunks": chunks, "shards": self.shards,
+                "documents_per_shard": [per_shard.get(i, 0) for i in range(self.shards)]}
+
+    def _search_shard(self, shard, query, document_ids, limit):
+        sql = ("SELECT document_id, position, text, bm25(chunks) AS score FROM chunks WHERE chunks MATCH ?"
+               + (f" AND document_id IN ({','.join('?' * len(document_ids))})" if document_ids is not None else "")
+               + " ORDER BY score LIMIT ?")
+        with self._shard(shard) as conn:
+            return conn.execute(sql, [query, *(document_ids or []), limit]).fetchall()
+
+    def search(self, query, filters=None, top_k=6, per_document=2):
+        """Top chunks for an FTS5 query across the documents matching filters.
+
+        Only shards holding a matching document are queried, in parallel. Returns dicts
+        with document_id, name, position, text and score (lower bm25 is better).
+        """
+        if not query:
+            return []
+        with span("corpus_search"):
+            if filters:
+                documents = {d["id"]: d for d in self.list_documents(filters)}
+                by_shard = {}
+                for document in documents.values():
+                    by_shard.setdefault(document["shard"], []).append(document["id"])
+            else:
+                documents = None
+                by_shard = {shard: None for shard in range(self.shards)}
+            tasks = []
+            for shard, ids in by_shard.items():
+                # Keep each IN (...) list under SQLite's parameter limit
+                batches = [ids[i:i + 500] for i in range(0, len(ids), 500)] if ids is not None else [None]
+                tasks.extend((shard, batch) for batch in batches)
+            if not tasks:
+                return []
+            limit = top_k * max(per_document, 1) * 2
+            with ThreadPoolExecutor(max_workers=min(len(tasks), 8)) as executor:
+                results = executor.map(lambda task: self._search_shard(task[0], query, task[1], limit), tasks)
+                rows = sorted((row for shard_rows in results for row in shard_rows), key=lambda row: row[3])
+            hits, taken = [], {}
+            for document_id, position, text, score in rows:
+                if taken.get(document_id, 0) >= per_document:
+                    continue
+                taken[document_id] = taken.get(document_id, 0) + 1
+                hits.append({"document_id": document_id, "position": position, "text": text, "score": round(score, 4)})
+                if len(hits) >= top_k:
+                    break
+            if documents is None and taken:
+                documents = {d["id"]: d for d in self._select(f"WHERE id IN ({','.join('?' * len(taken))})", list(taken))}
+            names = {document_id: d["name"] for document_id, d in (documents or {}).items()}
+            for hit in hits:
+                hit["name"] = names.get(hit["document_id"], hit["document_id"][:12])
+            return hits
+
+
+_default_corpus = None
+_default_corpus_lock = threading.Lock()
+
+
+def get_corpus():
+    global _default_corpus
+    with _default_corpus_lock:
+        if _default_corpus is None:
+            _default_corpus = CorpusIndex()
+        return _default_corpus
+
+
+def describe_document(document):
+    parts = [document["title"] or document["name"]]
+    if document["tender_ref"]:
+        parts.append(f"ref {document['tender_ref']}")
+    parts.append(f"due {document['deadline'] or 'unknown'}")
+    parts.append(f"EMD {format_amount(document['emd'])}")
+    parts.append(f"value {format_amount(document['contract_value'])}")
+    return " | ".join(parts)
+
+
+@timed("corpus_question")
+def answer_corpus_question(question, corpus=None, filters=None, top_k=6, per_document=2, max_listed=25, today=None):
+    """Answer a question across the corpus with one LLM call over the top-ranked chunks.
+
+    Filters implied by the question are merged with explicit ones. Returns a dict with
+    answer, filters, documents (matching catalog rows) and sources (the chunks used).
+    """
+    corpus = corpus or get_corpus()
+    implied, descriptions = parse_question_filters(question, today=today)
+    filters = dict(implied, **(filters or {}))
+    documents = corpus.list_documents(filters)
+    result = {"answer": None, "filters": filters, "filter_descriptions": descriptions, "documents": documents, "sources": []}
+    if not documents:
+        result["answer"] = "No documents in the corpus match " + (", ".join(descriptions) if descriptions else "the given filters") + "."
+        return result
+
+    sources = corpus.search(search_terms(question), filters=filters if filters else None, top_k=top_k, per_document=per_document)
+    result["sources"] = sources
+    listing = "\n".join(f"{i + 1}. {describe_document(d)}" for i, d in enumerate(documents[:max_listed]))
+    if len(documents) > max_listed:
+        listing += f"\n... and {len(documents) - max_listed} more"
+    excerpts = "\n\n".join(f"[{hit['name']}, section {hit['position'] + 1}]\n{hit['text']}" for hit in sources)
+    context = f"Tenders in scope ({len(documents)}):\n{listing}"
+    if excerpts:
+        context += f"\n\nRelevant excerpts:\n{excerpts}"
+    prompt = f"{question}\n\nAnswer across all the tenders in scope and name each tender you refer to."
+    result["answer"] = ask_llm(prompt, context, priority=INTERACTIVE, stage="corpus_answer")
+    return result
+
+
+def ingest_document(source, file_type, name, corpus=None, document_id=None, summarize=True, force=False):
+    """Chunk (and optionally summarize) a document and add it to the corpus.
+
+    Returns the catalog row. Documents already in the corpus are left as they are unless force.
+    """
+    corpus = corpus or get_corpus()
+    document_id = document_id or document_sha256(source)
+    if not force:
+        existing = corpus.get_document(document_id)
+        if existing:
+            return existing
+    text_chunks = prepare_document_chunks(source, file_type)
+    summary = generate_comprehensive_summary(text_chunks) if summarize else None
+    if summary and summary.startswith(("Error", "Unable to generate summary")):
+        summary = None
+    corpus.add_document(document_id, name, text_chunks, summary=summary,
+                        fields=extract_tender_fields(summary, text_chunks))
+    return corpus.get_document(document_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Persistent multi-tender corpus: ingest documents and ask across them.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Ingest PDF/TXT files")
+    add.add_argument("files", nargs="+")
+    add.add_argument("--no-summary", action="store_true", help="Index chunks only; catalog fields come from the text")
+    add.add_argument("--force", action="store_true", help="Re-ingest documents already in the corpus")
+    ask = sub.add_parser("ask", help="Answer a question across the corpus")
+    ask.add_argument("question")
+    ask.add_argument("--top-k", type=int, default=6)
+    listing = sub.add_parser("list", help="List documents, optionally filtered")
+    listing.add_argument("--due-after")
+    listing.add_argument("--due-before")
+    listing.add_argument("--min-emd", type=parse_amount)
+    listing.add_argument("--max-emd", type=parse_amount)
+    listing.add_argument("--min-value", type=parse_amount)
+    listing.add_argument("--max-value", type=parse_amount)
+    listing.add_argument("--name")
+    remove = sub.add_parser("remove", help="Remove documents by id")
+    remove.add_argument("ids", nargs="+")
+    sub.add_parser("stats", help="Document and shard counts")
+    args = parser.parse_args(argv)
+
+    corpus = get_corpus()
+    if args.command == "add":
+        failed = 0
+        for path in args.files:
+            file_type = "application/pdf" if path.lower().endswith(".pdf") else "text/plain"
+            try:
+                document = ingest_document(path, file_type, os.path.basename(path), corpus, summarize=not args.no_summary, force=args.force)
+                print(f"{document['id'][:12]}  {describe_document(document)}")
+            except DocumentError as e:
+                failed += 1
+                print(f"Error ingesting {path}: {e}", file=sys.stderr)
+        return 1 if failed else 0
+    if args.command == "ask":
+        result = answer_corpus_question(args.question, corpus, top_k=args.top_k)
+        if result["filter_descriptions"]:
+            print(f"Filters: {', '.join(result['filter_descriptions'])} ({len(result['documents'])} documents)")
+        print(result["answer"])
+        if result["sources"]:
+            print("\nSources:")
+            for hit in result["sources"]:
+                print(f"  {hit['name']} section {hit['position'] + 1}")
+        return 0
+    if args.command == "list":
+        filters = {"due_after": args.due_after, "due_before": args.due_before, "min_emd": args.min_emd, "max_emd": args.max_emd,
+                   "min_contract_value": args.min_value, "max_contract_value": args.max_value, "name": args.name}
+        for document in corpus.list_documents(filters):
+            print(f"{document['id'][:12]}  {describe_document(document)}")
+        return 0
+    if args.command == "remove":
+        for document_id in args.ids:
+            matches = [d["id"] for d in corpus.list_documents() if d["id"].startswith(document_id)]
+            for match in matches:
+                corpus.remove_document(match)
+                print(f"Removed {match[:12]}")
+        return 0
+    print(json.dumps(corpus.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+import contextvars
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_JOB_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs.sqlite3")
+# Finished jobs (and their results) are kept this long, and at most this many of them
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_FINISHED = 1000
+PRUNE_INTERVAL_SECONDS = 3600
+# Tells this process apart from an earlier one that had the same pid
+_PROCESS_TOKEN = uuid.uuid4().hex[:12]
+
+
+def _process_alive(pid):
+    """Whether a process with this id is running on this machine."""
+    if os.name == "nt":
+        # os.kill() would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) and exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Job:
+    """State of one background task. Mutated only by the owning JobQueue."""
+
+    def __init__(self, kind, key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self, include_result=True):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "error": self.error,
+            "created": self.created,
+            "updated": self.updated,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobStore:
+    """SQLite persistence for job state, so status and results survive reruns and restarts.
+
+    Several processes (app instances, workers) may share one store. Each job records the
+    process that runs it, and only jobs whose process has exited are marked as failed.
+    Finished jobs older than max_age seconds, or beyond the newest max_finished, are pruned.
+    """
+
+    def __init__(self, path=None, max_age=None, max_finished=None):
+        self.path = path or os.getenv("JOB_STORE_PATH") or DEFAULT_JOB_STORE_PATH
+        self.max_age = max_age if max_age is not None else float(os.getenv("JOB_STORE_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS))
+        self.max_finished = max_finished if max_finished is not None else int(os.getenv("JOB_STORE_MAX_FINISHED", DEFAULT_MAX_FINISHED))
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{_PROCESS_TOKEN}"
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, key TEXT, status TEXT NOT NULL, progress REAL NOT NULL, "
+                "message TEXT, result TEXT, error TEXT, created REAL NOT NULL, updated REAL NOT NULL, owner TEXT)"
+            )
+            if "owner" not in [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, updated)")
+        self.reap_orphans()
+        self.prune()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _owner_gone(self, owner):
+        parts = (owner or "").rsplit(":", 2)
+        if len(parts) != 3 or not parts[1].isdigit():
+            # Written before jobs recorded their process
+            return True
+        host, pid, token = parts
+        if host != self.host:
+            # Another machine's process cannot be checked from here
+            return False
+        if int(pid) == os.getpid():
+            return token != _PROCESS_TOKEN
+        return not _process_alive(int(pid))
+
+    def reap_orphans(self):
+        """Mark queued or running jobs whose process has exited as failed; they will never finish."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchall()
+            orphans = [(job_id,) for job_id, owner in rows if self._owner_gone(owner)]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ? AND status IN (?, ?)",
+                [(FAILED, "Interrupted by a server restart", time.time(), job_id, QUEUED, RUNNING) for (job_id,) in orphans],
+            )
+        return len(orphans)
+
+    def prune(self):
+        """Delete finished jobs older than max_age and all but the newest max_finished."""
+        with self._prune_lock:
+            self._last_prune = time.time()
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?", (DONE, FAILED, time.time() - self.max_age)
+            ).rowcount
+            deleted += conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND id NOT IN "
+                "(SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY updated DESC LIMIT ?)",
+                (DONE, FAILED, DONE, FAILED, self.max_finished),
+            ).rowcount
+        return deleted
+
+    def save(self, job, include_result=False):
+        with self._connect() as conn:
+            if include_result:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs (id, kind, key, status, progress, message, result, error, created, updated, owner) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.id, job.kind, job.key, job.status, job.progress, job.message,
+                     json.dumps(job.result, ensure_ascii=False), job.error, job.created, job.updated, self.owner),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, key, status, progress, message, error, created, updated, owner) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                    "status = excluded.status, progress = excluded.progress, message = excluded.message, "
+                    "error = excluded.error, updated = excluded.updated",
+                    (job.id, job.kind, job.key, job.status, job.progress, job.message, job.error, job.created, job.updated, self.owner),
+                )
+        if not job.active:
+            with self._prune_lock:
+                due = time.time() - self._last_prune >= PRUNE_INTERVAL_SECONDS
+            if due:
+                self.prune()
+
+    _COLUMNS = "id, kind, key, status, progress, message, result, error, created, updated"
+
+    def _row_to_job(self, row):
+        job = Job(row[1], row[2])
+        job.id, job.status, job.progress, job.message = row[0], row[3], row[4], row[5] or ""
+        job.result = json.loads(row[6]) if row[6] else None
+        job.error, job.created, job.updated = row[7], row[8], row[9]
+        return job
+
+    def load(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def latest_done(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE key = ? AND status = ? ORDER BY updated DESC LIMIT 1", (key, DONE)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+
+class JobQueue:
+    """Bounded worker pool with job tracking and de-duplication of identical work.
+
+    Submitting a job whose key matches a queued or running job returns the existing
+    job instead of starting the work twice. With a JobStore, job state is persisted
+    and a completed job with the same key is reused instead of being run again.
+    """
+
+    def __init__(self, max_workers=4, max_finished=500, store=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self.store = store
+        self._jobs = {}
+        self._active_by_key = {}
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+
+    def submit(self, kind, func, *args, key=None, reuse_done=False, **kwargs):
+        """Run func(*args, progress_callback=..., **kwargs) in the pool and return its Job.
+
+        key must be a string when a store is configured. With reuse_done, a persisted
+        completed job for the same key is returned without running func.
+        """
+        with self._lock:
+            if key is not None:
+                existing = self._active_by_key.get(key)
+                if existing is not None and existing.active:
+                    return existing
+        if key is not None and reuse_done and self.store is not None:
+            done = self.store.latest_done(key)
+            if done is not None:
+                with self._lock:
+                    self._jobs.setdefault(done.id, done)
+                return done
+        with self._lock:
+            # Re-check: another thread may have submitted the same key meanwhile
+            if key is not None:
+                existing = self._active_by_key.get(key)
+                if existing is not None and existing.active:
+                    return existing
+            job = Job(kind, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_by_key[key] = job
+            self._prune()
+        if self.store is not None:
+            self.store.save(job)
+        # Run in a copy of the submitter's context so LLM calls keep its scheduling session
+        self._executor.submit(contextvars.copy_context().run, self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    def find_active(self, key):
+        with self._lock:
+            job = self._active_by_key.get(key)
+            return job if job is not None and job.active else None
+
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.updated = time.time()
+        if self.store is not None:
+            self.store.save(job, include_result="result" in changes)
+
+    def _run(self, job, func, args, kwargs):
+        self._update(job, status=RUNNING, message="Started")
+
+        def progress_callback(fraction, text=None):
+            changes = {"progress": max(0.0, min(1.0, float(fraction)))}
+            if text:
+                changes["message"] = text
+            self._update(job, **changes)
+
+        try:
+            result = func(*args, progress_callback=progress_callback, **kwargs)
+            self._update(job, status=DONE, progress=1.0, message="Done", result=result)
+        except Exception as e:
+            self._update(job, status=FAILED, message="Failed", error=str(e))
+        finally:
+            with self._lock:
+                if job.key is not None and self._active_by_key.get(job.key) is job:
+                    del self._active_by_key[job.key]
+
+    def _prune(self):
+        # Drop the oldest finished jobs so a long-running process does not grow without bound
+        finished = [j for j in self._jobs.values() if not j.active]
+        for job in sorted(finished, key=lambda j: j.updated)[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
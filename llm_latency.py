@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Per-call LLM deadlines and hedging thresholds derived from recently observed latencies.
+# Completion time depends on the model and the completion length, so samples are kept per
+# (model, max_tokens class).
+MIN_SAMPLES = 20
+# Deadline = DEADLINE_MULTIPLIER x p99, never below MIN_DEADLINE_SECONDS nor above the caller's ceiling
+DEADLINE_PERCENTILE = 0.99
+DEADLINE_MULTIPLIER = 2.0
+MIN_DEADLINE_SECONDS = 5.0
+HEDGE_PERCENTILE = 0.95
+# Hedges may add at most this share of the calls made in the last BUDGET_WINDOW seconds
+DEFAULT_HEDGE_BUDGET = 0.1
+BUDGET_WINDOW = 60.0
+
+
+def latency_class(max_tokens):
+    """Power-of-two bucket of max_tokens, e.g. 1000 -> 1024."""
+    return 1 << max(0, int(max_tokens) - 1).bit_length()
+
+
+def hedging_enabled():
+    return os.getenv("GROQ_HEDGE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class LatencyTracker:
+    """Recent call latencies (timeouts counted at their deadline) per latency class, and the hedge budget."""
+
+    def __init__(self, samples=200, hedge_budget=DEFAULT_HEDGE_BUDGET, hedging=None):
+        self.sample_size = samples
+        self.hedge_budget = hedge_budget
+        self.hedging = hedging_enabled() if hedging is None else hedging
+        self._samples = {}
+        self._calls = deque()
+        self._hedges = deque()
+        self._lock = threading.Lock()
+
+    def record(self, model, max_tokens, seconds):
+        """Record the latency of a successful call."""
+        with self._lock:
+            self._samples.setdefault((model, latency_class(max_tokens)), deque(maxlen=self.sample_size)).append(seconds)
+
+    def record_timeout(self, model, max_tokens, deadline):
+        """Record a call that timed out as a censored observation: its latency was at least the deadline."""
+        self.record(model, max_tokens, deadline)
+
+    def percentile(self, model, max_tokens, q):
+        """The q-quantile of recent latencies, or None before MIN_SAMPLES calls."""
+        with self._lock:
+            samples = sorted(self._samples.get((model, latency_class(max_tokens)), ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def deadline(self, model, max_tokens, ceiling, attempt=0):
+        """Timeout for one attempt: the ceiling until enough samples exist, doubling per retry."""
+        p99 = self.percentile(model, max_tokens, DEADLINE_PERCENTILE)
+        if p99 is None:
+            return ceiling
+        return min(ceiling, max(MIN_DEADLINE_SECONDS, p99 * DEADLINE_MULTIPLIER) * 2 ** attempt)
+
+    def hedge_delay(self, model, max_tokens, deadline):
+        """Seconds after which a duplicate should be sent, or None when not hedging this call."""
+        if not self.hedging:
+            return None
+        p95 = self.percentile(model, max_tokens, HEDGE_PERCENTILE)
+        return p95 if p95 is not None and p95 < deadline else None
+
+    def _prune(self, now):
+        for sent in (self._calls, self._hedges):
+            while sent and now - sent[0] >= BUDGET_WINDOW:
+                sent.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._calls.append(now)
+
+    def take_hedge(self):
+        """Claim one hedge if the budget allows."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._hedges) + 1 > self.hedge_budget * len(self._calls):
+                return False
+            self._hedges.append(now)
+            return True
+
+    def stats(self):
+        """Per latency class: sample count, p50/p95/p99 and the current deadline (for a 60 s ceiling)."""
+        with self._lock:
+            classes = {key: sorted(samples) for key, samples in self._samples.items()}
+            calls, hedges = len(self._calls), len(self._hedges)
+        result = {"hedging": self.hedging, "hedge_budget": self.hedge_budget, "calls_last_minute": calls, "hedges_last_minute": hedges, "classes": {}}
+        for (model, key), samples in sorted(classes.items()):
+            entry = {"samples": len(samples)}
+            if samples:
+                for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                    entry[f"{name}_seconds"] = round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+            entry["deadline_seconds"] = round(self.deadline(model, key, 60.0), 3)
+            result["classes"][f"{model} max_tokens<={key}"] = entry
+        return result
+
+
+_default_tracker = None
+_default_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker():
+    global _default_tracker
+    with _default_tracker_lock:
+        if _default_tracker is None:
+            _default_tracker = LatencyTracker(hedge_budget=float(os.getenv("GROQ_HEDGE_BUDGET", str(DEFAULT_HEDGE_BUDGET))))
+        return _default_tracker
@@ -0,0 +1,165 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Priority classes, most urgent first
+INTERACTIVE = 0
+TRANSLATION = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", TRANSLATION: "translation", BACKGROUND: "background"}
+# Round-robin grant order is remembered for this many recent sessions
+DEFAULT_SESSION_HISTORY = 1024
+
+_current_priority = contextvars.ContextVar("llm_priority", default=BACKGROUND)
+_current_session = contextvars.ContextVar("llm_session", default="default")
+
+
+@contextmanager
+def llm_priority(priority):
+    """Tag LLM calls made inside the block with a priority class."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextmanager
+def llm_session(session_id):
+    """Attribute LLM calls made inside the block to a session for fair sharing."""
+    token = _current_session.set(session_id or "default")
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "session", "seq", "enqueued", "granted")
+
+    def __init__(self, priority, session, seq):
+        self.priority = priority
+        self.session = session
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class LLMScheduler:
+    """Grants a bounded number of concurrent LLM request slots by priority class.
+
+    Within a class, sessions are served round-robin (the session granted least
+    recently goes first), and no session holds more than per_session_limit slots.
+    """
+
+    def __init__(self, max_concurrent=4, per_session_limit=2, wait_samples=200, session_history=DEFAULT_SESSION_HISTORY):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.per_session_limit = max(1, int(per_session_limit))
+        self.session_history = max(1, int(session_history))
+        self._cond = threading.Condition()
+        self._waiting = {priority: [] for priority in PRIORITY_NAMES}
+        self._active = 0
+        self._active_by_session = {}
+        self._last_granted = {}
+        self._seq = itertools.count()
+        self._waits = {priority: deque(maxlen=wait_samples) for priority in PRIORITY_NAMES}
+        self._granted = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def _next_waiter(self):
+        if self._active >= self.max_concurrent:
+            return None
+        for priority in sorted(self._waiting):
+            eligible = [w for w in self._waiting[priority]
+                        if self._active_by_session.get(w.session, 0) < self.per_session_limit]
+            if eligible:
+                return min(eligible, key=lambda w: (self._last_granted.get(w.session, -1), w.seq))
+        return None
+
+    def _forget_sessions(self):
+        # Sessions granted longest ago already sort first, and a forgotten one still does, so
+        # dropping them keeps the round-robin order; waiting and running sessions are kept
+        busy = set(self._active_by_session)
+        busy.update(w.session for waiting in self._waiting.values() for w in waiting)
+        recent = sorted(self._last_granted.items(), key=lambda item: item[1])[-self.session_history:]
+        self._last_granted = {session: seq for session, seq in self._last_granted.items() if session in busy}
+        self._last_granted.update(recent)
+
+    def _dispatch(self):
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._waiting[waiter.priority].remove(waiter)
+            waiter.granted = True
+            self._active += 1
+            self._active_by_session[waiter.session] = self._active_by_session.get(waiter.session, 0) + 1
+            self._last_granted[waiter.session] = next(self._seq)
+            if len(self._last_granted) > 2 * self.session_history:
+                self._forget_sessions()
+            self._waits[waiter.priority].append(time.monotonic() - waiter.enqueued)
+            self._granted[waiter.priority] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority=None, session=None):
+        """Hold one request slot for the duration of the block."""
+        priority = _current_priority.get() if priority is None else priority
+        session = session or _current_session.get()
+        with self._cond:
+            waiter = _Waiter(priority, session, next(self._seq))
+            self._waiting[priority].append(waiter)
+            self._dispatch()
+            while not waiter.granted:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                remaining = self._active_by_session.get(session, 1) - 1
+                if remaining:
+                    self._active_by_session[session] = remaining
+                else:
+                    self._active_by_session.pop(session, None)
+                self._dispatch()
+
+    def stats(self):
+        """Queue depth and recent wait times (seconds) per priority class."""
+        with self._cond:
+            now = time.monotonic()
+            classes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                classes[name] = {
+                    "queued": len(self._waiting[priority]),
+                    "oldest_wait": round(max((now - w.enqueued for w in self._waiting[priority]), default=0.0), 3),
+                    "granted": self._granted[priority],
+                    "avg_wait": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p95_wait": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+                }
+            return {
+                "active": self._active,
+                "max_concurrent": self.max_concurrent,
+                "per_session_limit": self.per_session_limit,
+                "sessions_active": len(self._active_by_session),
+                "classes": classes,
+            }
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = LLMScheduler(
+                int(os.getenv("GROQ_MAX_CONCURRENT", "4")),
+                int(os.getenv("GROQ_MAX_CONCURRENT_PER_SESSION", "2")),
+            )
+        return _default_scheduler
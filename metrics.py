@@ -0,0 +1,231 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+_current_document = contextvars.ContextVar("metrics_document", default=None)
+_span_observer = contextvars.ContextVar("metrics_span_observer", default=None)
+
+# Counters reported for LLM traffic, in display order
+LLM_COUNTERS = [
+    "llm_calls",
+    "llm_errors",
+    "llm_retries",
+    "llm_rate_limited",
+    "llm_timeouts",
+    "llm_hedges",
+    "llm_hedge_wins",
+    "llm_escalations",
+    "llm_prompt_tokens",
+    "llm_completion_tokens",
+    "chunk_summaries_reused",
+    "instant_answers",
+]
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "min", "max", "samples")
+
+    def __init__(self, sample_size=512):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.samples = deque(maxlen=sample_size)
+
+    def add(self, seconds, count=1):
+        self.count += count
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds / max(count, 1))
+
+    def quantile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 4),
+            "avg_seconds": round(self.total / self.count, 4) if self.count else 0.0,
+            "min_seconds": round(self.min or 0.0, 4),
+            "max_seconds": round(self.max, 4),
+            "p50_seconds": round(self.quantile(0.5), 4),
+            "p95_seconds": round(self.quantile(0.95), 4),
+        }
+
+
+class MetricsRegistry:
+    """Per-process and per-document aggregation of stage timings and LLM counters."""
+
+    def __init__(self, max_documents=200):
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._stages = {}
+        self._counters = {}
+        self._documents = OrderedDict()
+
+    def _document_entry(self, document_id):
+        entry = self._documents.get(document_id)
+        if entry is None:
+            entry = {"started": time.time(), "stages": {}, "counters": {}}
+            self._documents[document_id] = entry
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return entry
+
+    def observe(self, stage, seconds, document_id=None):
+        document_id = document_id or _current_document.get()
+        with self._lock:
+            self._stages.setdefault(stage, _StageStats()).add(seconds)
+            if document_id:
+                entry = self._document_entry(document_id)
+                entry["stages"].setdefault(stage, _StageStats(sample_size=64)).add(seconds)
+
+    def increment(self, counter, value=1, document_id=None):
+        document_id = document_id or _current_document.get()
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+            if document_id:
+                counters = self._document_entry(document_id)["counters"]
+                counters[counter] = counters.get(counter, 0) + value
+
+    def document(self, document_id):
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is None:
+                return None
+            return {
+                "document_id": document_id,
+                "started": entry["started"],
+                "stages": {name: stats.to_dict() for name, stats in entry["stages"].items()},
+                "counters": dict(entry["counters"]),
+            }
+
+    def absorb(self, document_snapshot):
+        """Merge a document snapshot produced in another process (e.g. a CLI worker)."""
+        with self._lock:
+            for name, stats in document_snapshot.get("stages", {}).items():
+                self._stages.setdefault(name, _StageStats()).add(stats["total_seconds"], stats["count"])
+            for name, value in document_snapshot.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self._started, 1),
+                "stages": {name: stats.to_dict() for name, stats in sorted(self._stages.items())},
+                "counters": dict(sorted(self._counters.items())),
+                "documents_tracked": len(self._documents),
+            }
+
+    def to_prometheus(self, prefix="bid_analyzer"):
+        snap = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, stats in snap["stages"].items():
+            lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="0.5"}} {stats["p50_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="0.95"}} {stats["p95_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["total_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for counter, value in snap["counters"].items():
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value}")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {snap['uptime_seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=None):
+        """Write the JSON snapshot to path (or METRICS_FILE); a no-op when neither is set."""
+        path = path or os.getenv("METRICS_FILE")
+        if not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    return _registry
+
+
+@contextmanager
+def track_document(document_id):
+    """Attribute spans and LLM counters recorded inside the block to a document."""
+    token = _current_document.set(document_id)
+    try:
+        yield
+    finally:
+        _current_document.reset(token)
+
+
+@contextmanager
+def observe_spans(observer):
+    """Call observer.enter(stage) and observer.exit(stage) around spans inside the block."""
+    token = _span_observer.set(observer)
+    try:
+        yield
+    finally:
+        _span_observer.reset(token)
+
+
+@contextmanager
+def span(stage):
+    """Time the block as one observation of a pipeline stage."""
+    observer = _span_observer.get()
+    if observer is not None:
+        observer.enter(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if observer is not None:
+            observer.exit(stage)
+        _registry.observe(stage, elapsed)
+
+
+def record_llm_call(latency, status_code, response_json=None, attempt=0):
+    """Record one HTTP attempt against the LLM API, including token usage when reported."""
+    _registry.observe("llm_call", latency)
+    _registry.increment("llm_calls")
+    if attempt:
+        _registry.increment("llm_retries")
+    if status_code == 429:
+        _registry.increment("llm_rate_limited")
+    if status_code is None or status_code >= 400:
+        _registry.increment("llm_errors")
+    usage = (response_json or {}).get("usage") or {}
+    if usage.get("prompt_tokens"):
+        _registry.increment("llm_prompt_tokens", usage["prompt_tokens"])
+    if usage.get("completion_tokens"):
+        _registry.increment("llm_completion_tokens", usage["completion_tokens"])
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline stand-in for the OpenAI-compatible /chat/completions endpoint.
+# Point the app at it with GROQ_API_URL=http://127.0.0.1:8600/chat/completions
+
+CANNED_SUMMARY = """**BASIC INFORMATION:**
+- Tender Number/Reference: MOCK/{ref}/2024
+- Name of Work/Project: Construction and maintenance works (synthetic)
+- Issuing Department/Organization: Public Works Department
+
+**FINANCIAL DETAILS:**
+- Estimated Contract Value: Rs. 1,25,00,000
+- EMD (Earnest Money Deposit): Rs. 2,50,000
+- EMD Exemption (if any): Not mentioned
+- Performance Security: 5% of contract value
+
+**TIMELINE:**
+- Bid Submission Deadline: 15/03/2024 15:00
+- Technical Bid Opening: 16/03/2024 11:00
+- Contract Duration: 12 months
+
+**REQUIREMENTS:**
+- Key Eligibility Criteria: Average annual turnover of Rs. 50 lakh in the last 3 years
+- Required Documents: PAN, GST registration, experience certificates
+- Technical Specifications (brief): As per CPWD specifications
+- Payment Terms: Monthly running bills"""
+
+_MARKER_RE = re.compile(r'^<<(\d+)>>\s?(.*)$', re.MULTILINE)
+
+
+def estimate_tokens(text):
+    return max(1, math.ceil(len(text) / 4))
+
+
+class LatencyModel:
+    """Samples response latency in seconds from a named distribution."""
+
+    def __init__(self, distribution="lognormal", mean=0.8, jitter=0.4, per_token=0.0, seed=0):
+        self.distribution = distribution
+        self.mean = mean
+        self.jitter = jitter
+        self.per_token = per_token
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, completion_tokens):
+        with self._lock:
+            if self.distribution == "fixed":
+                base = self.mean
+            elif self.distribution == "uniform":
+                base = self._random.uniform(max(0.0, self.mean - self.jitter), self.mean + self.jitter)
+            elif self.distribution == "exponential":
+                base = self._random.expovariate(1.0 / self.mean) if self.mean > 0 else 0.0
+            else:
+                # Lognormal with the requested mean; jitter is the standard deviation of the underlying normal
+                sigma = self.jitter
+                mu = math.log(self.mean) - sigma ** 2 / 2 if self.mean > 0 else 0.0
+                base = self._random.lognormvariate(mu, sigma) if self.mean > 0 else 0.0
+        return base + self.per_token * completion_tokens
+
+
+class TokenBudget:
+    """Sliding one-minute token and request budget, mirroring provider rate limits."""
+
+    def __init__(self, tokens_per_minute=0, requests_per_minute=0):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def try_consume(self, tokens):
+        """Return 0 when admitted, otherwise the seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            while self._events and now - self._events[0][0] >= 60:
+                self._events.popleft()
+            used_tokens = sum(t for _, t in self._events)
+            over_tokens = self.tokens_per_minute and used_tokens + tokens > self.tokens_per_minute
+            over_requests = self.requests_per_minute and len(self._events) + 1 > self.requests_per_minute
+            if not (over_tokens or over_requests) or not self._events:
+                self._events.append((now, tokens))
+                return 0.0
+            # Walk the window oldest-first until expiring those events would admit this request
+            remaining_tokens = used_tokens
+            remaining_requests = len(self._events)
+            for timestamp, event_tokens in self._events:
+                remaining_tokens -= event_tokens
+                remaining_requests -= 1
+                tokens_ok = not self.tokens_per_minute or remaining_tokens + tokens <= self.tokens_per_minute
+                requests_ok = not self.requests_per_minute or remaining_requests + 1 <= self.requests_per_minute
+                if tokens_ok and requests_ok:
+                    return max(0.1, 60 - (now - timestamp))
+            return 60.0
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            recent = [(t, n) for t, n in self._events if now - t < 60]
+            return {"requests_last_minute": len(recent), "tokens_last_minute": sum(n for _, n in recent)}
+
+
+def canned_completion(messages):
+    """Deterministic reply chosen from the shape of the prompt."""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    digest = hashlib.sha256(user.encode("utf-8")).hexdigest()
+    if "translator" in system:
+        language = re.search(r'into (.+?) accurately', system)
+        tag = f"[{language.group(1) if language else 'xx'}]"
+        body = user.split("---\n", 1)[-1].rsplit("\n---", 1)[0]
+        markers = _MARKER_RE.findall(body)
+        if markers:
+            return "\n".join(f"<<{n}>> {tag} {text}" for n, text in markers)
+        return f"{tag} {body}"
+    if "JSON object that maps" in user:
+        # Checklist batches: one entry per numbered question in the prompt
+        numbers = re.findall(r'^\s*(\d+)\. ', user.split("Question:", 1)[-1], re.MULTILINE)
+        as_string = "combined answer as a string" in user
+        reply = {}
+        for n in numbers:
+            answer = f"Per the document (ref {digest[:8]}), item {n} is specified in this section."
+            reply[n] = answer if as_string else {"answer": answer, "found": int(digest[int(n) % 60], 16) % 3 != 0}
+        return json.dumps(reply)
+    if "extract the following key information" in user or "comprehensive summary" in user:
+        return CANNED_SUMMARY.format(ref=digest[:6].upper())
+    if "combining the relevant information" in user:
+        return f"Combined answer (ref {digest[:8]}): the document specifies the requested details in several sections, summarised here."
+    return f"According to the document (ref {digest[:8]}), the requested information is stated in this section with the relevant figures and dates."
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    latency = None
+    budget = None
+    counters = None
+    counters_lock = threading.Lock()
+    server_version = "MockLLM/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, name, value=1):
+        with self.counters_lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/stats"):
+            with self.counters_lock:
+                counters = dict(self.counters)
+            return self._send_json(200, {"status": "ok", "counters": counters, "budget": self.budget.stats()})
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": "Not found"}})
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            messages = request["messages"]
+        except (ValueError, KeyError):
+            return self._send_json(400, {"error": {"message": "Invalid request body"}})
+
+        content = canned_completion(messages)
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = min(estimate_tokens(content), int(request.get("max_tokens") or 1024))
+        retry_after = self.budget.try_consume(prompt_tokens + completion_tokens)
+        if retry_after:
+            self._count("rate_limited")
+            return self._send_json(
+                429,
+                {"error": {"message": f"Rate limit reached. Please try again in {retry_after:.1f}s.", "type": "tokens"}},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+        time.sleep(self.latency.sample(completion_tokens))
+        self._count("requests")
+        self._count("prompt_tokens", prompt_tokens)
+        self._count("completion_tokens", completion_tokens)
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+
+def build_mock_server(host="127.0.0.1", port=8600, distribution="lognormal", latency_mean=0.8, latency_jitter=0.4,
+                      latency_per_token=0.0, tokens_per_minute=0, requests_per_minute=0, seed=0):
+    handler = type("BoundMockLLMHandler", (MockLLMHandler,), {
+        "latency": LatencyModel(distribution, latency_mean, latency_jitter, latency_per_token, seed),
+        "budget": TokenBudget(tokens_per_minute, requests_per_minute),
+        "counters": {},
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_mock_server(**options):
+    """Start a mock server on a background thread; returns (server, chat_completions_url)."""
+    server = build_mock_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/chat/completions"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible /chat/completions mock for benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "lognormal", "exponential"], default="lognormal")
+    parser.add_argument("--latency-mean", type=float, default=0.8, help="Mean response latency in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.4, help="Spread: +/- seconds (uniform) or sigma (lognormal)")
+    parser.add_argument("--latency-per-token", type=float, default=0.0, help="Extra seconds per completion token")
+    parser.add_argument("--tpm", type=int, default=0, help="Tokens per minute before answering 429 (0 = unlimited)")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before answering 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    server = build_mock_server(args.host, args.port, args.distribution, args.latency_mean, args.latency_jitter,
+                               args.latency_per_token, args.tpm, args.rpm, args.seed)
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
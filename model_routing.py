@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+
+# Which model and completion budget each pipeline stage uses. Map stages (one call per
+# chunk) run on the small fast model; reduce stages and escalations of map output that
+# fails validation run on the large one.
+DEFAULT_SMALL_MODEL = "llama-3.1-8b-instant"
+DEFAULT_LARGE_MODEL = "llama-3.3-70b-versatile"
+
+# stage -> (model tier or model id, max_tokens)
+STAGE_ROUTES = {
+    "default": ("small", 1000),
+    "chunk_summary": ("small", 1000),
+    "consolidation": ("large", 1000),
+    "revision_changes": ("large", 1000),
+    "qa_chunk": ("small", 1000),
+    "qa_merge": ("large", 1000),
+    "translation": ("small", 1800),
+    "checklist_batch": ("small", 4000),
+    "checklist_merge": ("large", 4000),
+    "corpus_answer": ("large", 1000),
+}
+
+_overrides_lock = threading.Lock()
+_overrides_cache = (None, {})
+
+
+def _overrides():
+    """Per-stage overrides from GROQ_MODEL_ROUTES, e.g. '{"qa_merge": {"model": "small", "max_tokens": 800}}'."""
+    global _overrides_cache
+    raw = os.getenv("GROQ_MODEL_ROUTES", "")
+    with _overrides_lock:
+        if _overrides_cache[0] != raw:
+            try:
+                parsed = json.loads(raw) if raw.strip() else {}
+            except ValueError:
+                parsed = {}
+            _overrides_cache = (raw, parsed if isinstance(parsed, dict) else {})
+        return _overrides_cache[1]
+
+
+def resolve_model(name):
+    """Map the "small"/"large" tiers to configured model ids; other names are model ids already."""
+    if name == "small":
+        return os.getenv("GROQ_SMALL_MODEL", DEFAULT_SMALL_MODEL)
+    if name == "large":
+        return os.getenv("GROQ_LARGE_MODEL", DEFAULT_LARGE_MODEL)
+    return name
+
+
+def route(stage=None):
+    """{"stage", "model", "max_tokens", "escalation_model"} for a pipeline stage.
+
+    escalation_model is None when the stage already runs on the large model.
+    """
+    stage = stage if stage in STAGE_ROUTES else "default"
+    tier, max_tokens = STAGE_ROUTES[stage]
+    override = _overrides().get(stage) or {}
+    model = resolve_model(override.get("model") or tier)
+    try:
+        max_tokens = int(override.get("max_tokens") or max_tokens)
+    except (TypeError, ValueError):
+        pass
+    large = resolve_model("large")
+    return {"stage": stage, "model": model, "max_tokens": max_tokens, "escalation_model": large if model != large else None}
+
+
+def describe_routes():
+    """The effective route of every stage, for the health endpoint and the Performance panel."""
+    return {stage: route(stage) for stage in STAGE_ROUTES}
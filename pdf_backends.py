@@ -0,0 +1,181 @@
+import importlib
+import importlib.util
+import os
+import time
+from io import BytesIO, StringIO
+
+# PDF text-extraction backends. PyPDF2 is the default; pypdf, pdfminer.six and pypdfium2
+# are used when installed. For larger PDFs a short calibration on a few sample pages picks
+# the fastest backend that still extracts the text. Force one with PDF_BACKEND=<name>.
+DEFAULT_BACKEND = "pypdf2"
+# PDFs with fewer pages are extracted with the default backend without calibrating
+CALIBRATION_MIN_PAGES = 10
+CALIBRATION_SAMPLE_PAGES = 3
+# A backend must extract at least this share of the best backend's text on the sample pages
+MIN_TEXT_SHARE = 0.5
+
+
+def _stream(source):
+    """A seekable binary stream at its start, for PDF bytes or an open binary file."""
+    if isinstance(source, (bytes, bytearray)):
+        return BytesIO(source)
+    source.seek(0)
+    return source
+
+
+class _PyPDF2Document:
+    module = "PyPDF2"
+
+    def __init__(self, data):
+        self._reader = importlib.import_module(self.module).PdfReader(_stream(data))
+        self.page_count = len(self._reader.pages)
+
+    def page_text(self, index):
+        return self._reader.pages[index].extract_text() or ""
+
+    def close(self):
+        pass
+
+
+class _PypdfDocument(_PyPDF2Document):
+    module = "pypdf"
+
+
+class _PdfminerDocument:
+    module = "pdfminer"
+
+    def __init__(self, data):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        self._pages = list(PDFPage.create_pages(PDFDocument(PDFParser(_stream(data)))))
+        self._resources = PDFResourceManager()
+        self.page_count = len(self._pages)
+
+    def page_text(self, index):
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        out = StringIO()
+        device = TextConverter(self._resources, out, laparams=LAParams())
+        try:
+            PDFPageInterpreter(self._resources, device).process_page(self._pages[index])
+        finally:
+            device.close()
+        return out.getvalue()
+
+    def close(self):
+        pass
+
+
+class _Pypdfium2Document:
+    module = "pypdfium2"
+
+    def __init__(self, data):
+        self._pdf = importlib.import_module(self.module).PdfDocument(data if isinstance(data, (bytes, bytearray)) else _stream(data))
+        self.page_count = len(self._pdf)
+
+    def page_text(self, index):
+        page = self._pdf[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+    def close(self):
+        self._pdf.close()
+
+
+BACKENDS = {
+    "pypdf2": _PyPDF2Document,
+    "pypdf": _PypdfDocument,
+    "pdfminer": _PdfminerDocument,
+    "pypdfium2": _Pypdfium2Document,
+}
+
+
+def available_backends():
+    """Installed backends, default first."""
+    return [name for name, document in BACKENDS.items() if importlib.util.find_spec(document.module) is not None]
+
+
+def open_pdf(data, backend=DEFAULT_BACKEND):
+    """Open PDF bytes (or a seekable binary file) with a backend.
+
+    The handle has page_count, page_text(index) and close().
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](data)
+
+
+def _sample_pages(page_count, samples):
+    # Spread over the document: covers and annexures often differ from the body
+    if page_count <= samples:
+        return list(range(page_count))
+    return sorted({round(i * (page_count - 1) / (samples - 1)) for i in range(samples)})
+
+
+def calibrate(data, backends=None, samples=CALIBRATION_SAMPLE_PAGES):
+    """Time each backend on a few sample pages. Returns {backend: {"seconds", "chars"} or {"error"}}."""
+    results = {}
+    pages = None
+    for name in backends or available_backends():
+        start = time.perf_counter()
+        try:
+            document = open_pdf(data, name)
+            try:
+                if pages is None:
+                    pages = _sample_pages(document.page_count, samples)
+                chars = sum(len("".join(document.page_text(index).split())) for index in pages)
+            finally:
+                document.close()
+        except Exception as e:
+            results[name] = {"error": str(e)}
+            continue
+        results[name] = {"seconds": round(time.perf_counter() - start, 4), "chars": chars}
+    return results
+
+
+def _page_count(data):
+    try:
+        document = open_pdf(data, DEFAULT_BACKEND)
+    except Exception:
+        return None
+    try:
+        return document.page_count
+    finally:
+        document.close()
+
+
+def choose_backend(data):
+    """Pick the extraction backend for one PDF. Returns (backend, calibration or None).
+
+    PDF_BACKEND forces a backend. Otherwise small PDFs, or installs with only the default,
+    use the default; larger PDFs use the fastest backend whose sample text is non-empty and
+    close in length to the best one.
+    """
+    forced = os.getenv("PDF_BACKEND", "").strip().lower()
+    if forced and forced != "auto":
+        return forced, None
+    candidates = available_backends()
+    if len(candidates) < 2:
+        return DEFAULT_BACKEND, None
+    page_count = _page_count(data)
+    if page_count is not None and page_count < CALIBRATION_MIN_PAGES:
+        return DEFAULT_BACKEND, None
+    calibration = calibrate(data, candidates)
+    usable = {name: result for name, result in calibration.items() if result.get("chars")}
+    if not usable:
+        return DEFAULT_BACKEND, calibration
+    most_text = max(result["chars"] for result in usable.values())
+    fastest = min((name for name, result in usable.items() if result["chars"] >= MIN_TEXT_SHARE * most_text),
+                  key=lambda name: usable[name]["seconds"])
+    return fastest, calibration
@@ -0,0 +1,139 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import observe_spans
+
+# Opt-in profiling of whole document runs. Enable with BID_ANALYZER_PROFILE=1 (or the
+# app's hidden toggle); profiles land in $PROFILE_DIR, default .cache/profiles/.
+PROFILE_ENV = "BID_ANALYZER_PROFILE"
+TOP_FUNCTIONS = 15
+
+
+def profiling_enabled(requested=None):
+    """An explicit request wins; otherwise the environment variable decides."""
+    if requested is not None:
+        return bool(requested)
+    return os.getenv(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def profile_dir():
+    return os.getenv("PROFILE_DIR", os.path.join(".cache", "profiles"))
+
+
+class DocumentProfile:
+    """One deterministic profiler per pipeline stage, switched at span boundaries.
+
+    Time is attributed to the innermost active span only, so a stage's hot spots do not
+    include its nested stages. Spans entered on other threads are ignored, since a
+    cProfile.Profile only sees the thread it was enabled on.
+    """
+
+    def __init__(self, document_id):
+        self.document_id = document_id
+        self.thread_id = threading.get_ident()
+        self.profilers = {}
+        self.stack = []
+
+    def _switch(self, stage):
+        if self.stack:
+            self.profilers[self.stack[-1]].disable()
+        if stage is not None:
+            self.profilers.setdefault(stage, cProfile.Profile()).enable()
+
+    def enter(self, stage):
+        if threading.get_ident() != self.thread_id:
+            return
+        self._switch(stage)
+        self.stack.append(stage)
+
+    def exit(self, stage):
+        if threading.get_ident() != self.thread_id or not self.stack or self.stack[-1] != stage:
+            return
+        self.profilers[self.stack.pop()].disable()
+        if self.stack:
+            self.profilers[self.stack[-1]].enable()
+
+    def stop(self):
+        while self.stack:
+            self.profilers[self.stack.pop()].disable()
+
+    def hot_spots(self, top=TOP_FUNCTIONS):
+        """Per-stage total time and the functions with the most own time."""
+        stages = []
+        for stage, profiler in self.profilers.items():
+            stats = pstats.Stats(profiler)
+            rows = []
+            for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+                rows.append({
+                    "function": f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+                    "calls": ncalls,
+                    "own_seconds": round(tottime, 4),
+                    "cumulative_seconds": round(cumtime, 4),
+                })
+            rows.sort(key=lambda row: row["own_seconds"], reverse=True)
+            stages.append({
+                "document_id": self.document_id,
+                "stage": stage,
+                "seconds": round(stats.total_tt, 4),
+                "top": rows[:top],
+            })
+        stages.sort(key=lambda entry: entry["seconds"], reverse=True)
+        return stages
+
+    def write(self, directory=None):
+        """Write <stage>.prof, document.prof (all stages merged), hotspots.json and hotspots.txt."""
+        directory = directory or os.path.join(profile_dir(), f"{self.document_id[:16]}-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.makedirs(directory, exist_ok=True)
+        merged = None
+        for stage, profiler in self.profilers.items():
+            profiler.dump_stats(os.path.join(directory, f"{stage}.prof"))
+            if merged is None:
+                merged = pstats.Stats(profiler)
+            else:
+                merged.add(profiler)
+        if merged is not None:
+            merged.dump_stats(os.path.join(directory, "document.prof"))
+
+        hot_spots = self.hot_spots()
+        with open(os.path.join(directory, "hotspots.json"), "w", encoding="utf-8") as f:
+            json.dump({"document_id": self.document_id, "stages": hot_spots}, f, indent=2)
+        with open(os.path.join(directory, "hotspots.txt"), "w", encoding="utf-8") as f:
+            f.write(format_hot_spots(self.document_id, hot_spots))
+        return directory
+
+
+def format_hot_spots(document_id, hot_spots):
+    out = io.StringIO()
+    out.write(f"Document {document_id}\n")
+    for entry in hot_spots:
+        out.write(f"\n[{entry['stage']}] {entry['seconds']:.3f}s profiled\n")
+        for row in entry["top"]:
+            out.write(f"  {row['own_seconds']:>9.4f}s own  {row['cumulative_seconds']:>9.4f}s cum  {row['calls']:>8}  {row['function']}\n")
+    return out.getvalue()
+
+
+@contextmanager
+def profile_document(document_id, enabled=None):
+    """Profile the block per stage when enabled; yields the output directory holder (or None).
+
+    When disabled this is a plain pass-through and installs no profiler or span observer.
+    """
+    if not profiling_enabled(enabled):
+        yield None
+        return
+    profile = DocumentProfile(document_id)
+    holder = {"directory": None}
+    # Time outside any span (e.g. between stages) is attributed to "other"
+    profile.enter("other")
+    try:
+        with observe_spans(profile):
+            yield holder
+    finally:
+        profile.stop()
+        holder["directory"] = profile.write()
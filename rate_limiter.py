@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter shared by all outgoing LLM requests."""
+
+    def __init__(self, requests_per_minute=30, window=60.0):
+        self.requests_per_minute = max(1, int(requests_per_minute))
+        self.window = window
+        self._sent = deque()
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a request may be sent, then record it."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.window:
+                    self._sent.popleft()
+                wait = self._blocked_until - now
+                if wait <= 0 and len(self._sent) >= self.requests_per_minute:
+                    wait = self.window - (now - self._sent[0])
+                if wait <= 0:
+                    self._sent.append(now)
+                    return
+                self._cond.wait(wait)
+
+    def try_acquire(self):
+        """Record a request only if one may be sent right now; never blocks."""
+        with self._cond:
+            now = time.monotonic()
+            while self._sent and now - self._sent[0] >= self.window:
+                self._sent.popleft()
+            if self._blocked_until > now or len(self._sent) >= self.requests_per_minute:
+                return False
+            self._sent.append(now)
+            return True
+
+    def defer(self, seconds):
+        """Pause every caller, e.g. after a 429 with a Retry-After header."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + max(0.0, seconds))
+            self._cond.notify_all()
+
+
+class SharedRateLimiter:
+    """Sliding-window limiter shared by worker processes through a multiprocessing manager."""
+
+    def __init__(self, lock, sent, blocked_until, requests_per_minute=30, window=60.0):
+        self.requests_per_minute = max(1, int(requests_per_minute))
+        self.window = window
+        self._lock = lock
+        self._sent = sent
+        self._blocked_until = blocked_until
+
+    @classmethod
+    def create(cls, manager, requests_per_minute=30, window=60.0):
+        return cls(manager.Lock(), manager.list(), manager.Value('d', 0.0), requests_per_minute, window)
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                # Wall-clock time, since monotonic clocks are not comparable across processes
+                now = time.time()
+                recent = [t for t in self._sent if now - t < self.window]
+                wait = self._blocked_until.value - now
+                if wait <= 0 and len(recent) >= self.requests_per_minute:
+                    wait = self.window - (now - min(recent))
+                if wait <= 0:
+                    recent.append(now)
+                    self._sent[:] = recent
+                    return
+            time.sleep(min(wait, 1.0))
+
+    def try_acquire(self):
+        with self._lock:
+            now = time.time()
+            recent = [t for t in self._sent if now - t < self.window]
+            if self._blocked_until.value > now or len(recent) >= self.requests_per_minute:
+                return False
+            recent.append(now)
+            self._sent[:] = recent
+            return True
+
+    def defer(self, seconds):
+        with self._lock:
+            self._blocked_until.value = max(self._blocked_until.value, time.time() + max(0.0, seconds))
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30")))
+        return _default_limiter
+
+
+def set_rate_limiter(limiter):
+    """Replace the process-wide limiter, e.g. with a SharedRateLimiter in a worker process."""
+    global _default_limiter
+    with _default_limiter_lock:
+        _default_limiter = limiter
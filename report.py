@@ -0,0 +1,158 @@
+import os
+import re
+import tempfile
+import time
+
+from analyzer_core import write_pdf
+from checklist import ChunkRetriever
+from metrics import span
+
+# Full analysis report: the summary, every question asked, the checklist, translated
+# summaries as appendices, and the pages each answer came from. Reports are laid out a
+# few paragraphs at a time straight into a file under .cache/reports, which the API download
+# streams, so building and serving a long report never holds it as one bytes object.
+DEFAULT_REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "reports")
+# Reports older than this are removed when the next one is built
+STALE_REPORT_SECONDS = 24 * 3600
+# Sections cited for a free-form answer (checklist rows cite the sections they were answered from)
+CITED_SECTIONS = 3
+
+_PAGE_MARKER_RE = re.compile(r'--- Page (\d+) ---')
+_UNANSWERED = ("Error", "No relevant information", "No document content", "Not found in the document")
+
+
+def report_dir():
+    return os.getenv("REPORT_DIR") or DEFAULT_REPORT_DIR
+
+
+def chunk_pages(text_chunks):
+    """(first, last) PDF page of each chunk, read from the page markers; None when there are none (TXT)."""
+    pages = []
+    before = {}
+    current = None
+    for chunk in text_chunks:
+        markers = [int(number) for number in _PAGE_MARKER_RE.findall(chunk)]
+        if not markers:
+            pages.append((current, current) if current is not None else None)
+            continue
+        for number in markers:
+            if number not in before:
+                before[number] = current
+                current = number
+        # Text ahead of the first marker (chunk overlap included) belongs to the page before it
+        lead = chunk[:chunk.find("--- Page")].strip()
+        first = before[markers[0]] if lead and before[markers[0]] is not None else markers[0]
+        pages.append((first, markers[-1]))
+    return pages
+
+
+def format_pages(numbers):
+    """"p. 4" or "pp. 3-5, 9" for a collection of page numbers."""
+    numbers = sorted(set(numbers))
+    if not numbers:
+        return ""
+    ranges = []
+    start = end = numbers[0]
+    for number in numbers[1:]:
+        if number == end + 1:
+            end = number
+            continue
+        ranges.append((start, end))
+        start = end = number
+    ranges.append((start, end))
+    text = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+    return f"p. {text}" if len(numbers) == 1 else f"pp. {text}"
+
+
+def cite(sections, pages):
+    """Citation for 1-based chunk numbers: their pages for PDFs, the section numbers otherwise."""
+    numbers = set()
+    for section in sections:
+        span_pages = pages[section - 1] if 0 < section <= len(pages) else None
+        if span_pages:
+            numbers.update(range(span_pages[0], span_pages[1] + 1))
+    if numbers:
+        return f"Source: {format_pages(numbers)}"
+    return f"Source: sections {', '.join(str(s) for s in sorted(sections))}" if sections else ""
+
+
+def iter_report_blocks(summary, qa_history=(), checklist_results=(), translations=None, text_chunks=(), progress_callback=None):
+    """("heading" | "text", text) blocks of the report, produced lazily for write_pdf()."""
+    translations = {language: text for language, text in (translations or {}).items() if text and not text.startswith("Error")}
+    pages = chunk_pages(text_chunks)
+    total = 1 + len(qa_history) + len(checklist_results) + len(translations)
+    written = 0
+
+    def advance(message):
+        nonlocal written
+        written += 1
+        if progress_callback:
+            progress_callback(0.95 * written / total, message)
+
+    yield ("heading", "Summary")
+    yield ("text", summary)
+    advance("Writing the summary...")
+
+    if qa_history:
+        retriever = ChunkRetriever(text_chunks) if text_chunks else None
+        yield ("heading", f"Questions and Answers ({len(qa_history)})")
+        for number, (question, answer) in enumerate(qa_history, start=1):
+            block = f"Q{number}. {question}\n\nA: {answer}"
+            if retriever is not None and not answer.startswith(_UNANSWERED):
+                sections = [index + 1 for index in retriever.top(f"{question} {answer}", k=CITED_SECTIONS)]
+                citation = cite(sections, pages)
+                if citation:
+                    block += f"\n\n{citation}"
+            yield ("text", block)
+            advance(f"Writing answers ({number}/{len(qa_history)})...")
+
+    if checklist_results:
+        answered = sum(1 for row in checklist_results if row["status"] == "answered")
+        yield ("heading", f"Checklist ({answered} of {len(checklist_results)} answered)")
+        for number, row in enumerate(checklist_results, start=1):
+            block = f"Q{number}. {row['question']}\n\nA: {row['answer']}"
+            citation = cite(row["sections"], pages)
+            if citation:
+                block += f"\n\n{citation}"
+            yield ("text", block)
+            advance(f"Writing the checklist ({number}/{len(checklist_results)})...")
+
+    for letter, (language, text) in zip("ABCDEFGHIJKLMNOPQRSTUVWXYZ", translations.items()):
+        yield ("heading", f"Appendix {letter}: Summary in {language}")
+        yield ("text", text)
+        advance(f"Writing the {language} appendix...")
+
+
+def _remove_stale_reports(directory):
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if time.time() - os.path.getmtime(path) > STALE_REPORT_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def build_report(document_id, summary, qa_history=(), checklist_results=(), translations=None, text_chunks=(),
+                 title="Bid Analysis Report", progress_callback=None):
+    """Write the full report PDF to a new file under the report directory.
+
+    Runs as a job: progress_callback(fraction, text) reports the sections written.
+    Returns {"document_id", "path", "bytes", "questions", "checklist", "appendices"}.
+    """
+    directory = report_dir()
+    os.makedirs(directory, exist_ok=True)
+    _remove_stale_reports(directory)
+    handle, path = tempfile.mkstemp(dir=directory, prefix=f"{(document_id or 'report')[:16]}-", suffix=".pdf")
+    os.close(handle)
+    blocks = iter_report_blocks(summary, qa_history, checklist_results, translations, text_chunks, progress_callback)
+    with span("report_export"):
+        written = write_pdf(path, blocks, title)
+    if not written:
+        os.remove(path)
+        raise RuntimeError("PDF generation is unavailable. Ensure 'reportlab' is installed on the server.")
+    if progress_callback:
+        progress_callback(1.0, "Report ready")
+    appendices = [language for language, text in (translations or {}).items() if text and not text.startswith("Error")]
+    return {"document_id": document_id, "path": path, "bytes": os.path.getsize(path),
+            "questions": len(qa_history), "checklist": len(checklist_results), "appendices": appendices}
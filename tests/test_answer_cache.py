@@ -0,0 +1,87 @@
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, answer_from_summary, match_frequent_question, parse_summary_fields, question_terms
+
+SUMMARY = """**IMPORTANT DATES:**
+- Bid Submission Deadline: 28/06/2024, 3:00 PM
+- Technical Bid Opening: 29/06/2024
+
+**FINANCIAL DETAILS:**
+- EMD (Earnest Money Deposit): Rs. 7,50,000
+- EMD Exemption (if any): Not mentioned
+- Estimated Contract Value: Rs. 3.2 crore
+"""
+
+
+@pytest.mark.parametrize("question, frequent", [
+    ("What is the tender deadline?", "What is the tender deadline?"),
+    ("When is the bid due?", "What is the tender deadline?"),
+    ("What is the last date of submission?", "What is the tender deadline?"),
+    ("Last date for bid submission", "What is the tender deadline?"),
+    ("How much is the EMD?", "What is the EMD amount?"),
+    ("What is the earnest money deposit?", "What is the EMD amount?"),
+    ("What is the estimated cost of the contract?", "What is the contract value?"),
+    ("How long is the contract period?", "What is the contract duration?"),
+    ("Who issued this tender?", "Who is the issuing organization?"),
+    ("When does the technical bid open?", "When is the technical bid opening?"),
+    ("Is there any prebid meeting?", "Is there a pre-bid meeting?"),
+    ("What are the eligibility requirements?", "What are the eligibility criteria?"),
+    ("What are the liquidated damages?", "What are the penalty or liquidated damages clauses?"),
+])
+def test_paraphrases_match_their_frequent_question(question, frequent):
+    assert match_frequent_question(question) == frequent
+
+
+@pytest.mark.parametrize("question", [
+    "What is the last date for submission of clarifications?",
+    "What is the deadline for submission of queries?",
+    "What is the EMD for MSMEs?",
+    "What is the EMD submission deadline?",
+    "What is the penalty for late submission?",
+    "When is the financial bid opening date?",
+    "What documents are required for EMD exemption?",
+    "What is the performance bank guarantee format?",
+])
+def test_near_misses_are_not_answered_as_frequent_questions(question):
+    assert match_frequent_question(question) is None
+
+
+def test_terms_are_a_set_with_plurals_trimmed():
+    assert question_terms("What is the last date for submission of queries?") == {"deadline", "query"}
+    assert question_terms("List the penalties, fees and taxes") == {"penalty", "fee", "tax"}
+    assert question_terms("What is the bus analysis?") == {"bus", "analysis"}
+
+
+def test_summary_fields_answer_frequent_questions():
+    fields = parse_summary_fields(SUMMARY)
+    assert fields["EMD (Earnest Money Deposit)"] == "Rs. 7,50,000"
+    assert answer_from_summary("How much is the EMD?", SUMMARY) == "EMD (Earnest Money Deposit): Rs. 7,50,000"
+    assert answer_from_summary("When is the bid due?", SUMMARY) == "Bid Submission Deadline: 28/06/2024, 3:00 PM"
+    assert answer_from_summary("What is the deadline for submission of queries?", SUMMARY) is None
+    assert answer_from_summary("What is the contract duration?", SUMMARY) is None
+
+
+def test_cache_lookup_matches_paraphrases_but_not_other_subjects(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    cache.store("doc", "What is the deadline for pre-bid queries?", "10/06/2024", "question")
+    assert cache.lookup("doc", "What is the deadline for pre-bid queries?")["similarity"] == 1.0
+    assert cache.lookup("doc", "Last date for pre-bid queries?")["answer"] == "10/06/2024"
+    assert cache.lookup("doc", "What is the tender deadline?") is None
+    assert cache.lookup("doc", "What is the deadline for pre-bid clarifications?") is None
+    assert cache.lookup("other", "What is the deadline for pre-bid queries?") is None
+
+
+def test_prefill_keeps_only_answered_rows(tmp_path, monkeypatch):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    monkeypatch.setattr(answer_cache, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(answer_cache, "run_checklist", lambda questions, text_chunks, **kwargs: [
+        {"question": "What is the contract duration?", "answer": "12 months", "status": "answered"},
+        {"question": "What are the payment terms?", "answer": "Not found in the document.", "status": "not_found"},
+        {"question": "Is there a pre-bid meeting?", "answer": "Error: rate limited", "status": "error"},
+    ])
+    result = answer_cache.prefill_frequent_answers("doc", ["chunk"], SUMMARY)
+    assert result["prefilled"] == 1
+    assert cache.lookup("doc", "How long is the contract period?")["answer"] == "12 months"
+    assert cache.lookup("doc", "What are the payment terms?") is None
+    assert cache.lookup("doc", "Is there a pre-bid meeting?") is None
@@ -0,0 +1,48 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api_server import build_server
+
+
+@pytest.fixture
+def server():
+    server = build_server(port=0, max_workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    server.RequestHandlerClass.service.jobs.shutdown(wait=False)
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize("body", [b"[]", b'"x"', b"3", b"null"])
+def test_json_bodies_must_be_objects(server, body):
+    assert _post(f"{server}/corpus/questions", body) == (400, {"error": "Request body must be a JSON object"})
+
+
+def test_invalid_json_is_rejected(server):
+    assert _post(f"{server}/corpus/questions", b"{not json") == (400, {"error": "Request body must be JSON"})
+
+
+def test_unexpected_errors_return_500(server, monkeypatch):
+    from api_server import AnalyzerRequestHandler
+
+    def broken(self, payload):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(AnalyzerRequestHandler, "_corpus_question", broken)
+    status, payload = _post(f"{server}/corpus/questions", b"{}")
+    assert status == 500 and "boom" in payload["error"]
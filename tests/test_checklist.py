@@ -0,0 +1,49 @@
+import checklist
+from checklist import ChunkRetriever, _merge_batch, _parse_numbered_json, parse_questions
+
+
+def test_parse_numbered_json_reads_objects_and_numbered_lines():
+    reply = 'Here you go: {"1": {"answer": "Rs. 5 lakh", "found": true}, "Q2": "Not found", "7": "out of range"}'
+    assert _parse_numbered_json(reply, 2) == {1: {"answer": "Rs. 5 lakh", "found": True}, 2: "Not found"}
+    assert _parse_numbered_json("1. 90 days\n2) Bank guarantee", 2) == {1: "90 days", 2: "Bank guarantee"}
+    assert _parse_numbered_json("no structure at all", 2) == {}
+
+
+def test_merge_batch_maps_merged_answers_back_to_question_indexes(monkeypatch):
+    prompts = []
+
+    def fake_ask_llm(prompt, context, **kwargs):
+        prompts.append(context)
+        return '{"1": "EMD is Rs. 5 lakh, payable by DD", "2": {"answer": "12 months"}}'
+
+    monkeypatch.setattr(checklist, "ask_llm", fake_ask_llm)
+    merged = _merge_batch([
+        (4, "What is the EMD?", ["Rs. 5 lakh", "payable by DD"]),
+        (9, "What is the contract duration?", ["12 months", "one year"]),
+    ])
+    assert merged == {4: "EMD is Rs. 5 lakh, payable by DD", 9: "12 months"}
+    assert "1. What is the EMD?" in prompts[0] and "   - payable by DD" in prompts[0]
+
+
+def test_merge_batch_falls_back_to_the_first_candidate(monkeypatch):
+    monkeypatch.setattr(checklist, "ask_llm", lambda prompt, context, **kwargs: "Error: rate limited")
+    assert _merge_batch([(0, "EMD?", ["Rs. 5 lakh", "Rs. 5,00,000"])]) == {0: "Rs. 5 lakh"}
+
+    monkeypatch.setattr(checklist, "ask_llm", lambda prompt, context, **kwargs: '{"2": "only the second"}')
+    assert _merge_batch([(0, "EMD?", ["first"]), (1, "Duration?", ["second"])]) == {0: "first", 1: "only the second"}
+
+
+def test_retriever_ranks_chunks_by_shared_terms():
+    retriever = ChunkRetriever([
+        "The earnest money deposit (EMD) is Rs. 5 lakh.",
+        "Scope of work covers road resurfacing.",
+        "Performance security of 5% is required; EMD is refundable.",
+    ])
+    assert set(retriever.top("What is the EMD amount?", k=2)) == {0, 2}
+    assert retriever.top("scope of work", k=1) == [1]
+    assert retriever.top("the of is") == []
+
+
+def test_parse_questions_strips_numbering_and_blank_lines():
+    data = b"1. What is the EMD?\n\n- Is there a pre-bid meeting?\nQ3) Contract duration?\n"
+    assert parse_questions(data, "questions.txt") == ["What is the EMD?", "Is there a pre-bid meeting?", "Contract duration?"]
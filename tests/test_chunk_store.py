@@ -0,0 +1,42 @@
+from chunk_store import ChunkStore, chunk_hash, diff_chunks
+
+
+def test_chunk_hash_ignores_page_numbering_and_whitespace():
+    assert chunk_hash("--- Page 3 ---\nScope  of work") == chunk_hash("--- Page 4 --- Scope of work")
+    assert chunk_hash("Scope of work") != chunk_hash("Scope of works")
+    assert chunk_hash("Scope of work", salt="a") != chunk_hash("Scope of work", salt="b")
+
+
+def test_diff_chunks_aligns_unchanged_chunks_around_edits():
+    old = ["a", "b", "c", "d"]
+    new = ["a", "B", "c", "d", "e"]
+    unchanged, added, removed = diff_chunks(old, new)
+    assert unchanged == [(0, 0), (2, 2), (3, 3)]
+    assert added == [1, 4]
+    assert removed == [1]
+
+
+def test_diff_chunks_handles_insertions_that_shift_indexes():
+    unchanged, added, removed = diff_chunks(["a", "b", "c"], ["x", "a", "b", "c"])
+    assert unchanged == [(0, 1), (1, 2), (2, 3)]
+    assert added == [0] and removed == []
+
+
+def test_diff_chunks_of_identical_and_empty_documents():
+    assert diff_chunks(["a", "b"], ["a", "b"]) == ([(0, 0), (1, 1)], [], [])
+    assert diff_chunks([], ["a"]) == ([], [0], [])
+
+
+def test_summaries_are_stored_by_chunk_hash(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite3"))
+    store.store_summaries({"h1": "first", "h2": "second"})
+    assert store.lookup_summaries(["h1", "h3", "h1"]) == {"h1": "first"}
+
+
+def test_previous_version_needs_most_chunks_in_common(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite3"))
+    store.save_document("original", ["a", "b", "c", "d"], "summary of the original")
+    store.save_document("unrelated", ["w", "x", "y", "z"], "summary of another tender")
+    assert store.find_previous_version(["a", "b", "c", "e"], exclude_id="revision")["id"] == "original"
+    assert store.find_previous_version(["a", "q", "r", "s"], exclude_id="revision") is None
+    assert store.find_previous_version(["a", "b", "c", "d"], exclude_id="original") is None
@@ -0,0 +1,56 @@
+from datetime import date
+
+from analyzer_core import CHANGES_HEADING
+from corpus import extract_tender_fields, parse_amount, parse_date
+
+BASE_SUMMARY = """**BASIC INFORMATION:**
+- Tender Number/Reference: PWD/2024/117
+- Issuing Department/Organization: Public Works Department
+
+**FINANCIAL DETAILS:**
+- EMD (Earnest Money Deposit): Rs. 7,50,000
+- Estimated Contract Value: Rs. 3.2 crore
+
+**IMPORTANT DATES:**
+- Bid Submission Deadline: 28/06/2024
+"""
+
+REVISION_SUMMARY = f"""**{CHANGES_HEADING}:**
+- Bid Submission Deadline: 14/06/2024 -> 28/06/2024
+- EMD (Earnest Money Deposit): Rs. 5,00,000 -> Rs. 7,50,000
+
+{BASE_SUMMARY}"""
+
+
+def test_fields_come_from_the_structured_summary():
+    fields = extract_tender_fields(BASE_SUMMARY)
+    assert fields["tender_ref"] == "PWD/2024/117"
+    assert fields["deadline"] == "2024-06-28"
+    assert fields["emd"] == 750000
+    assert fields["contract_value"] == 32000000
+
+
+def test_revision_summary_records_the_revised_values():
+    # The what-changed section lists the old values first; the catalog must keep the new ones
+    fields = extract_tender_fields(REVISION_SUMMARY)
+    assert fields["deadline"] == "2024-06-28"
+    assert fields["emd"] == 750000
+    assert fields == extract_tender_fields(BASE_SUMMARY)
+
+
+def test_text_chunks_fill_fields_missing_from_the_summary():
+    chunks = ["Notice inviting tender. Tender No: NIT-45/2024", "Last date of submission: 5 July 2024"]
+    fields = extract_tender_fields("**BASIC INFORMATION:**\n- Contract Duration: 12 months", chunks)
+    assert fields["tender_ref"] == "NIT-45/2024"
+    assert fields["deadline"] == "2024-07-05"
+
+
+def test_error_summaries_are_ignored():
+    assert extract_tender_fields("Error: the LLM request failed. Tender Number: X") == {}
+
+
+def test_parse_amount_and_date():
+    assert parse_amount("EMD of Rs. 2,50,000 payable") == 250000
+    assert parse_amount("1.2 crore") == 12000000
+    assert parse_amount("within 30 days") is None
+    assert parse_date("due on 05/07/2024 or 10/07/2024") == date(2024, 7, 5)
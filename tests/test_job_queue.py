@@ -0,0 +1,80 @@
+import socket
+import subprocess
+import sys
+import time
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, Job, JobQueue, JobStore
+
+
+def _insert(store, status, owner, updated=None):
+    job = Job("analysis", key=f"key-{owner}-{status}-{updated}")
+    job.status = status
+    if updated is not None:
+        job.updated = updated
+    with store._connect() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, key, status, progress, message, error, created, updated, owner) VALUES (?, ?, ?, ?, 0, '', NULL, ?, ?, ?)",
+            (job.id, job.kind, job.key, job.status, job.created, job.updated, owner),
+        )
+    return job.id
+
+
+def test_restart_only_fails_jobs_whose_process_has_exited(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    host = socket.gethostname()
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    try:
+        other_live = _insert(store, RUNNING, f"{host}:{live.pid}:abc")
+        other_dead = _insert(store, QUEUED, f"{host}:{dead.pid}:abc")
+        legacy = _insert(store, RUNNING, None)
+        remote = _insert(store, RUNNING, "elsewhere:1:abc")
+        own = _insert(store, RUNNING, store.owner)
+
+        restarted = JobStore(path)
+        assert restarted.load(other_live).status == RUNNING
+        assert restarted.load(other_dead).status == FAILED
+        assert restarted.load(legacy).status == FAILED
+        assert restarted.load(remote).status == RUNNING
+        # A second store in the same process must not fail its own live jobs
+        assert restarted.load(own).status == RUNNING
+    finally:
+        live.kill()
+        live.wait()
+
+
+def test_prune_drops_old_and_excess_finished_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), max_age=3600, max_finished=2)
+    now = time.time()
+    old = _insert(store, DONE, store.owner, updated=now - 7200)
+    recent = [_insert(store, DONE, store.owner, updated=now - i) for i in range(3)]
+    running = _insert(store, RUNNING, store.owner, updated=now - 7200)
+
+    assert store.prune() == 2
+    assert store.load(old) is None
+    assert store.load(recent[2]) is None
+    assert store.load(recent[0]) is not None and store.load(recent[1]) is not None
+    assert store.load(running) is not None
+
+
+def test_results_persist_and_done_jobs_are_reused(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = JobQueue(max_workers=1, store=store)
+    calls = []
+
+    def work(value, progress_callback):
+        calls.append(value)
+        progress_callback(0.5, "Halfway")
+        return {"value": value}
+
+    job = queue.submit("analysis", work, 7, key="doc-1")
+    queue.shutdown()
+    assert store.load(job.id).result == {"value": 7}
+
+    queue = JobQueue(max_workers=1, store=JobStore(store.path))
+    reused = queue.submit("analysis", work, 8, key="doc-1", reuse_done=True)
+    queue.shutdown()
+    assert reused.id == job.id and reused.status == DONE
+    assert calls == [7]
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import analyzer_core
+from llm_latency import MIN_DEADLINE_SECONDS, MIN_SAMPLES, LatencyTracker, latency_class
+
+MODEL = "test-model"
+
+
+class _OpenRateLimiter:
+    def acquire(self):
+        pass
+
+    def try_acquire(self):
+        return True
+
+
+class _Response:
+    status_code = 200
+
+
+def _tracker(latency, hedging=False):
+    tracker = LatencyTracker(hedge_budget=1.0, hedging=hedging)
+    for _ in range(MIN_SAMPLES):
+        tracker.record(MODEL, 1000, latency)
+    return tracker
+
+
+@pytest.fixture
+def patched(monkeypatch):
+    def install(tracker, send):
+        monkeypatch.setattr(analyzer_core, "get_latency_tracker", lambda: tracker)
+        monkeypatch.setattr(analyzer_core, "get_rate_limiter", lambda: _OpenRateLimiter())
+        monkeypatch.setattr(analyzer_core, "_send_completion", send)
+        monkeypatch.setattr(analyzer_core, "_hedge_executor", None)
+        monkeypatch.setattr(analyzer_core, "_hedge_slots", None)
+    return install
+
+
+def test_latency_class_buckets_by_power_of_two():
+    assert latency_class(1000) == 1024
+    assert latency_class(1024) == 1024
+    assert latency_class(1025) == 2048
+
+
+def test_deadline_uses_the_ceiling_until_enough_samples():
+    tracker = LatencyTracker(hedging=False)
+    for _ in range(MIN_SAMPLES - 1):
+        tracker.record(MODEL, 1000, 4.0)
+    assert tracker.deadline(MODEL, 1000, 30) == 30
+    tracker.record(MODEL, 1000, 4.0)
+    assert tracker.deadline(MODEL, 1000, 30) == 8.0
+    assert tracker.deadline(MODEL, 1000, 30, attempt=1) == 16.0
+    assert tracker.deadline(MODEL, 1000, 30, attempt=2) == 30
+    assert _tracker(0.1).deadline(MODEL, 1000, 30) == MIN_DEADLINE_SECONDS
+
+
+def test_timeouts_raise_the_deadline():
+    tracker = _tracker(4.0)
+    for _ in range(5):
+        tracker.record_timeout(MODEL, 1000, 8.0)
+    assert tracker.percentile(MODEL, 1000, 0.99) == 8.0
+    assert tracker.deadline(MODEL, 1000, 30) == 16.0
+
+
+def test_hedge_budget_limits_hedges_to_a_share_of_calls():
+    tracker = LatencyTracker(hedge_budget=0.1, hedging=True)
+    assert not tracker.take_hedge()
+    for _ in range(10):
+        tracker.record_call()
+    assert tracker.take_hedge()
+    assert not tracker.take_hedge()
+
+
+def test_hedged_call_records_latency_from_the_first_send(patched):
+    tracker = _tracker(0.05, hedging=True)
+    release_primary = threading.Event()
+    sent = []
+
+    def send(headers, data, timeout):
+        sent.append(timeout)
+        if len(sent) == 1:
+            release_primary.wait(5)
+        return _Response()
+
+    patched(tracker, send)
+    response, latency = analyzer_core._post_completion({}, {"model": MODEL, "max_tokens": 1000}, None, 30)
+    assert response.status_code == 200
+    assert len(sent) == 2 and sent[1] < sent[0]
+    assert latency >= 0.05
+    assert max(tracker._samples[(MODEL, 1024)]) == latency
+
+    # The pair keeps its hedge slot until the abandoned primary finishes
+    slots = analyzer_core._hedge_slots
+    capacity = analyzer_core.get_scheduler().max_concurrent
+    held = sum(slots.acquire(blocking=False) for _ in range(capacity))
+    for _ in range(held):
+        slots.release()
+    assert held == capacity - 1
+    release_primary.set()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        held = sum(slots.acquire(blocking=False) for _ in range(capacity))
+        for _ in range(held):
+            slots.release()
+        if held == capacity:
+            break
+        time.sleep(0.01)
+    assert held == capacity
+
+
+def test_timed_out_call_is_recorded_at_its_deadline(patched):
+    tracker = _tracker(4.0)
+
+    def send(headers, data, timeout):
+        raise requests.exceptions.Timeout("read timed out")
+
+    patched(tracker, send)
+    with pytest.raises(requests.exceptions.Timeout):
+        analyzer_core._post_completion({}, {"model": MODEL, "max_tokens": 1000}, None, 30)
+    assert max(tracker._samples[(MODEL, 1024)]) == 8.0
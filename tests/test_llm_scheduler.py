@@ -0,0 +1,94 @@
+import threading
+import time
+
+from llm_scheduler import BACKGROUND, INTERACTIVE, TRANSLATION, LLMScheduler
+
+
+def _grant_order(scheduler, requests):
+    """Queue (priority, session, label) requests behind one held slot; return the order they are granted."""
+    order = []
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot(BACKGROUND, "holder"):
+            release.wait()
+
+    def request(priority, session, label):
+        with scheduler.slot(priority, session):
+            with lock:
+                order.append(label)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while scheduler.stats()["active"] < 1:
+        time.sleep(0.01)
+    threads = []
+    for priority, session, label in requests:
+        thread = threading.Thread(target=request, args=(priority, session, label))
+        thread.start()
+        threads.append(thread)
+        # Let each request join the queue in submission order
+        while sum(c["queued"] for c in scheduler.stats()["classes"].values()) < len(threads):
+            time.sleep(0.01)
+    release.set()
+    for thread in threads + [holder]:
+        thread.join()
+    return order
+
+
+def test_higher_priority_classes_are_served_first():
+    scheduler = LLMScheduler(max_concurrent=1, per_session_limit=1)
+    order = _grant_order(scheduler, [
+        (BACKGROUND, "a", "background"),
+        (TRANSLATION, "b", "translation"),
+        (INTERACTIVE, "c", "interactive"),
+    ])
+    assert order == ["interactive", "translation", "background"]
+
+
+def test_sessions_take_turns_within_a_class():
+    scheduler = LLMScheduler(max_concurrent=1, per_session_limit=1)
+    order = _grant_order(scheduler, [
+        (BACKGROUND, "a", "a1"),
+        (BACKGROUND, "a", "a2"),
+        (BACKGROUND, "a", "a3"),
+        (BACKGROUND, "b", "b1"),
+    ])
+    assert order.index("b1") < order.index("a2")
+
+
+def test_per_session_limit_caps_concurrent_slots():
+    scheduler = LLMScheduler(max_concurrent=4, per_session_limit=2)
+    peak = 0
+    active = 0
+    lock = threading.Lock()
+
+    def request():
+        nonlocal peak, active
+        with scheduler.slot(INTERACTIVE, "greedy"):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+    assert scheduler.stats()["classes"]["interactive"]["granted"] == 6
+
+
+def test_round_robin_history_is_bounded():
+    scheduler = LLMScheduler(max_concurrent=2, session_history=4)
+    with scheduler.slot(INTERACTIVE, "long-running"):
+        for number in range(100):
+            with scheduler.slot(INTERACTIVE, f"session-{number}"):
+                pass
+        assert len(scheduler._last_granted) <= 8
+        assert "long-running" in scheduler._last_granted
+        assert "session-99" in scheduler._last_granted
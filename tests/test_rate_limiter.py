@@ -0,0 +1,48 @@
+import threading
+import time
+
+from rate_limiter import RateLimiter
+
+
+def test_try_acquire_stops_at_the_limit_until_the_window_passes():
+    limiter = RateLimiter(requests_per_minute=2, window=0.2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    time.sleep(0.25)
+    assert limiter.try_acquire()
+
+
+def test_acquire_blocks_until_a_slot_frees():
+    limiter = RateLimiter(requests_per_minute=1, window=0.2)
+    limiter.acquire()
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_defer_pauses_every_caller():
+    limiter = RateLimiter(requests_per_minute=10, window=60.0)
+    limiter.defer(0.2)
+    assert not limiter.try_acquire()
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_concurrent_callers_never_exceed_the_limit():
+    limiter = RateLimiter(requests_per_minute=5, window=60.0)
+    granted = []
+    lock = threading.Lock()
+
+    def worker():
+        if limiter.try_acquire():
+            with lock:
+                granted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(granted) == 5
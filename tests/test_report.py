@@ -0,0 +1,46 @@
+import io
+
+from analyzer_core import _LazyStory, create_pdf_bytes, write_pdf
+from metrics import get_metrics
+from report import chunk_pages, cite, format_pages
+
+
+def _pdf_builds():
+    return get_metrics().snapshot()["stages"].get("pdf_build", {}).get("count", 0)
+
+
+def test_chunk_pages_follows_page_markers():
+    chunks = [
+        "--- Page 1 --- Notice inviting tender",
+        "tender. --- Page 2 --- Eligibility --- Page 3 --- EMD",
+        "EMD details continue",
+        "Rs. 5 lakh --- Page 4 --- Scope",
+    ]
+    assert chunk_pages(chunks) == [(1, 1), (1, 3), (3, 3), (3, 4)]
+    assert chunk_pages(["plain text", "more text"]) == [None, None]
+
+
+def test_format_pages_collapses_ranges():
+    assert format_pages([4]) == "p. 4"
+    assert format_pages([5, 3, 4, 9, 4]) == "pp. 3-5, 9"
+    assert format_pages([]) == ""
+
+
+def test_cite_uses_pages_or_section_numbers():
+    assert cite([1, 2], [(1, 1), (2, 3)]) == "Source: pp. 1-3"
+    assert cite([3, 1], [None, None, None]) == "Source: sections 1, 3"
+    assert cite([], []) == ""
+
+
+def test_lazy_story_holds_only_a_lookahead():
+    story = _LazyStory(iter(range(100)), lookahead=4)
+    assert len(story) == 4 and list(story) == [0, 1, 2, 3]
+    del story[:2]
+    assert len(story) == 4 and list(story) == [2, 3, 4, 5]
+
+
+def test_pdf_builds_are_timed_once():
+    before = _pdf_builds()
+    write_pdf(io.BytesIO(), [("heading", "Summary"), ("text", "EMD: Rs. 5 lakh")])
+    create_pdf_bytes("EMD: Rs. 5 lakh")
+    assert _pdf_builds() == before + 2
@@ -0,0 +1,76 @@
+import io
+import random
+
+import pytest
+
+from analyzer_core import (DocumentError, clean_text, iter_clean_text, iter_decoded_text, iter_text_chunks,
+                           prepare_document_chunks, split_text_into_chunks)
+
+WORDS = ["tender", "bid", "EMD", "Rs.", "5,00,000", "deadline", "15/03/2025", "clause", "पात्रता", "शर्तें", "बयाना"]
+
+
+def _document(seed, length=12000):
+    rng = random.Random(seed)
+    parts = []
+    while sum(map(len, parts)) < length:
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice([" ", " ", " ", ". ", ".\n", "\n\n", "\t", "  \r\n", "\x0c", "\x00", " \x07 "]))
+    return "".join(parts)
+
+
+def _random_pieces(text, seed):
+    rng = random.Random(seed)
+    pieces, position = [], 0
+    while position < len(text):
+        size = rng.choice([1, 2, 7, 64, 500, 4096])
+        pieces.append(text[position:position + size])
+        position += size
+    return pieces
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_iter_clean_text_matches_clean_text_for_any_split(seed):
+    text = "  \n\x00" + _document(seed) + " \t\n"
+    assert "".join(iter_clean_text(_random_pieces(text, seed))) == clean_text(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_iter_text_chunks_matches_split_text_into_chunks_for_any_split(seed):
+    text = clean_text(_document(seed, length=40000))
+    expected = split_text_into_chunks(text, chunk_size=1500, overlap=150)
+    assert len(expected) > 10
+    assert list(iter_text_chunks(_random_pieces(text, seed), chunk_size=1500, overlap=150)) == expected
+
+
+def test_chunks_overlap_and_cover_the_text():
+    text = clean_text(_document(7, length=20000))
+    chunks = split_text_into_chunks(text, chunk_size=1500, overlap=150)
+    assert all(len(chunk) <= 1500 * 4 // 3 + 150 for chunk in chunks)
+    assert chunks[0] == text[:len(chunks[0])]
+    assert text.endswith(chunks[-1])
+    assert split_text_into_chunks("   \n ") == []
+
+
+def test_iter_decoded_text_keeps_characters_split_across_blocks():
+    data = "शर्तें और बयाना".encode("utf-8") + b"\xff"
+    assert "".join(iter_decoded_text(io.BytesIO(data), block_size=3)) == data.decode("utf-8", errors="replace")
+
+
+def test_prepare_document_chunks_reads_bytes_paths_and_files(tmp_path):
+    text = _document(3, length=8000)
+    data = text.encode("utf-8")
+    expected = split_text_into_chunks(clean_text(text))
+    path = tmp_path / "tender.txt"
+    path.write_bytes(data)
+    handle = io.BytesIO(data)
+    handle.read(10)  # sources are rewound before reading
+    assert prepare_document_chunks(data, "text/plain") == expected
+    assert prepare_document_chunks(str(path), "text/plain") == expected
+    assert prepare_document_chunks(handle, "text/plain") == expected
+
+
+def test_prepare_document_chunks_rejects_short_documents():
+    with pytest.raises(DocumentError, match="too short"):
+        prepare_document_chunks(b"EMD: Rs. 5 lakh", "text/plain")
+    with pytest.raises(DocumentError, match="too short"):
+        prepare_document_chunks(b" \n\t" * 100, "text/plain")
@@ -0,0 +1,258 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Default location of the persistent memory, next to the downloaded .fonts directory
+DEFAULT_MEMORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "translation_memory.sqlite3")
+
+# Fixed text produced by generate_comprehensive_summary; translated once per language
+SUMMARY_FIXED_SEGMENTS = [
+    # Section headings
+    "BASIC INFORMATION",
+    "FINANCIAL DETAILS",
+    "TIMELINE",
+    "REQUIREMENTS",
+    # Field labels
+    "Tender Number/Reference",
+    "Name of Work/Project",
+    "Issuing Department/Organization",
+    "Estimated Contract Value",
+    "EMD (Earnest Money Deposit)",
+    "EMD Exemption (if any)",
+    "EMD Exemption",
+    "Performance Security",
+    "Bid Submission Deadline",
+    "Technical Bid Opening",
+    "Contract Duration",
+    "Key Eligibility Criteria",
+    "Required Documents",
+    "Technical Specifications (brief)",
+    "Technical Specifications",
+    "Payment Terms",
+    # Recurring values
+    "Not mentioned",
+    "Not found",
+    "Not specified",
+    "Not mentioned in the document",
+]
+
+_LINE_RE = re.compile(r'^(?P<indent>\s*)(?P<bullet>(?:[-*•]|\d+[.)])\s+)?(?P<body>.*?)(?P<trail>\s*)$')
+_HEADING_RE = re.compile(r'^(?P<open>\*\*)(?P<label>[^*]+?)(?P<colon>:?)(?P<close>\*\*)(?P<sep>:?\s*)(?P<value>.*)$')
+_FIELD_RE = re.compile(r'^(?P<label>[^:]{1,80}?[^\d\s:])(?P<sep>:\s*)(?P<value>.*)$')
+_LETTER_RE = re.compile(r'[^\W\d_]')
+_MARKER_RE = re.compile(r'^\s*<<(\d+)>>\s?(.*)$', re.MULTILINE)
+
+
+def normalize_segment(segment):
+    return re.sub(r'\s+', ' ', segment).strip()
+
+
+def segment_hash(segment):
+    return hashlib.sha256(normalize_segment(segment).encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    """Persistent store of translated segments keyed by (segment hash, target language)."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("TRANSLATION_MEMORY_PATH") or DEFAULT_MEMORY_PATH
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "hash TEXT NOT NULL, language TEXT NOT NULL, source TEXT NOT NULL, "
+                "translation TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (hash, language))"
+            )
+
+    def _connect(self):
+        # A short-lived connection per operation keeps the store safe across threads and processes
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, segments, language):
+        """Return {segment: translation} for the segments already in memory."""
+        keys = {segment_hash(s): s for s in segments}
+        if not keys:
+            return {}
+        found = {}
+        hashes = list(keys)
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT hash, translation FROM segments WHERE language = ? AND hash IN ({','.join('?' * len(batch))})",
+                    [language.lower(), *batch],
+                ).fetchall()
+                for h, translation in rows:
+                    found[keys[h]] = translation
+        return found
+
+    def store(self, translations, language):
+        if not translations:
+            return
+        now = time.time()
+        rows = [(segment_hash(s), language.lower(), normalize_segment(s), t, now) for s, t in translations.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?)", rows)
+
+    def count(self, language=None):
+        with self._lock, self._connect() as conn:
+            if language:
+                return conn.execute("SELECT COUNT(*) FROM segments WHERE language = ?", (language.lower(),)).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+
+_default_memory = None
+_default_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    global _default_memory
+    with _default_memory_lock:
+        if _default_memory is None:
+            _default_memory = TranslationMemory()
+        return _default_memory
+
+
+def split_into_segments(text):
+    """Split summary text into a template of literal parts and translatable segments.
+
+    Returns (template, segments) where template items are either literal strings or
+    indexes into segments. Headings, field labels and values become separate segments
+    so recurring labels are reused across documents.
+    """
+    template = []
+    segments = []
+
+    def add_segment(value):
+        if not value:
+            return
+        if not _LETTER_RE.search(value):
+            # Numbers, dates and punctuation need no translation
+            template.append(value)
+            return
+        template.append(len(segments))
+        segments.append(value)
+
+    lines = text.replace('\r', '').split('\n')
+    for line_no, line in enumerate(lines):
+        if line_no:
+            template.append('\n')
+        match = _LINE_RE.match(line)
+        template.append(match.group('indent') + (match.group('bullet') or ''))
+        body = match.group('body')
+        heading = _HEADING_RE.match(body)
+        field = _FIELD_RE.match(body) if not heading else None
+        if heading:
+            template.append(heading.group('open'))
+            add_segment(heading.group('label').strip())
+            template.append(heading.group('colon') + heading.group('close') + heading.group('sep'))
+            add_segment(heading.group('value'))
+        elif field:
+            add_segment(field.group('label'))
+            template.append(field.group('sep'))
+            add_segment(field.group('value'))
+        else:
+            add_segment(body)
+        template.append(match.group('trail'))
+    return template, segments
+
+
+def reassemble(template, translations):
+    return ''.join(translations[part] if isinstance(part, int) else part for part in template)
+
+
+def _batch_segments(segments, max_chunk_chars):
+    batches = []
+    current = []
+    current_len = 0
+    for segment in segments:
+        add_len = len(segment) + 8
+        if current and current_len + add_len > max_chunk_chars:
+            batches.append(current)
+            current = []
+            current_len = 0
+        current.append(segment)
+        current_len += add_len
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_missing(segments, call_api, max_chunk_chars, delay):
+    """Translate segments through call_api in marker-numbered batches."""
+    translated = {}
+    for batch_no, batch in enumerate(_batch_segments(segments, max_chunk_chars)):
+        if batch_no:
+            time.sleep(delay)
+        if len(batch) == 1:
+            result = call_api(batch[0], segmented=False)
+            if result.startswith("Error"):
+                return translated, result
+            translated[batch[0]] = result.strip()
+            continue
+        payload = '\n'.join(f"<<{i + 1}>> {normalize_segment(s)}" for i, s in enumerate(batch))
+        result = call_api(payload, segmented=True)
+        if result.startswith("Error"):
+            return translated, result
+        parsed = {int(n): t.strip() for n, t in _MARKER_RE.findall(result)}
+        for i, segment in enumerate(batch):
+            value = parsed.get(i + 1)
+            if not value:
+                # The model dropped or merged a marker; translate this segment on its own
+                value = call_api(segment, segmented=False)
+                if value.startswith("Error"):
+                    return translated, value
+                value = value.strip()
+            translated[segment] = value
+    return translated, None
+
+
+def warm_language(target_language, call_api, memory=None, max_chunk_chars=1400, delay=0.4):
+    """Pre-translate the fixed summary headings, labels and phrases for a language."""
+    memory = memory or get_translation_memory()
+    known = memory.lookup(SUMMARY_FIXED_SEGMENTS, target_language)
+    missing = [s for s in SUMMARY_FIXED_SEGMENTS if s not in known]
+    if not missing:
+        return None
+    translated, error = _translate_missing(missing, call_api, max_chunk_chars, delay)
+    memory.store(translated, target_language)
+    return error
+
+
+def translate_with_memory(text, target_language, call_api, memory=None, max_chunk_chars=1400, delay=0.4):
+    """Translate text segment by segment, sending only segments not yet in memory to call_api.
+
+    call_api(text, segmented) must return the translation, or a string starting with
+    "Error" on failure. When segmented is True the text is a list of "<<n>> segment"
+    lines and the reply must keep the markers.
+    """
+    if not text:
+        return ""
+    memory = memory or get_translation_memory()
+    template, segments = split_into_segments(text)
+    if not segments:
+        return text
+
+    unique = list(dict.fromkeys(segments))
+    known = memory.lookup(unique, target_language)
+    if any(s not in known for s in unique):
+        error = warm_language(target_language, call_api, memory, max_chunk_chars, delay)
+        if error:
+            return error
+        known = memory.lookup(unique, target_language)
+
+    missing = [s for s in unique if s not in known]
+    if missing:
+        translated, error = _translate_missing(missing, call_api, max_chunk_chars, delay)
+        memory.store(translated, target_language)
+        if error:
+            return error
+        known.update(translated)
+
+    return reassemble(template, [known[s] for s in segments])